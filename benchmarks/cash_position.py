@@ -0,0 +1,97 @@
+"""Cash position: daily rollup vs SUM over every Credit and Debit.
+
+Run from the repository root:
+
+    python -m benchmarks.cash_position
+
+Seeds three years of transactions at increasing volumes, then times the
+closing balance, an as-of-date balance and the 12-month trend from the
+rollup against the equivalent full-table aggregates. Also times the
+rollup's per-transaction write cost. Uses an in-memory SQLite database.
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from config import Config
+from employee_portal import create_app, db, cash_ledger
+from employee_portal.models import Credit, Debit
+
+TRANSACTION_COUNTS = [10_000, 100_000, 500_000]
+DAYS = 3 * 365
+CATEGORIES = ['Sales', 'Investment', 'Refund', 'Salary', 'Rent', 'Utilities', 'Vendor Payment', None]
+LOOKUPS = 20
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+
+
+def seed(n):
+    rng = random.Random(n)
+    start = date(2024, 1, 1)
+    for model in (Credit, Debit):
+        rows = [{
+            'date': start + timedelta(days=rng.randrange(DAYS)), 'amount': round(rng.uniform(10, 50_000), 2),
+            'category': rng.choice(CATEGORIES),
+        } for _ in range(n // 2)]
+        db.session.execute(db.insert(model), rows)
+    cash_ledger.rebuild()
+    db.session.commit()
+
+
+def scan_totals(as_of=None):
+    credits = db.session.query(db.func.sum(Credit.amount))
+    debits = db.session.query(db.func.sum(Debit.amount))
+    if as_of:
+        credits, debits = credits.filter(Credit.date <= as_of), debits.filter(Debit.date <= as_of)
+    return (credits.scalar() or 0) - (debits.scalar() or 0)
+
+
+def scan_trend(as_of):
+    first = date(as_of.year - 1, as_of.month, 1)
+    balance = scan_totals(first - timedelta(days=1))
+    months = []
+    for model, sign in ((Credit, 1), (Debit, -1)):
+        year, month = db.extract('year', model.date), db.extract('month', model.date)
+        months += db.session.query(year, month, db.func.sum(model.amount) * sign).filter(
+            model.date >= first, model.date <= as_of).group_by(year, month).all()
+    return balance, months
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        fn(*args)
+    return (time.perf_counter() - started) / LOOKUPS * 1000
+
+
+def main():
+    app = create_app(BenchConfig)
+    as_of = date(2025, 6, 30)
+    with app.app_context():
+        print(f"{'transactions':>12} {'rollup rows':>11} {'closing':>16} {'as-of':>16} {'12m trend':>16}  (rollup / scan, ms)")
+        for n in TRANSACTION_COUNTS:
+            db.drop_all()
+            db.create_all()
+            seed(n)
+            rows = db.session.query(db.func.count()).select_from(db.metadata.tables['cash_daily_total']).scalar()
+            assert abs(cash_ledger.totals()['balance'] - scan_totals()) < 1.0
+            cells = [
+                (timed(cash_ledger.totals), timed(scan_totals)),
+                (timed(cash_ledger.totals, as_of), timed(scan_totals, as_of)),
+                (timed(cash_ledger.monthly_trend, 12, as_of), timed(scan_trend, as_of)),
+            ]
+            print(f'{n:>12,} {rows:>11,} ' + ' '.join(f'{a:>7.2f} / {b:>6.1f}' for a, b in cells))
+
+        started = time.perf_counter()
+        for i in range(1000):
+            db.session.add(Debit(date=as_of, amount=1.0 + i, category='Rent'))
+            db.session.commit()
+        print(f'add_debit with rollup upsert: {(time.perf_counter() - started):.3f} ms per transaction')
+        assert not cash_ledger.verify()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""Seeded synthetic dataset for the endpoint benchmarks (benchmarks/scenarios.py).
+
+Run from the repository root:
+
+    python -m benchmarks.dataset --scale small
+    python -m benchmarks.dataset --scale large --database postgresql://user:pw@localhost/genhr_bench
+    python -m benchmarks.dataset --employees 3000 --attendance 1000000
+
+Drops and recreates every table in --database (default instance/bench.db,
+never the app's own database), then bulk-loads employees with a
+director/manager/employee hierarchy, salary structures, attendance for the
+working days up to END, chat messages, debits and credits. The same seed
+and scale always give the same rows. SQLite is loaded with executemany in
+one transaction and PostgreSQL with COPY. Afterwards the cash rollup is
+rebuilt, Postgres sequences are reset and the planner statistics refreshed.
+
+The benchmark login is ADMIN_EMPLOYEEID / ADMIN_PASSWORD (profile 1), and
+profile 1 has a long conversation with CHAT_PEER.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.engine import make_url
+from werkzeug.security import generate_password_hash
+
+from config import Config
+from employee_portal import create_app, db, cash_ledger
+from employee_portal.models import (Role, Department, Designation, User, EmployeeProfile, SalaryStructure,
+                                    Attendance, ChatMessage, Debit, Credit)
+
+SCALES = {
+    'small': {'employees': 200, 'attendance': 50_000, 'chat': 20_000, 'debits': 5_000},
+    'medium': {'employees': 2_000, 'attendance': 500_000, 'chat': 100_000, 'debits': 40_000},
+    'large': {'employees': 10_000, 'attendance': 5_000_000, 'chat': 1_000_000, 'debits': 200_000},
+}
+DEFAULT_DATABASE = 'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                               'instance', 'bench.db')
+SEED = 50
+
+# Last day with data; attendance runs back from here, transactions cover the two years before it
+END = date(2026, 9, 30)
+ADMIN_EMPLOYEEID = 'BENCH0001'
+ADMIN_PASSWORD = 'bench'
+CHAT_PEER = 2
+# Share of chat messages in the admin's conversation with CHAT_PEER
+CHAT_FOCUS = 0.005
+# Share of employees checked in on each working day
+PRESENCE = 0.95
+CHUNK_SIZE = 20_000
+
+ROLES = ['Admin', 'Director', 'Manager', 'Employee']
+DEPARTMENTS = ['Engineering', 'Sales', 'Finance', 'Operations', 'HR', 'Support', 'Marketing', 'Legal',
+               'Procurement', 'Facilities', 'Quality', 'Research']
+DESIGNATIONS = ['Director', 'Engineering Manager', 'Software Engineer', 'Senior Software Engineer', 'QA Engineer',
+                'Sales Executive', 'Account Manager', 'Accountant', 'Operations Lead', 'HR Executive',
+                'Support Engineer', 'Marketing Executive', 'Legal Counsel', 'Buyer', 'Analyst']
+FIRST_NAMES = ['Aarav', 'Diya', 'Vihaan', 'Ananya', 'Arjun', 'Isha', 'Kabir', 'Meera', 'Rohan', 'Saanvi',
+               'Aditya', 'Kavya', 'Ishaan', 'Priya', 'Reyansh', 'Nisha', 'Vivaan', 'Pooja', 'Karan', 'Riya']
+LAST_NAMES = ['Sharma', 'Verma', 'Iyer', 'Reddy', 'Nair', 'Patel', 'Gupta', 'Menon', 'Rao', 'Singh',
+              'Das', 'Joshi', 'Kulkarni', 'Pillai', 'Bose', 'Mehta', 'Chopra', 'Kapoor', 'Shetty', 'Naidu']
+DEBIT_CATEGORIES = ['Salary', 'Rent', 'Utilities', 'Travel', 'Office Supplies', 'Software', 'Hardware',
+                    'Marketing', 'Professional Fees', 'Maintenance']
+CREDIT_CATEGORIES = ['Sales', 'Services', 'Investment', 'Refund', 'Interest']
+PAYMENT_MODES = ['Bank Transfer', 'UPI', 'Cheque', 'Cash', 'Card']
+CHAT_LINES = ['Can you review the PR?', 'Meeting moved to 3pm', 'Sent the report', 'Thanks!', 'On it',
+              'Please approve my leave', 'Invoice attached', 'Call me when free', 'Done', 'Noted']
+
+
+def working_days(count):
+    """The last ``count`` days up to END, skipping Sundays, oldest first."""
+    days, day = [], END
+    while len(days) < count:
+        if day.weekday() != 6:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+# --- Rows ---------------------------------------------------------------
+#
+# Each generator yields tuples in the column order given to load(). Ids
+# are explicit, so related tables can be generated without reading back.
+
+def _people(rng, n):
+    directors = max(1, n // 200)
+    managers = max(1, n // 10)
+    password_hash = _password_hash()
+    users, profiles = [], []
+    for i in range(1, n + 1):
+        if i == 1:
+            role, employeeid, reports_to = 1, ADMIN_EMPLOYEEID, None
+        elif i <= 1 + directors:
+            role, employeeid, reports_to = 2, f'GEN{i:05d}', None
+        elif i <= 1 + directors + managers:
+            role, employeeid, reports_to = 3, f'GEN{i:05d}', rng.randint(2, 1 + directors)
+        else:
+            role, employeeid, reports_to = 4, f'GEN{i:05d}', rng.randint(2 + directors, 1 + directors + managers)
+        email = f'{employeeid.lower()}@bench.example.com'
+        joined = END - timedelta(days=rng.randint(30, 6 * 365))
+        resigned = i > 1 + directors and rng.random() < 0.03
+        users.append((i, employeeid, email, password_hash, role, False,
+                      datetime.combine(END, datetime.min.time()) + timedelta(hours=rng.randint(8, 20))))
+        profiles.append((i, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), email, rng.choice(['Male', 'Female']),
+                         f'9{rng.randrange(10 ** 9):09d}', joined, rng.randint(1, len(DEPARTMENTS)),
+                         1 if role == 2 else rng.randint(2, len(DESIGNATIONS)), reports_to, resigned,
+                         END - timedelta(days=rng.randint(1, 90)) if resigned else None, 'Full-time', i))
+    return users, profiles
+
+
+def _password_hash():
+    # One hash shared by every user: hashing 10k passwords would take longer than the whole load.
+    # pbkdf2 rather than werkzeug's scrypt default, whose hashes overflow password_hash(128) on Postgres.
+    return generate_password_hash(ADMIN_PASSWORD, method='pbkdf2')
+
+
+def _salary_structures(rng, n):
+    for i in range(1, n + 1):
+        ctc = float(rng.randrange(25_000, 250_000, 500))
+        basic = round(ctc * 0.4, 2)
+        gross = ctc - 1600 - 1250
+        yield (i, i, ctc, basic, round(ctc * 0.2, 2), 1600.0, 1250.0, round(ctc - basic - ctc * 0.2 - 2850, 2),
+               round(min(basic * 0.12, 1800.0), 2), round(gross * 0.0075, 2) if gross <= 21_000 else 0.0, 200.0)
+
+
+def _attendance(rng, n, rows):
+    # The same number present every day, so the data ends on END; the oldest day takes the remainder
+    present = max(1, round(n * PRESENCE))
+    days = working_days(-(-rows // present))
+    first = rows - (len(days) - 1) * present
+    row_id = 0
+    for day in days:
+        midnight = datetime.combine(day, datetime.min.time())
+        for employee_id in sorted(rng.sample(range(1, n + 1), first if day == days[0] else present)):
+            row_id += 1
+            check_in = midnight + timedelta(minutes=rng.randint(480, 660))
+            check_out = None if day == END and rng.random() < 0.5 else check_in + timedelta(minutes=rng.randint(420, 600))
+            yield row_id, check_in, check_out, employee_id, 'Biometric' if rng.random() < 0.7 else 'Manual'
+
+
+def _chat(rng, n, rows):
+    start = datetime.combine(END - timedelta(days=365), datetime.min.time())
+    step = 365 * 86_400 / max(1, rows)
+    pairs = [(rng.randint(1, n), rng.randint(1, n)) for _ in range(max(1, n * 3))]
+    for i in range(1, rows + 1):
+        if rng.random() < CHAT_FOCUS:
+            sender, recipient = (1, CHAT_PEER) if rng.random() < 0.5 else (CHAT_PEER, 1)
+        else:
+            sender, recipient = rng.choice(pairs)
+            if rng.random() < 0.5:
+                sender, recipient = recipient, sender
+        yield i, sender, recipient, rng.choice(CHAT_LINES), start + timedelta(seconds=i * step), i < rows * 0.98
+
+
+def _transactions(rng, rows, categories, payers):
+    first = END - timedelta(days=730)
+    for i in range(1, rows + 1):
+        day = first + timedelta(days=rng.randrange(731))
+        amount = round(min(rng.lognormvariate(8.5, 1.2), 2_000_000.0), 2)
+        row = (i, day, amount, f'{rng.choice(categories)} #{i}', rng.choice(categories), rng.choice(PAYMENT_MODES),
+               f'REF{i:08d}', datetime.combine(day, datetime.min.time()) + timedelta(hours=10))
+        yield row + (rng.choice(payers),) if payers else row
+
+
+# --- Loading ------------------------------------------------------------
+
+def _sqlite_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'microseconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_value(value):
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'microseconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def load(connection, dialect, table, columns, rows):
+    """Bulk-insert ``rows`` (tuples in ``columns`` order) into ``table`` on a raw DBAPI connection."""
+    cursor = connection.cursor()
+    names = ', '.join(f'"{c}"' for c in columns)
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            count += _load_chunk(cursor, dialect, table, names, columns, chunk)
+            chunk = []
+    if chunk:
+        count += _load_chunk(cursor, dialect, table, names, columns, chunk)
+    return count
+
+
+def _load_chunk(cursor, dialect, table, names, columns, chunk):
+    if dialect == 'postgresql':
+        buffer = io.StringIO()
+        for row in chunk:
+            buffer.write('\t'.join(_copy_value(v) for v in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        cursor.copy_expert(f'COPY "{table}" ({names}) FROM STDIN', buffer)
+    else:
+        placeholders = ', '.join('?' for _ in columns)
+        cursor.executemany(f'INSERT INTO "{table}" ({names}) VALUES ({placeholders})',
+                           ([_sqlite_value(v) for v in row] for row in chunk))
+    return len(chunk)
+
+
+def _reset_sequences(cursor, tables):
+    for table in tables:
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                       f"COALESCE((SELECT max(id) FROM \"{table}\"), 1))")
+
+
+def generate(database, employees, attendance, chat, debits, seed=SEED):
+    """Recreate the schema in ``database`` and load a dataset of the given size. Returns {table: rows}."""
+    if make_url(database) == make_url(Config.SQLALCHEMY_DATABASE_URI):
+        raise ValueError('refusing to overwrite the application database; pass a separate --database')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database
+        SQLITE_OPTIMIZE_ON_EXIT = False
+        PERF_INSTRUMENTATION = False
+
+    if database.startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(os.path.abspath(make_url(database).database)), exist_ok=True)
+    app = create_app(BenchConfig)
+    rng = random.Random(seed)
+    counts = {}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        dialect = db.engine.dialect.name
+        users, profiles = _people(rng, employees)
+        directors = [f'{first} {last}' for _, first, last, *rest in profiles[1:1 + max(1, employees // 200)]]
+        tables = [
+            (Role, ('id', 'name'), [(i + 1, name) for i, name in enumerate(ROLES)]),
+            (Department, ('id', 'name'), [(i + 1, name) for i, name in enumerate(DEPARTMENTS)]),
+            (Designation, ('id', 'title'), [(i + 1, title) for i, title in enumerate(DESIGNATIONS)]),
+            (User, ('id', 'employeeid', 'email', 'password_hash', 'role_id', 'is_first_login', 'last_seen'), users),
+            (EmployeeProfile, ('id', 'first_name', 'last_name', 'email', 'gender', 'phone_number', 'date_of_joining',
+                               'department_id', 'designation_id', 'reports_to_id', 'is_resigned', 'resigned_date',
+                               'employment_type', 'user_id'), profiles),
+            (SalaryStructure, ('id', 'employee_id', 'monthly_ctc', 'basic', 'hra', 'conveyance', 'medical',
+                               'special_allowance', 'pf', 'esi', 'professional_tax'), _salary_structures(rng, employees)),
+            (Attendance, ('id', 'check_in', 'check_out', 'employee_id', 'verification_method'),
+             _attendance(rng, employees, attendance)),
+            (ChatMessage, ('id', 'sender_id', 'recipient_id', 'body', 'timestamp', 'is_read'), _chat(rng, employees, chat)),
+            (Debit, ('id', 'date', 'amount', 'description', 'category', 'payment_mode', 'reference_number', 'created_at',
+                     'paid_by'), _transactions(rng, debits, DEBIT_CATEGORIES, directors)),
+            (Credit, ('id', 'date', 'amount', 'description', 'category', 'payment_mode', 'reference_number', 'created_at'),
+             _transactions(rng, debits // 4, CREDIT_CATEGORIES, None)),
+        ]
+        connection = db.engine.raw_connection()
+        try:
+            for model, columns, rows in tables:
+                started = time.perf_counter()
+                table = model.__table__.name
+                counts[table] = load(connection, dialect, table, columns, rows)
+                print(f'{table:<18} {counts[table]:>10,} rows {time.perf_counter() - started:>7.1f}s', file=sys.stderr)
+            if dialect == 'postgresql':
+                _reset_sequences(connection.cursor(), [model.__table__.name for model, _, _ in tables])
+            connection.commit()
+        finally:
+            connection.close()
+        counts['cash_daily_total'] = cash_ledger.rebuild()
+        db.session.commit()
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql('ANALYZE')
+            conn.commit()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=os.environ.get('BENCH_DATABASE_URL', DEFAULT_DATABASE))
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    for name in SCALES['small']:
+        parser.add_argument(f'--{name}', type=int, help=f'override the scale\'s {name} rows')
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args(argv)
+    size = {name: getattr(args, name) or default for name, default in SCALES[args.scale].items()}
+    started = time.perf_counter()
+    generate(args.database, seed=args.seed, **size)
+    print(f'loaded {make_url(args.database).render_as_string(hide_password=True)} in '
+          f'{time.perf_counter() - started:.1f}s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
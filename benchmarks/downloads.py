@@ -0,0 +1,68 @@
+"""Downloads: worker time per transfer with send_file vs X-Accel-Redirect.
+
+Run from the repository root:
+
+    python -m benchmarks.downloads
+
+Requests carry the X-Sendfile-Type / X-Accel-Mapping headers nginx adds
+(see deployment/nginx.conf), pointed at a temporary folder. Clients read at
+CLIENT_MBPS, so with send_file the worker is tied up for the whole transfer
+while with X-Accel-Redirect it only builds the headers. That the redirect
+names exactly the authorized file is checked by tests/test_downloads.py.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from config import Config
+from employee_portal import create_app
+from employee_portal import downloads
+
+FILE_SIZES_MB = [1, 16, 64]
+CLIENT_MBPS = 100
+INTERNAL = '/_protected/instance/'
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+
+
+def worker_seconds(app, path, headers):
+    """Time the worker spends producing the response and handing it to a client reading at CLIENT_MBPS."""
+    with app.test_request_context(headers=headers):
+        start = time.perf_counter()
+        response = downloads.send(path)
+        sent = 0
+        if 'X-Accel-Redirect' not in response.headers:
+            response.direct_passthrough = False
+            for chunk in response.iter_encoded():
+                sent += len(chunk)
+        elapsed = time.perf_counter() - start
+        response.close()
+    # A slow client keeps a sync worker blocked until the last byte is written
+    return elapsed + sent / (CLIENT_MBPS * 1024 * 1024)
+
+
+def main():
+    app = create_app(BenchConfig)
+    root = tempfile.mkdtemp(prefix='downloads_bench_')
+    accel_headers = {'X-Sendfile-Type': 'X-Accel-Redirect', 'X-Accel-Mapping': f'{root}/={INTERNAL}'}
+    try:
+        print(f"{'size':>8}{'send_file':>14}{'x-accel':>14}")
+        for size_mb in FILE_SIZES_MB:
+            path = os.path.join(root, 'exports', f'payslip {size_mb}MB.pdf')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size_mb * 1024 * 1024))
+
+            direct = worker_seconds(app, path, {})
+            accel = worker_seconds(app, path, accel_headers)
+            print(f'{size_mb:>6}MB{direct * 1000:>12.1f}ms{accel * 1000:>12.3f}ms')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Face matching: one vectorized cosine call vs comparing enrolled faces one by one.
+
+Run from the repository root:
+
+    python -m benchmarks.face_index
+
+Builds a memory-mapped index of ENROLLED random unit descriptors in a
+temporary folder. It then matches noisy copies of enrolled faces (plus
+strangers who must not match). Also times the CPU descriptor on a camera-
+sized frame, incremental enroll/remove, and a second reader instance
+picking up those writes through the shared map.
+
+This measures speed only. Accuracy on labelled photo pairs is measured by
+``flask faces evaluate`` and tests/test_faces.py.
+"""
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from employee_portal.faces import DIM, DlibEmbedder, FaceIndex, HogEmbedder, NoFaceError
+
+ENROLLED = 50_000
+QUERIES = 500
+NOISE = 0.02
+THRESHOLD = 0.9
+NAIVE_SAMPLE = 5
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def naive_match(ids, vectors, query, threshold):
+    """The per-employee loop: one similarity per enrolled face."""
+    best_id, best = None, threshold
+    for employee_id, vector in zip(ids, vectors):
+        score = float(np.dot(vector, query) / (np.linalg.norm(vector) * np.linalg.norm(query)))
+        if score >= best:
+            best_id, best = employee_id, score
+    return best_id
+
+
+def embedders():
+    yield HogEmbedder()
+    try:
+        yield DlibEmbedder()
+    except ImportError as exc:
+        print(f'dlib descriptor skipped ({exc.name} is not installed)')
+
+
+def main():
+    rng = np.random.default_rng(7)
+    directory = tempfile.mkdtemp(prefix='face_bench_')
+    try:
+        ids = np.arange(1, ENROLLED + 1, dtype=np.int32)
+        vectors = rng.standard_normal((ENROLLED, DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        index = FaceIndex(directory)
+        started = time.perf_counter()
+        index.rebuild(ids, vectors)
+        print(f'enrolled={len(index)} dim={DIM} index build {(time.perf_counter() - started) * 1000:.0f}ms '
+              f'({vectors.nbytes / 1e6:.1f} MB mapped)')
+
+        targets = rng.integers(0, ENROLLED, QUERIES)
+        timings, correct = [], 0
+        index.match(vectors[0])  # fault the pages in
+        for target in targets:
+            query = vectors[target] + rng.standard_normal(DIM).astype(np.float32) * NOISE
+            started = time.perf_counter()
+            match = index.match(query, THRESHOLD)
+            timings.append(time.perf_counter() - started)
+            correct += match is not None and match[0] == ids[target]
+        strangers = sum(index.match(rng.standard_normal(DIM), THRESHOLD) is not None for _ in range(100))
+        print(f'vectorized match: p50={statistics.median(timings) * 1000:.2f}ms p99={percentile(timings, 0.99) * 1000:.2f}ms '
+              f'correct={correct}/{QUERIES} false accepts={strangers}/100')
+
+        naive = []
+        for target in targets[:NAIVE_SAMPLE]:
+            started = time.perf_counter()
+            naive_match(ids, vectors, vectors[target], THRESHOLD)
+            naive.append(time.perf_counter() - started)
+        print(f'one-by-one match: p50={statistics.median(naive) * 1000:.0f}ms ({NAIVE_SAMPLE} queries)')
+
+        reader = FaceIndex(directory)
+        reader.match(vectors[0])
+        newcomer = rng.standard_normal(DIM).astype(np.float32)
+        started = time.perf_counter()
+        index.remove(ids[0])
+        index.enroll(ENROLLED + 1, newcomer)
+        update = time.perf_counter() - started
+        seen = reader.match(newcomer, THRESHOLD)
+        print(f'remove + enroll: {update * 1000:.2f}ms; other reader sees newcomer={seen is not None and seen[0] == ENROLLED + 1} '
+              f'resigned gone={reader.match(vectors[0], THRESHOLD) is None}')
+
+        frame = Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+        for embedder in embedders():
+            started = time.perf_counter()
+            for _ in range(20):
+                try:
+                    embedder.embed(frame)
+                except NoFaceError:
+                    pass
+            print(f'{embedder.name} descriptor of a 640x480 capture: {(time.perf_counter() - started) / 20 * 1000:.2f}ms')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
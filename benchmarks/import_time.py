@@ -0,0 +1,78 @@
+"""Import-time budget for the app factory.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time
+
+Builds the app in a fresh interpreter under ``python -X importtime`` (as a
+gunicorn worker does without preload) and prints the slowest top-level
+packages, the module count, cumulative import time and peak RSS. Exits
+non-zero when a LAZY_MODULES entry was imported or a budget is exceeded,
+so CI can run it as a check. Module count and RSS are stable across
+machines; the time budget is deliberately loose.
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+# Only imported by the views and commands that need them
+LAZY_MODULES = ('pandas', 'numpy', 'openpyxl', 'fpdf', 'pypdf', 'PIL', 'alembic',
+                'employee_portal.excel', 'employee_portal.pdf', 'employee_portal.faces',
+                'employee_portal.payroll_days', 'employee_portal.payroll_rules')
+MODULE_BUDGET = 650
+RSS_BUDGET_MB = 75
+TIME_BUDGET_MS = 2500
+
+PROBE = """
+import resource, sys, time
+started = time.perf_counter()
+from employee_portal import create_app
+create_app()
+elapsed = (time.perf_counter() - started) * 1000
+print(len(sys.modules), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024, round(elapsed))
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def profile():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], capture_output=True, text=True)
+    if result.returncode:
+        sys.exit(result.stderr)
+    counts, modules = result.stdout.splitlines()[:2]
+    module_count, rss_mb, elapsed_ms = map(int, counts.split())
+    by_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        by_package[name.strip().split('.')[0]] += int(self_us)
+    return module_count, rss_mb, elapsed_ms, set(modules.split()), by_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=15, help='packages to list')
+    args = parser.parse_args()
+
+    module_count, rss_mb, elapsed_ms, modules, by_package = profile()
+    print(f"{'package':<24} {'self ms':>8}")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'{package:<24} {us / 1000:>8.1f}')
+    print(f'\n{module_count} modules (budget {MODULE_BUDGET}), peak RSS {rss_mb} MB (budget {RSS_BUDGET_MB}), '
+          f'create_app {elapsed_ms} ms (budget {TIME_BUDGET_MS})')
+
+    failures = [f'{name} imported at startup' for name in LAZY_MODULES if name in modules]
+    if module_count > MODULE_BUDGET:
+        failures.append(f'{module_count} modules > {MODULE_BUDGET}')
+    if rss_mb > RSS_BUDGET_MB:
+        failures.append(f'peak RSS {rss_mb} MB > {RSS_BUDGET_MB} MB')
+    if elapsed_ms > TIME_BUDGET_MS:
+        failures.append(f'create_app {elapsed_ms} ms > {TIME_BUDGET_MS} ms')
+    for failure in failures:
+        print('FAIL', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Leave balance lookup: ledger running balance vs scanning Leave history.
+
+Run from the repository root:
+
+    python -m benchmarks.leave_balance
+
+Uses an in-memory SQLite database, so nothing touches instance/app.db.
+"""
+import time
+from datetime import date, timedelta
+
+from config import Config
+from employee_portal import create_app, db
+from employee_portal.models import EmployeeProfile, Leave, LeaveLedgerEntry, LeaveBalance
+from employee_portal.leave_ledger import get_balance
+
+HISTORY_SIZES = [100, 1_000, 10_000, 100_000]
+LOOKUPS = 200
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+
+
+def seed(employee_id, n):
+    """Insert n approved one-day leaves and their ledger debits for one employee."""
+    start = date(2000, 1, 1)
+    leaves = [{
+        'employee_id': employee_id, 'start_date': start + timedelta(days=i), 'end_date': start + timedelta(days=i),
+        'leave_type': 'Casual', 'status': 'Approved'
+    } for i in range(n)]
+    db.session.execute(db.insert(Leave), leaves)
+    entries = [{
+        'employee_id': employee_id, 'leave_type': 'Casual', 'year': 2026, 'entry_type': 'Debit', 'days': -1.0
+    } for _ in range(n)]
+    db.session.execute(db.insert(LeaveLedgerEntry), entries)
+    db.session.add(LeaveBalance(employee_id=employee_id, leave_type='Casual', year=2026,
+                                accrued=12.0, carried_forward=0.0, used=float(n), balance=12.0 - n))
+    db.session.commit()
+
+
+def scan_used(employee_id):
+    used = 0
+    for leave in Leave.query.filter_by(employee_id=employee_id, leave_type='Casual', status='Approved').all():
+        used += (leave.end_date - leave.start_date).days + 1
+    return used
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        fn(*args)
+    return (time.perf_counter() - started) / LOOKUPS * 1000
+
+
+def main():
+    app = create_app(BenchConfig)
+    with app.app_context():
+        print(f"{'history':>10} {'ledger ms':>10} {'scan ms':>10}")
+        for n in HISTORY_SIZES:
+            db.drop_all()
+            db.create_all()
+            employee = EmployeeProfile(first_name='Bench', last_name='User', email='bench@example.com')
+            db.session.add(employee)
+            db.session.commit()
+            seed(employee.id, n)
+
+            ledger_ms = timed(lambda: get_balance(employee.id, 'Casual', 2026).balance)
+            scan_ms = timed(scan_used, employee.id) if n <= 10_000 else float('nan')
+            db.session.expunge_all()
+            print(f'{n:>10} {ledger_ms:>10.3f} {scan_ms:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
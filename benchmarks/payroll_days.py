@@ -0,0 +1,118 @@
+"""Payroll day counts for a month: vectorized matrix vs per-employee queries.
+
+Run from the repository root:
+
+    python -m benchmarks.payroll_days [employees]
+
+Seeds a month of attendance (about 95% presence), approved leave days, one
+holiday and a shift roster for a tenth of the workforce into an in-memory
+SQLite database, then times ``month_day_counts`` against the per-employee
+query loop it replaces.
+"""
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from config import Config
+from employee_portal import create_app, db
+from employee_portal.models import EmployeeProfile, Attendance, LeaveDay, Holiday, ShiftSchedule, SalaryStructure
+from employee_portal.payroll_days import month_bounds, month_day_counts
+
+YEAR, MONTH = 2026, 10
+EMPLOYEES = 5_000
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+
+
+def seed(n):
+    rng = random.Random(29)
+    start, end = month_bounds(YEAR, MONTH)
+    holiday = date(YEAR, MONTH, 2)
+    days = [start + timedelta(days=i) for i in range(end.day)]
+
+    db.session.execute(db.insert(EmployeeProfile), [{
+        'first_name': 'Bench', 'last_name': str(i), 'email': f'bench{i}@example.com',
+        'date_of_joining': date(2025, 1, 1), 'is_resigned': False
+    } for i in range(n)])
+    ids = [emp_id for emp_id, in db.session.query(EmployeeProfile.id).order_by(EmployeeProfile.id).all()]
+    db.session.execute(db.insert(SalaryStructure), [{
+        'employee_id': emp_id, 'monthly_ctc': 31000.0, 'basic': 15500.0, 'hra': 7750.0,
+        'conveyance': 1550.0, 'medical': 1550.0, 'special_allowance': 4650.0
+    } for emp_id in ids])
+    db.session.add(Holiday(name='Bench Holiday', date=holiday))
+
+    attendance, leave_days, shifts = [], [], []
+    for emp_id in ids:
+        rostered = rng.random() < 0.1
+        for day in days:
+            if rostered:
+                if rng.random() < 0.8:
+                    continue
+                shifts.append({'employee_id': emp_id, 'date': day, 'shift_type': 'Night'})
+            elif day.weekday() == 6 or day == holiday:
+                continue
+            roll = rng.random()
+            if roll < 0.95:
+                attendance.append({'employee_id': emp_id, 'check_in': datetime.combine(day, datetime.min.time()) + timedelta(hours=9)})
+            elif roll < 0.98:
+                leave_days.append({'leave_id': 1, 'employee_id': emp_id, 'date': day, 'leave_type': 'Casual', 'status': 'Approved'})
+    db.session.execute(db.insert(Attendance), attendance)
+    db.session.execute(db.insert(LeaveDay), leave_days)
+    if shifts:
+        db.session.execute(db.insert(ShiftSchedule), shifts)
+    db.session.commit()
+    return ids, len(attendance)
+
+
+def per_employee(ids):
+    """The shape of the old approach: a handful of queries per employee."""
+    start, end = month_bounds(YEAR, MONTH)
+    holidays = {d for d, in db.session.query(Holiday.date).filter(Holiday.date >= start, Holiday.date <= end).all()}
+    lop = {}
+    for emp_id in ids:
+        present = {c.date() for c, in db.session.query(Attendance.check_in).filter(
+            Attendance.employee_id == emp_id,
+            Attendance.check_in >= datetime.combine(start, datetime.min.time()),
+            Attendance.check_in < datetime.combine(end + timedelta(days=1), datetime.min.time())
+        ).all()}
+        on_leave = {d for d, in db.session.query(LeaveDay.date).filter(
+            LeaveDay.employee_id == emp_id, LeaveDay.date >= start, LeaveDay.date <= end, LeaveDay.status == 'Approved'
+        ).all()}
+        roster = {d for d, in db.session.query(ShiftSchedule.date).filter(
+            ShiftSchedule.employee_id == emp_id, ShiftSchedule.date >= start, ShiftSchedule.date <= end
+        ).all()}
+        days = [start + timedelta(days=i) for i in range(end.day)]
+        working = roster if roster else {d for d in days if d.weekday() != 6 and d not in holidays}
+        lop[emp_id] = len(working - present - on_leave)
+    return lop
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else EMPLOYEES
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        ids, check_ins = seed(n)
+        print(f'seeded {n} employees, {check_ins} check-ins in {time.perf_counter() - started:.1f}s')
+
+        started = time.perf_counter()
+        frame = month_day_counts(YEAR, MONTH)
+        vectorized = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = per_employee(ids)
+        looped = time.perf_counter() - started
+
+        mismatches = sum(1 for emp_id in ids if int(frame.at[emp_id, 'lop_days']) != expected[emp_id])
+        print(f'vectorized   {vectorized * 1000:>9.1f} ms')
+        print(f'per-employee {looped * 1000:>9.1f} ms')
+        print(f"total LOP days {int(frame['lop_days'].sum())}, mismatches {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Statutory deductions and what-if projections over the whole org, in memory.
+
+Run from the repository root:
+
+    python -m benchmarks.payroll_rules [employees]
+
+Builds a synthetic salary-structure frame (no database rows) and times a full
+PF/ESI/PT/TDS computation and a "10% hike for one department" what-if run.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from employee_portal import create_app
+from employee_portal.payroll_rules import COMPONENTS, compute, what_if, get_rules
+
+EMPLOYEES = 50_000
+RUNS = 20
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+def synthetic_frame(n):
+    rng = np.random.default_rng(30)
+    ctc = rng.lognormal(mean=10.6, sigma=0.6, size=n).round(-2)
+    frame = pd.DataFrame({
+        'department_id': rng.integers(1, 21, size=n),
+        'monthly_ctc': ctc,
+        'basic': ctc * 0.5,
+        'hra': ctc * 0.2,
+        'conveyance': np.full(n, 1600.0),
+        'medical': np.full(n, 1250.0),
+    }, index=pd.RangeIndex(1, n + 1, name='employee_id'))
+    frame['special_allowance'] = np.maximum(ctc - frame[['basic', 'hra', 'conveyance', 'medical']].sum(axis=1), 0.0)
+    return frame[['department_id', 'monthly_ctc'] + COMPONENTS]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    for _ in range(RUNS):
+        result = fn()
+    return (time.perf_counter() - started) / RUNS * 1000, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else EMPLOYEES
+    app = create_app(BenchConfig)
+    with app.app_context():
+        frame = synthetic_frame(n)
+        rules = get_rules()
+        compute_ms, _ = timed(lambda: compute(frame, rules))
+        what_if_ms, summary = timed(lambda: what_if(10, department_id=3, frame=frame, rules=rules))
+        print(f'{n} employees')
+        print(f'compute  {compute_ms:>8.2f} ms')
+        print(f'what-if  {what_if_ms:>8.2f} ms')
+        print(summary.round(2).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Liquidity registers: keyset pages vs loading the whole table.
+
+Run from the repository root:
+
+    python -m benchmarks.registers
+
+Seeds Debit rows at increasing volumes, then times what manage_debits does
+per request. The old version ran .all() ordered by date, with an ilike on
+paid_by and float equality on amount. The new one fetches the first page,
+a page deep in the register and an indexed category + paid_by + amount
+range page, each including its filtered totals. Uses an in-memory SQLite
+database.
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from config import Config
+from employee_portal import create_app, db, cash_ledger, registers
+from employee_portal.models import Debit
+
+ROW_COUNTS = [10_000, 100_000, 300_000]
+CATEGORIES = ['Salary', 'Rent', 'Utilities', 'Purchase', 'Other']
+PAYERS = ['Company', 'A Director', 'B Director']
+REPEATS = 10
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+
+
+def seed(n):
+    rng = random.Random(n)
+    start = date(2020, 1, 1)
+    rows = [{
+        'date': start + timedelta(days=rng.randrange(6 * 365)), 'amount': round(rng.uniform(100, 90_000), 2),
+        'category': rng.choice(CATEGORIES), 'paid_by': rng.choice(PAYERS),
+    } for _ in range(n)]
+    db.session.execute(db.insert(Debit), rows)
+    cash_ledger.rebuild()
+    db.session.commit()
+
+
+def old_listing(paid_by=None, category=None):
+    query = Debit.query
+    if paid_by:
+        query = query.filter(Debit.paid_by.ilike(f'%{paid_by}%'))
+    if category:
+        query = query.filter(Debit.category == category)
+    return query.order_by(Debit.date.desc()).all()
+
+
+def deep_cursor(n):
+    """Cursor for a page roughly 90% of the way down the register."""
+    row = Debit.query.order_by(Debit.date.desc(), Debit.id.desc()).offset(int(n * 0.9)).first()
+    return registers.encode_cursor(row)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+        db.session.expunge_all()
+    return (time.perf_counter() - started) / REPEATS * 1000
+
+
+def main():
+    app = create_app(BenchConfig)
+    with app.app_context():
+        print(f"{'rows':>8} {'old all':>9} {'old filter':>11} {'page 1':>8} {'deep page':>10} {'filtered':>9}  (ms per request)")
+        for n in ROW_COUNTS:
+            db.drop_all()
+            db.create_all()
+            seed(n)
+            cursor = deep_cursor(n)
+            filtered = {'category': 'Rent', 'paid_by': 'Company', 'amount_min': '1000', 'amount_max': '5000'}
+            cells = [
+                timed(old_listing),
+                timed(old_listing, 'Company', 'Rent'),
+                timed(registers.fetch, 'debits', {}),
+                timed(registers.fetch, 'debits', {'after': cursor}),
+                timed(registers.fetch, 'debits', filtered),
+            ]
+            print(f'{n:>8,} ' + ' '.join(f'{c:>{w}.1f}' for c, w in zip(cells, (9, 11, 8, 10, 9))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""Hot-endpoint benchmarks: throughput and latency percentiles per scenario, as JSON.
+
+Run from the repository root, against a database loaded by benchmarks.dataset:
+
+    python -m benchmarks.dataset --scale medium
+    python -m benchmarks.scenarios --output before.json
+    # ... change something ...
+    python -m benchmarks.scenarios --baseline before.json
+
+--target client (the default) drives the Flask test client in this process,
+one request at a time. --target gunicorn starts gunicorn with
+deployment/gunicorn.conf.py on the same database and sends requests from
+--concurrency threads, each logged in with its own session. Scenarios with a
+setup step (bulk payroll deletes the month's drafts before every request)
+always run one request at a time. Each scenario gets --warmup untimed
+requests first. A scenario reports its p50/p90/p99/max latency, throughput
+and error count. It also reports the mean queries and DB time per request,
+taken from the Server-Timing header.
+
+With --baseline the run is compared with a saved result, scenario by
+scenario. A scenario regresses when p50 or p90 is more than --tolerance
+slower (and at least MIN_DELTA_MS slower), or when throughput drops by more
+than --tolerance. Any regression makes the exit status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+
+import sqlalchemy as sa
+from sqlalchemy.engine import make_url
+
+from benchmarks import dataset
+from config import Config
+
+END = dataset.END
+WEEK_START = END - timedelta(days=6)
+MONTH_START = END.replace(day=1)
+FY = END.year if END.month >= 4 else END.year - 1
+
+# Latency changes smaller than this are noise, whatever the percentage
+MIN_DELTA_MS = 2.0
+TABLES = ('employee_profile', 'attendance', 'chat_message', 'debit', 'credit')
+
+
+def _clear_payroll(connection):
+    connection.execute(sa.text('DELETE FROM payroll WHERE pay_period_start = :start'), {'start': MONTH_START})
+
+
+# name, method, path, form data, requests, expected status, untimed setup before each request
+SCENARIOS = [
+    ('attendance_day', 'POST', '/attendance', {'from_date': END, 'to_date': END}, 20, 200, None),
+    ('attendance_month', 'POST', '/attendance', {'from_date': MONTH_START, 'to_date': END}, 5, 200, None),
+    ('export_attendance_week', 'GET', f'/export_attendance?from_date={WEEK_START}&to_date={END}', None, 5, 200, None),
+    ('org_chart_api', 'GET', '/api/org_chart', None, 10, 200, None),
+    ('chat_history', 'GET', f'/api/chat/history/{dataset.CHAT_PEER}', None, 20, 200, None),
+    ('bulk_generate_payroll', 'POST', '/admin/payroll/bulk_generate', {'month': END.month, 'year': END.year},
+     3, 302, _clear_payroll),
+    ('export_employees', 'GET', '/admin/employees/export', None, 5, 200, None),
+    ('debits_register', 'GET', '/admin/liquidity/debits', None, 20, 200, None),
+    ('export_debits_pdf', 'GET', f'/admin/liquidity/debits/export_pdf?fy={FY}', None, 3, 200, None),
+]
+
+_CSRF = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+_TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+class FlaskClient:
+    """The test client on an app built in this process."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.get_data()  # drain streamed bodies inside the timing
+        return response.status_code, response.headers.getlist('Server-Timing')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """One cookie session against a running server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(_NoRedirect, urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with self.opener.open(urllib.request.Request(self.base_url + path, body, method=method), timeout=600) as r:
+                r.read()
+                return r.status, r.headers.get_all('Server-Timing') or []
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get_all('Server-Timing') or []
+
+
+def login(client):
+    """Log the benchmark admin in. Returns the session's CSRF token for form posts."""
+    if isinstance(client, FlaskClient):
+        page = client.client.get('/auth/login').get_data(as_text=True)
+    else:
+        with client.opener.open(client.base_url + '/auth/login') as r:
+            page = r.read().decode()
+    token = _CSRF.search(page).group(1)
+    client.request('POST', '/auth/login', {
+        'employeeid': dataset.ADMIN_EMPLOYEEID, 'password': dataset.ADMIN_PASSWORD, 'csrf_token': token})
+    # A failed login redirects too, so check a page that needs one
+    status, _ = client.request('GET', '/api/chat/unread_count')
+    if status != 200:
+        sys.exit('benchmark login failed; load the database with python -m benchmarks.dataset first')
+    return token
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_scenario(clients, engine, scenario, requests, warmup):
+    name, method, path, data, _, expected, setup = scenario
+    serial = setup is not None or len(clients) == 1
+    workers = clients[:1] if serial else clients
+    results = []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def call(client, token, timed):
+        if setup:
+            with engine.begin() as connection:
+                setup(connection)
+        form = dict(data, csrf_token=token) if data is not None else None
+        started = time.perf_counter()
+        status, timings = client.request(method, path, form)
+        elapsed = (time.perf_counter() - started) * 1000
+        if timed:
+            with lock:
+                results.append((elapsed, status == expected, timings))
+
+    def worker(client, token):
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            call(client, token, True)
+
+    for _ in range(warmup):
+        call(*workers[0], False)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=pair) for pair in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for elapsed, _, _ in results)
+    queries, db_ms = [], []
+    for _, _, timings in results:
+        for header in timings:
+            for part in header.split(','):
+                match = _TIMING.search(part)
+                if match and match.group(1) == 'db':
+                    db_ms.append(float(match.group(2)))
+                    queries.append(int(match.group(3) or 0))
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, ok, _ in results if not ok),
+        'concurrency': len(workers),
+        'throughput_rps': round(len(results) / wall, 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p90_ms': round(percentile(latencies, 0.9), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2),
+        'queries': round(sum(queries) / len(queries), 1) if queries else None,
+        'db_ms': round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+    }
+
+
+def _or_dash(value):
+    return '-' if value is None else value
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(database, workers, perf_path):
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database, PERF_STORE_PATH=perf_path)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'deployment/gunicorn.conf.py',
+                               '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--timeout', '600', 'run:app'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(600):
+        try:
+            urllib.request.urlopen(base_url + '/auth/login', timeout=2).read()
+            return server, base_url
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.1)
+    server.kill()
+    sys.exit('gunicorn did not start')
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print the run next to ``baseline``; returns the regressions found."""
+    if baseline['meta'].get('dataset') != results['meta'].get('dataset'):
+        print('warning: the baseline was measured on a different dataset', file=sys.stderr)
+    regressions = []
+    print(f"\n{'scenario':<24} {'p50 before':>11} {'p50 now':>9} {'change':>8} {'rps before':>11} {'rps now':>9}",
+          file=sys.stderr)
+    for name, now in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            print(f'{name:<24} {"(new)":>11}', file=sys.stderr)
+            continue
+        verdict = []
+        for metric in ('p50_ms', 'p90_ms'):
+            if now[metric] > before[metric] * (1 + tolerance) and now[metric] - before[metric] >= MIN_DELTA_MS:
+                verdict.append(f'{metric} {before[metric]:.1f} -> {now[metric]:.1f}')
+        if now['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            verdict.append(f"throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s")
+        regressions.extend(f'{name}: {v}' for v in verdict)
+        change = (now['p50_ms'] / before['p50_ms'] - 1) if before['p50_ms'] else 0.0
+        print(f"{name:<24} {before['p50_ms']:>11.1f} {now['p50_ms']:>9.1f} {change:>+8.0%} "
+              f"{before['throughput_rps']:>11.1f} {now['throughput_rps']:>9.1f}{'  REGRESSED' if verdict else ''}",
+              file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=os.environ.get('BENCH_DATABASE_URL', dataset.DEFAULT_DATABASE))
+    parser.add_argument('--target', choices=('client', 'gunicorn'), default='client')
+    parser.add_argument('--workers', type=int, default=3, help='gunicorn workers')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads (gunicorn target)')
+    parser.add_argument('--scenario', action='append', choices=[s[0] for s in SCENARIOS], help='run only these')
+    parser.add_argument('--requests', type=int, help='timed requests per scenario (default: per scenario)')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--output', help='write the results JSON here (default: stdout)')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed slowdown before a regression')
+    args = parser.parse_args(argv)
+
+    engine = sa.create_engine(args.database)
+    with engine.connect() as connection:
+        counts = {table: connection.execute(sa.text(f'SELECT count(*) FROM "{table}"')).scalar() for table in TABLES}
+    scratch = tempfile.mkdtemp()
+    perf_path = os.path.join(scratch, 'perf.sqlite3')
+    server = app = None
+    try:
+        if args.target == 'gunicorn':
+            server, base_url = start_gunicorn(args.database, args.workers, perf_path)
+            clients = [HttpClient(base_url) for _ in range(max(1, args.concurrency))]
+        else:
+            from employee_portal import create_app
+
+            class BenchConfig(Config):
+                SQLALCHEMY_DATABASE_URI = args.database
+                PERF_STORE_PATH = perf_path
+
+            app = create_app(BenchConfig)
+            clients = [FlaskClient(app)]
+        pairs = [(client, login(client)) for client in clients]
+
+        results = {
+            'meta': {
+                'target': args.target,
+                'database': make_url(args.database).render_as_string(hide_password=True),
+                'dialect': engine.dialect.name,
+                'dataset': counts,
+                'workers': args.workers if args.target == 'gunicorn' else None,
+                'python': platform.python_version(),
+                'commit': _git_commit(),
+                'started': datetime.now().isoformat(timespec='seconds'),
+            },
+            'scenarios': {},
+        }
+        print(f"{'scenario':<24} {'req':>4} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+              f"{'max ms':>8} {'queries':>8} {'db ms':>8}", file=sys.stderr)
+        for scenario in SCENARIOS:
+            if args.scenario and scenario[0] not in args.scenario:
+                continue
+            r = run_scenario(pairs, engine, scenario, args.requests or scenario[4], args.warmup)
+            results['scenarios'][scenario[0]] = r
+            print(f"{scenario[0]:<24} {r['requests']:>4} {r['errors']:>4} {r['throughput_rps']:>7.1f} {r['p50_ms']:>8.1f} "
+                  f"{r['p90_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {_or_dash(r['queries']):>8} "
+                  f"{_or_dash(r['db_ms']):>8}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        if app is not None:
+            # Write out the in-process timings now rather than at exit, after their folder is gone
+            app.extensions['perf'].flush()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
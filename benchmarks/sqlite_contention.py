@@ -0,0 +1,163 @@
+"""SQLite under concurrent workers: lock errors and latency per profile.
+
+Run from the repository root:
+
+    python -m benchmarks.sqlite_contention
+
+Forks WORKERS processes (like ``gunicorn --workers 3``), each running
+THREADS request loops against one file database for DURATION seconds.
+Every request commits ``last_seen`` as ``before_request`` does, then does
+one of: a dashboard read, a chat poll that marks messages read, a chat
+send, an attendance check-in, or a six-month attendance report. Compares the
+old setup (rollback journal, no pragmas) with the WAL profile from
+``Config.SQLITE_PRAGMAS``, without and with ``SQLITE_WRITE_QUEUE``.
+"""
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from config import Config
+from employee_portal import create_app, db
+from employee_portal.models import User, EmployeeProfile, Attendance, ChatMessage
+
+WORKERS = 3
+THREADS = 2
+DURATION = 15
+USERS = 60
+ATTENDANCE_ROWS = 60_000
+# (action, weight)
+MIX = [('dashboard', 45), ('chat_poll', 30), ('chat_send', 10), ('check_in', 10), ('report', 5)]
+
+PROFILES = [
+    ('rollback journal', {}, False),
+    ('WAL + pragmas', Config.SQLITE_PRAGMAS, False),
+    ('WAL + write queue', Config.SQLITE_PRAGMAS, True),
+]
+
+
+def make_config(path, pragmas, queue):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        WTF_CSRF_ENABLED = False
+        SQLITE_PRAGMAS = pragmas
+        SQLITE_WRITE_QUEUE = queue
+        SQLITE_OPTIMIZE_ON_EXIT = False
+    return BenchConfig
+
+
+def seed(app):
+    rng = random.Random(0)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(User), [
+            {'id': i, 'employeeid': f'GEN{i:04d}', 'email': f'e{i}@example.com', 'password_hash': 'x'}
+            for i in range(1, USERS + 1)])
+        db.session.execute(db.insert(EmployeeProfile), [
+            {'id': i, 'user_id': i, 'first_name': 'Emp', 'last_name': str(i), 'email': f'e{i}@example.com'}
+            for i in range(1, USERS + 1)])
+        start = datetime(2026, 1, 1, 9)
+        db.session.execute(db.insert(Attendance), [
+            {'employee_id': rng.randint(1, USERS), 'check_in': start + timedelta(minutes=rng.randrange(400_000))}
+            for _ in range(ATTENDANCE_ROWS)])
+        db.session.commit()
+
+
+def request(rng, action):
+    user_id = rng.randint(1, USERS)
+    other = rng.randint(1, USERS)
+    db.session.get(User, user_id).last_seen = datetime.utcnow()
+    db.session.commit()
+    if action == 'dashboard':
+        db.session.query(db.func.count(Attendance.id)).filter(
+            Attendance.employee_id == user_id, Attendance.check_in >= datetime(2026, 6, 1)).scalar()
+        db.session.query(User.id).filter(User.last_seen >= datetime.utcnow() - timedelta(minutes=5)).all()
+    elif action == 'chat_poll':
+        ChatMessage.query.filter(db.or_(
+            db.and_(ChatMessage.sender_id == user_id, ChatMessage.recipient_id == other),
+            db.and_(ChatMessage.sender_id == other, ChatMessage.recipient_id == user_id),
+        )).order_by(ChatMessage.timestamp.asc()).all()
+        for message in ChatMessage.query.filter_by(sender_id=other, recipient_id=user_id, is_read=False).all():
+            message.is_read = True
+        db.session.commit()
+    elif action == 'chat_send':
+        db.session.add(ChatMessage(sender_id=user_id, recipient_id=other, body='hello'))
+        db.session.commit()
+    elif action == 'check_in':
+        db.session.add(Attendance(employee_id=user_id, check_in=datetime.utcnow()))
+        db.session.commit()
+    else:
+        db.session.query(Attendance.employee_id, db.func.count(Attendance.id)).filter(
+            Attendance.check_in >= datetime(2026, 3, 1), Attendance.check_in < datetime(2026, 9, 1)
+        ).group_by(Attendance.employee_id).all()
+
+
+def run_thread(app, seed_value, deadline, results):
+    rng = random.Random(seed_value)
+    actions, weights = zip(*MIX)
+    while time.perf_counter() < deadline:
+        action = rng.choices(actions, weights)[0]
+        started = time.perf_counter()
+        locked = False
+        with app.app_context():
+            try:
+                request(rng, action)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                locked = True
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        results.append((time.perf_counter() - started, locked))
+
+
+def run_worker(config, index, deadline, queue):
+    app = create_app(config)
+    results = []
+    threads = [threading.Thread(target=run_thread, args=(app, index * 100 + t, deadline, results))
+               for t in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put(results)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    context = multiprocessing.get_context('fork')
+    print(f'{WORKERS} workers x {THREADS} threads, {DURATION}s per profile')
+    print(f"{'profile':<20} {'requests':>9} {'req/s':>7} {'locked':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, pragmas, write_queue in PROFILES:
+        directory = tempfile.mkdtemp()
+        try:
+            config = make_config(os.path.join(directory, 'app.db'), pragmas, write_queue)
+            seed(create_app(config))
+            queue = context.Queue()
+            deadline = time.perf_counter() + DURATION
+            workers = [context.Process(target=run_worker, args=(config, i, deadline, queue)) for i in range(WORKERS)]
+            for worker in workers:
+                worker.start()
+            results = [r for _ in workers for r in queue.get()]
+            for worker in workers:
+                worker.join()
+        finally:
+            shutil.rmtree(directory)
+        latencies = sorted(seconds * 1000 for seconds, _ in results)
+        locked = sum(1 for _, was_locked in results if was_locked)
+        print(f'{name:<20} {len(results):>9,} {len(results) / DURATION:>7.0f} {locked / len(results):>8.2%} '
+              f'{percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.99):>8.1f} {latencies[-1]:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
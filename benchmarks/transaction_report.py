@@ -0,0 +1,92 @@
+"""Transaction report PDF: streamed column rows vs loading every Debit.
+
+Run from the repository root:
+
+    python -m benchmarks.transaction_report
+
+Seeds a financial year of debits at increasing volumes and renders the
+FY report two ways: the old path (``.all()`` ORM objects, a Python sum)
+and ``reports.transaction_report`` (projected rows fetched in batches,
+subtotals in SQL). Time and peak traced memory are measured in separate
+passes so tracing does not skew the timings. Uses an in-memory SQLite
+database.
+"""
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from config import Config
+from employee_portal import create_app, db, reports
+from employee_portal.models import Debit
+from employee_portal.pdf import render_transactions_pdf
+
+TRANSACTION_COUNTS = [5_000, 20_000, 50_000]
+CATEGORIES = ['Salary', 'Rent', 'Utilities', 'Vendor Payment', 'Travel', None]
+FY = 2025
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+
+
+def seed(n):
+    rng = random.Random(n)
+    start = date(FY, 4, 1)
+    rows = [{
+        'date': start + timedelta(days=rng.randrange(365)), 'amount': round(rng.uniform(10, 50_000), 2),
+        'category': rng.choice(CATEGORIES), 'paid_by': 'Company', 'payment_mode': 'Bank Transfer',
+        'description': f'Payment {i} to vendor for services rendered',
+    } for i in range(n)]
+    db.session.execute(db.insert(Debit), rows)
+    db.session.commit()
+
+
+def loaded_report(start, end, label):
+    debits = Debit.query.filter(Debit.date >= start, Debit.date < end).order_by(Debit.date.asc()).all()
+    by_category = {}
+    for d in debits:
+        count, amount = by_category.get(d.category or 'Uncategorized', (0, 0.0))
+        by_category[d.category or 'Uncategorized'] = (count + 1, amount + d.amount)
+    subtotals = sorted(((c, n, a) for c, (n, a) in by_category.items()), key=lambda s: -s[2])
+    rows = ((d.date, d.category, d.paid_by, d.description, d.reference_number, d.payment_mode, d.amount)
+            for d in debits)
+    return render_transactions_pdf(rows, f'Debit Transactions - {label}', subtotals)
+
+
+def streamed_report(start, end, label):
+    return reports.transaction_report('debit', start, end, label)[0]
+
+
+def measure(fn, *args):
+    db.session.expire_all()
+    started = time.perf_counter()
+    data = fn(*args)
+    elapsed = time.perf_counter() - started
+    db.session.expunge_all()
+
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.expunge_all()
+    return elapsed, peak / 2**20, len(data)
+
+
+def main():
+    app = create_app(BenchConfig)
+    start, end, label = reports.parse_period({'fy': str(FY)})
+    with app.app_context():
+        print(f"{'debits':>8} {'pdf KB':>8} {'loaded s':>9} {'streamed s':>10} {'loaded MB':>10} {'streamed MB':>12}")
+        for n in TRANSACTION_COUNTS:
+            db.drop_all()
+            db.create_all()
+            seed(n)
+            old_time, old_peak, _ = measure(loaded_report, start, end, label)
+            new_time, new_peak, size = measure(streamed_report, start, end, label)
+            print(f'{n:>8,} {size / 1024:>8,.0f} {old_time:>9.2f} {new_time:>10.2f} {old_peak:>10.1f} {new_peak:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Vendor spend: SQL over line_item vs decoding every PO's items JSON.
+
+Run from the repository root:
+
+    python -m benchmarks.vendor_spend
+
+Seeds purchase orders with five line items each at increasing volumes and
+answers "quantity and spend of laptops per vendor this year" two ways:
+``line_items.vendor_spend`` (one indexed aggregate) and the old approach of
+loading the year's purchase orders and decoding their items JSON in
+Python. The JSON is kept in a scratch table shaped like the old
+purchase_order.items_json column. Uses an in-memory SQLite database.
+"""
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+
+from config import Config
+from employee_portal import create_app, db, line_items
+from employee_portal.models import Vendor, PurchaseOrder, LineItem
+
+ORDER_COUNTS = [2_000, 20_000, 100_000]
+VENDORS = 50
+ITEMS = ['Laptop', 'Monitor', 'Keyboard', 'Mouse', 'Docking Station', 'Office Chair', 'Desk', 'Printer Toner',
+         'Router', 'Server Rack', 'UPS Battery', 'Projector'] + [f'Spare Part {i}' for i in range(40)]
+STATUSES = ['Draft', 'Sent', 'Approved', 'Paid', 'Completed', 'Cancelled']
+LINES_PER_ORDER = 5
+LOOKUPS = 5
+
+legacy = sa.Table('legacy_po_items', db.metadata,
+                  sa.Column('id', sa.Integer, primary_key=True), sa.Column('vendor_id', sa.Integer),
+                  sa.Column('date', sa.Date), sa.Column('status', sa.String(50)), sa.Column('items_json', sa.Text))
+
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+
+
+def seed(n):
+    rng = random.Random(n)
+    db.session.execute(db.insert(Vendor), [{'id': i, 'name': f'Vendor {i}'} for i in range(1, VENDORS + 1)])
+    start = date(2024, 4, 1)
+    orders, lines, legacy_rows = [], [], []
+    for po_id in range(1, n + 1):
+        vendor_id, day, status = rng.randint(1, VENDORS), start + timedelta(days=rng.randrange(730)), rng.choice(STATUSES)
+        items = []
+        for position in range(LINES_PER_ORDER):
+            name, qty, price = rng.choice(ITEMS), rng.randint(1, 20), round(rng.uniform(100, 90_000), 2)
+            items.append({'item': name, 'qty': str(qty), 'price': str(price), 'total': f'{qty * price:.2f}'})
+            lines.append({'purchase_order_id': po_id, 'position': position, 'item': name,
+                          'item_key': line_items.normalize(name), 'quantity': qty, 'unit_price': price,
+                          'amount': round(qty * price, 2), 'vendor_id': vendor_id, 'date': day})
+        total = sum(float(i['total']) for i in items)
+        orders.append({'id': po_id, 'po_number': f'PO{po_id}', 'date': day, 'vendor_id': vendor_id,
+                       'total_amount': total, 'status': status})
+        legacy_rows.append({'id': po_id, 'vendor_id': vendor_id, 'date': day, 'status': status,
+                            'items_json': json.dumps(items)})
+    db.session.execute(db.insert(PurchaseOrder), orders)
+    db.session.execute(db.insert(LineItem), lines)
+    db.session.execute(legacy.insert(), legacy_rows)
+    db.session.commit()
+
+
+def decoded_spend(start, end, item):
+    rows = db.session.execute(sa.select(legacy.c.vendor_id, legacy.c.items_json).where(
+        legacy.c.date >= start, legacy.c.date < end, legacy.c.status.notin_(line_items.EXCLUDED_STATUSES)))
+    spend = defaultdict(lambda: [0.0, 0.0])
+    for vendor_id, raw in rows:
+        for entry in json.loads(raw):
+            if line_items.normalize(entry['item']).startswith(item):
+                spend[vendor_id][0] += float(entry['qty'])
+                spend[vendor_id][1] += float(entry['total'])
+    return spend
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        fn(*args)
+    return (time.perf_counter() - started) / LOOKUPS * 1000
+
+
+def main():
+    app = create_app(BenchConfig)
+    start, end = date(2025, 4, 1), date(2026, 4, 1)
+    with app.app_context():
+        print(f"{'orders':>8} {'lines':>8} {'sql ms':>8} {'decode ms':>10} {'all items sql ms':>17}")
+        for n in ORDER_COUNTS:
+            db.drop_all()
+            db.create_all()
+            seed(n)
+            by_sql = {v['vendor_id']: v['quantity'] for v in line_items.vendor_spend(start, end, 'laptop')}
+            by_json = {vendor_id: quantity for vendor_id, (quantity, _) in decoded_spend(start, end, 'laptop').items()}
+            assert by_sql == by_json
+            print(f'{n:>8,} {n * LINES_PER_ORDER:>8,} {timed(line_items.vendor_spend, start, end, "laptop"):>8.1f} '
+                  f'{timed(decoded_spend, start, end, "laptop"):>10.1f} '
+                  f'{timed(line_items.item_spend, start, end):>17.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Gunicorn worker memory: lazy imports alone vs preload with warm-up.
+
+Run from the repository root (Linux, gunicorn installed):
+
+    python -m benchmarks.worker_memory
+
+Starts gunicorn with WORKERS workers on a scratch SQLite database, first
+as ``gunicorn run:app`` (each worker imports the export libraries itself
+on first use) and then with deployment/gunicorn.conf.py (preload_app with
+PRELOAD_HEAVY_MODULES and gc.freeze, so workers fork from a master that
+has them).
+Memory is read from /proc/<pid>/smaps_rollup when idle and again after
+EXPORTS logged-in Excel template downloads have spread over the workers.
+PSS splits shared pages between the processes using them, so the PSS
+total is what the whole server really costs.
+"""
+import os
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+from config import Config
+from employee_portal import create_app, db
+from employee_portal.models import Role, User, EmployeeProfile
+
+WORKERS = 3
+EXPORTS = 30
+
+MODES = [
+    ('lazy imports', ['--workers', str(WORKERS)], {}),
+    ('preload + warm', ['--config', 'deployment/gunicorn.conf.py', '--workers', str(WORKERS)], {}),
+]
+
+
+def seed(path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        role = Role(name='Admin')
+        user = User(employeeid='BENCH', email='bench@example.com', user_role=role, is_first_login=False)
+        user.set_password('bench')
+        db.session.add_all([role, user, EmployeeProfile(first_name='Bench', last_name='Admin',
+                                                        email='bench@example.com', user=user)])
+        db.session.commit()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def memory(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/status') as f:
+                    if re.search(rf'^PPid:\s+{pid}$', f.read(), re.M):
+                        found.append(int(entry))
+            except OSError:
+                pass
+    return found
+
+
+def wait_until_up(url, workers, master):
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(url + '/auth/login', timeout=2)
+            if len(children(master)) >= workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start')
+
+
+def export_as_admin(url, times):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    page = opener.open(url + '/auth/login').read().decode()
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page).group(1)
+    opener.open(url + '/auth/login', urllib.parse.urlencode(
+        {'employeeid': 'BENCH', 'password': 'bench', 'csrf_token': token}).encode())
+    for _ in range(times):
+        # A fresh connection each time so the requests spread over the workers
+        opener.open(url + '/admin/employees/template').read()
+
+
+def report(label, master):
+    rows = [('master', master)] + [(f'worker {i + 1}', pid) for i, pid in enumerate(sorted(children(master)))]
+    total_pss = 0.0
+    for name, pid in rows:
+        rss, pss, private = memory(pid)
+        total_pss += pss
+        print(f'  {label:<6} {name:<9} rss {rss:6.1f} MB  pss {pss:6.1f} MB  private {private:6.1f} MB')
+    print(f'  {label:<6} total pss {total_pss:6.1f} MB')
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'app.db')
+        seed(path)
+        for name, args, env in MODES:
+            port = free_port()
+            url = f'http://127.0.0.1:{port}'
+            environment = dict(os.environ, DATABASE_URL='sqlite:///' + path, **env)
+            environment.pop('PRELOAD_HEAVY_MODULES', None)
+            started = time.perf_counter()
+            server = subprocess.Popen([sys.executable, '-m', 'gunicorn', *args, '--bind', f'127.0.0.1:{port}', 'run:app'],
+                                      env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_up(url, WORKERS, server.pid)
+                print(f'{name}: serving after {time.perf_counter() - started:.1f}s')
+                time.sleep(1)
+                report('idle', server.pid)
+                export_as_admin(url, EXPORTS)
+                report('export', server.pid)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -22,3 +22,72 @@ class Config:
         SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance/app.db')
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read replicas for report and export routes marked @read_replica (employee_portal/replicas.py),
+    # e.g. DATABASE_REPLICA_URLS="postgresql://replica1/genhr,postgresql://replica2/genhr"
+    SQLALCHEMY_REPLICA_URIS = [url.strip().replace('postgres://', 'postgresql://', 1)
+                               for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    # Replicas further behind than this are skipped; lag is checked at most every REPLICA_LAG_CHECK_SECONDS
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 30))
+    REPLICA_LAG_CHECK_SECONDS = 5
+    # How long a replica that failed is left out before being tried again
+    REPLICA_RETRY_SECONDS = 30
+
+    # SQLite production profile (employee_portal/sqlite_tuning.py), ignored on other databases.
+    # WAL lets readers run alongside the single writer. Azure's /home is a network share where
+    # WAL's shared memory is unsafe, so the rollback journal is kept there unless overridden.
+    # synchronous=NORMAL is only crash-safe under WAL, and mmap on a network share turns an I/O
+    # error into SIGBUS, so the rollback journal profile syncs fully and reads without mmap.
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or ('DELETE' if os.environ.get('WEBSITE_HOSTNAME') else 'WAL')
+    SQLITE_PRAGMAS = {
+        'journal_mode': SQLITE_JOURNAL_MODE,
+        'synchronous': 'NORMAL' if SQLITE_JOURNAL_MODE.upper() == 'WAL' else 'FULL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000)),
+        'cache_size': -32000,  # KiB per connection
+        'mmap_size': 256 * 1024 * 1024 if SQLITE_JOURNAL_MODE.upper() == 'WAL' else 0,
+        'temp_store': 'MEMORY',
+        'analysis_limit': 400,  # bounds the work PRAGMA optimize does
+    }
+    # Optionally queue writers (within a worker and across workers via a lock file) instead of
+    # leaving them to retry in SQLite's busy handler; mostly helps threaded workers
+    SQLITE_WRITE_QUEUE = os.environ.get('SQLITE_WRITE_QUEUE', '0') in ('1', 'true', 'True')
+    SQLITE_OPTIMIZE_ON_EXIT = True
+
+    # Audit log entries older than this are deleted by `flask audit prune`
+    AUDIT_LOG_RETENTION_DAYS = int(os.environ.get('AUDIT_LOG_RETENTION_DAYS', 7))
+
+    # Per-request SQL instrumentation behind /admin/perf (employee_portal/perf.py). A statement shape run
+    # PERF_N_PLUS_ONE_THRESHOLD or more times in one request is reported as a likely N+1 query.
+    PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION', '1') == '1'
+    PERF_N_PLUS_ONE_THRESHOLD = 5
+    # Server-Timing headers with DB time and query count, sent to logged-in admins only
+    PERF_SERVER_TIMING = True
+    # Workers merge their totals into this SQLite file (defaults to instance/perf.sqlite3) every PERF_FLUSH_SECONDS
+    PERF_STORE_PATH = os.environ.get('PERF_STORE_PATH')
+    PERF_FLUSH_SECONDS = 10
+
+    # Annual leave entitlement (days) per leave type, and the most that may be carried into the next year
+    LEAVE_ENTITLEMENTS = {'Sick': 12, 'Casual': 12, 'Vacation': 15}
+    LEAVE_CARRY_FORWARD_LIMITS = {'Vacation': 10}
+
+    # Weekdays (Monday=0) that are not working days for payroll, unless the employee is rostered via shifts
+    PAYROLL_WEEKLY_OFFS = (6,)
+
+    # Overrides for employee_portal.payroll_rules.DEFAULT_RULES, e.g. {'pt_state': 'Karnataka'}
+    PAYROLL_RULES = {}
+
+    # Import the Excel, PDF, payroll and face libraries while building the app instead of on first use.
+    # deployment/gunicorn.conf.py sets this with preload_app so the workers share them copy-on-write.
+    PRELOAD_HEAVY_MODULES = os.environ.get('PRELOAD_HEAVY_MODULES') == '1'
+
+    # Content-addressed upload store (defaults to instance/documents)
+    DOCUMENT_STORE_PATH = os.environ.get('DOCUMENT_STORE_PATH')
+
+    # Face descriptors: the embedder ('dlib', or 'hog' without dlib installed), its memory-mapped
+    # index (defaults to instance/faces) and the cosine similarity a capture must reach (the embedder's
+    # default when unset). Kiosk identification against every enrolled face stays off until
+    # `flask faces evaluate` measures a false-accept rate of at most FACE_MAX_FALSE_ACCEPT.
+    FACE_EMBEDDER = os.environ.get('FACE_EMBEDDER', 'dlib')
+    FACE_INDEX_PATH = os.environ.get('FACE_INDEX_PATH')
+    FACE_MATCH_THRESHOLD = float(os.environ['FACE_MATCH_THRESHOLD']) if os.environ.get('FACE_MATCH_THRESHOLD') else None
+    FACE_MAX_FALSE_ACCEPT = float(os.environ.get('FACE_MAX_FALSE_ACCEPT', 0.001))
@@ -0,0 +1,20 @@
+# Gunicorn settings for GenHR: gunicorn -c deployment/gunicorn.conf.py run:app
+#
+# The app is built once in the master with its report and export libraries
+# already imported (PRELOAD_HEAVY_MODULES), and the workers fork from it, so
+# they share those pages copy-on-write instead of each loading its own copy.
+# Database connections are not shared: employee_portal/preload.py resets the
+# pools in every forked worker.
+import gc
+import os
+
+os.environ.setdefault('PRELOAD_HEAVY_MODULES', '1')
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Keep the collector from writing to (and so un-sharing) objects inherited from the master
+    gc.freeze()
@@ -6,5 +6,8 @@ pip install gunicorn
 # Run database migrations (optional if already handled)
 # python deployment/migrate_to_postgres.py
 
+# Trim the audit log to AUDIT_LOG_RETENTION_DAYS (the admin page no longer does it on every view)
+flask --app run:app audit prune || true
+
 # Start Gunicorn
 gunicorn --bind=0.0.0.0 --timeout 600 run:app
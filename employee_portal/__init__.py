@@ -1,15 +1,15 @@
+import click
 from flask import Flask, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from config import Config
 from flask_wtf.csrf import CSRFProtect
 
 from flask_bootstrap import Bootstrap
+from employee_portal.replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
-migrate = Migrate()
 bootstrap = Bootstrap()
 csrf = CSRFProtect()
 
@@ -18,11 +18,18 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
 
     db.init_app(app)
+    from employee_portal import replicas, perf
+    replicas.init_app(app)
+    # Before the other request hooks, so their queries are counted too
+    perf.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
-    migrate.init_app(app, db)
+    # Alembic is only needed by `flask db`, and the flask CLI builds the app inside a click context
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
     bootstrap.init_app(app)
     csrf.init_app(app)
 
@@ -36,14 +43,22 @@ def create_app(config_class=Config):
         from datetime import datetime
         if current_user.is_authenticated:
             current_user.last_seen = datetime.utcnow()
-            try:
-                db.session.commit()
-            except:
-                db.session.rollback()
+            # Nothing reads the heartbeat back, so it must not keep @read_replica views on the primary
+            with replicas.untracked_writes():
+                try:
+                    db.session.commit()
+                except:
+                    db.session.rollback()
 
     with app.app_context():
         from . import models
 
+    from employee_portal import sqlite_tuning, reference_cache, cash_ledger, line_items
+    sqlite_tuning.init_app(app)
+    reference_cache.init_app(app)
+    cash_ledger.init_app(app)
+    line_items.init_app(app)
+
     # Blueprints will be registered here
     from .auth import bp as auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -54,10 +69,19 @@ def create_app(config_class=Config):
     from .admin import bp as admin_bp
     app.register_blueprint(admin_bp)
 
+    from employee_portal.commands import register_commands
+    register_commands(app)
+
     # Register Template Filters
     from employee_portal.utils.helpers import format_datetime_ist
     @app.template_filter('to_ist')
     def to_ist_filter(dt, fmt='%Y-%m-%d %H:%M:%S'):
         return format_datetime_ist(dt, fmt)
 
+    from employee_portal.images import image_url
+    app.add_template_filter(image_url, 'image_url')
+
+    from employee_portal import preload
+    preload.init_app(app)
+
     return app
\ No newline at end of file
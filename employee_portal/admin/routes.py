@@ -1,63 +1,55 @@
 from functools import wraps
-from flask import render_template, flash, redirect, url_for, request, jsonify, make_response, send_from_directory, send_file, current_app
+from flask import render_template, flash, redirect, url_for, request, jsonify, make_response, current_app
 from flask_login import current_user
 from sqlalchemy import extract, text
 from werkzeug.utils import secure_filename
 import os
 import shutil
 import zipfile
-import tempfile
 from . import bp
-from employee_portal.models import User, EmployeeProfile, Attendance, Leave, Designation, Payroll, Asset, Vendor, Role, Department, AuditLog, JobOpening, Candidate, Task, EmployeeTask, Appraisal, ExpenseClaim, Holiday, Announcement, EmployeeDocument, AssetHistory, Credit, Debit, Invoice, PurchaseOrder, AuthorizedSignature, ShiftSchedule, BillEstimate
+from employee_portal.models import User, EmployeeProfile, Attendance, Leave, Designation, Payroll, Asset, Vendor, Role, Department, AuditLog, JobOpening, Candidate, Task, EmployeeTask, Appraisal, ExpenseClaim, Holiday, Announcement, EmployeeDocument, AssetHistory, Credit, Debit, Invoice, PurchaseOrder, AuthorizedSignature, ShiftSchedule, BillEstimate, LeaveDay, LeaveLedgerEntry, LeaveBalance, ApprovalItem, LineItem
 from datetime import date, datetime, timedelta
-from employee_portal import db, csrf
+from employee_portal import db, csrf, perf, sqlite_tuning, reference_cache, approvals, images, documents, downloads, cash_ledger, registers, reports, line_items
 from employee_portal.auth.forms import AdminAddEmployeeForm, AdminEditEmployeeForm, DesignationForm, PayrollForm, AdminChangeUserRoleForm, AssetForm, VendorForm, RoleForm, DepartmentForm, JobOpeningForm, CandidateForm, TaskForm, AppraisalForm, HolidayForm, AnnouncementForm, EmployeeDocumentForm, CreditForm, DebitForm, InvoiceForm, PurchaseOrderForm, AuthorizedSignatureForm, ShiftForm, BillEstimationForm, LetterHeadForm
 from employee_portal.utils.helpers import save_picture, log_audit, save_file
-from employee_portal.excel import export_assets_to_excel, export_vendors_to_excel, export_employees_to_excel, generate_employee_template, generate_holiday_template, generate_asset_template
-from employee_portal.pdf import generate_transactions_pdf, generate_bill_estimate_pdf, generate_letter_head_pdf
-import pandas as pd
+from employee_portal.replicas import read_replica
+from employee_portal.task_assignment import assign_task_type, target_employee_ids, sync_task_assignees
+from employee_portal.leave_calendar import count_on_leave, on_leave_ids
+from employee_portal.leave_ledger import balance_summary
 import json
 import random
 
+ADMIN_PERMISSIONS = [
+    'dashboard', 'checklist', 'view_employees', 'add_employee', 
+    'designations', 'attendance', 'roles', 'change_role', 
+    'view_assets', 'add_asset', 'view_vendors', 'add_vendor', 
+    'manage_payroll', 'manage_ats'
+]
+
+def has_admin_access(user):
+    # Allow if Admin, Director, or the user has ANY of the admin permissions
+    if user.role in ['admin', 'director']:
+        return True
+    return any(user.has_permission(perm) for perm in ADMIN_PERMISSIONS)
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated:
             return redirect(url_for('auth.login'))
             
-        # Allow if Admin, Director
-        if current_user.role in ['admin', 'director']:
+        if has_admin_access(current_user):
             return f(*args, **kwargs)
             
-        # Allow if user has ANY of the admin permissions
-        admin_permissions = [
-            'dashboard', 'checklist', 'view_employees', 'add_employee', 
-            'designations', 'attendance', 'roles', 'change_role', 
-            'view_assets', 'add_asset', 'view_vendors', 'add_vendor', 
-            'manage_payroll', 'manage_ats'
-        ]
-        
-        for perm in admin_permissions:
-            if current_user.has_permission(perm):
-                return f(*args, **kwargs)
-            
         flash('You do not have permission to access this page.')
         return redirect(url_for('main.index'))
     return decorated_function
 
 @bp.route('/admin/audit_logs')
 @admin_required
+@read_replica
 def audit_logs():
-    # Auto-cleanup: Delete logs older than 7 days
-    retention_cutoff = datetime.utcnow() - timedelta(days=7)
-    try:
-        AuditLog.query.filter(AuditLog.timestamp < retention_cutoff).delete()
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        # Log error to console but don't crash the page for the user
-        print(f"Audit Log Cleanup Error: {e}")
-
+    # Read-only, so it can run on a replica; old entries are removed by `flask audit prune`
     page = request.args.get('page', 1, type=int)
     action_filter = request.args.get('action', '').strip()
     date_filter = request.args.get('date', '').strip()
@@ -139,11 +131,7 @@ def dashboard():
     total_employees = EmployeeProfile.query.count()
     present_today = db.session.query(Attendance.employee_id).filter(db.func.date(Attendance.check_in) == today).distinct().count()
     
-    leave_today = Leave.query.filter(
-        Leave.status == 'Approved',
-        Leave.start_date <= today,
-        Leave.end_date >= today
-    ).count()
+    leave_today = count_on_leave(today)
     
     assets_count = Asset.query.count()
     vendors_count = Vendor.query.count()
@@ -187,15 +175,7 @@ def present_today():
 @admin_required
 def on_leave_today():
     today = date.today()
-    leave_employee_ids = db.session.query(Leave.employee_id).filter(
-        db.and_(
-            Leave.start_date <= today, 
-            Leave.end_date >= today,
-            Leave.status == 'Approved'
-        )
-    ).distinct().all()
-    
-    leave_ids = [emp_id for emp_id, in leave_employee_ids]
+    leave_ids = on_leave_ids(today)
     employees_on_leave = EmployeeProfile.query.filter(EmployeeProfile.id.in_(leave_ids)).all()
     
     return render_template('admin/on_leave_today.html', employees=employees_on_leave, title="Employees on Leave Today")
@@ -295,10 +275,7 @@ def add_employee():
         db.session.commit() # Commit first to get ID
         
         # Assign Onboarding Tasks
-        onboarding_tasks = Task.query.filter_by(task_type='Onboarding').all()
-        for task in onboarding_tasks:
-            emp_task = EmployeeTask(employee_id=profile.id, task_id=task.id)
-            db.session.add(emp_task)
+        assign_task_type(profile.id, 'Onboarding')
         db.session.commit()
 
         log_audit('CREATE', 'Employee', user.id, f"Onboarded employee {new_employee_id}", current_user)
@@ -310,6 +287,7 @@ def add_employee():
 @bp.route('/admin/employee/<int:employee_id>/edit', methods=['GET', 'POST'])
 @admin_required
 def edit_employee(employee_id):
+    from employee_portal import faces
     employee_profile = EmployeeProfile.query.get_or_404(employee_id)
     user = employee_profile.user
     
@@ -321,6 +299,7 @@ def edit_employee(employee_id):
         if form.password.data:
             user.set_password(form.password.data)
             
+        previous_image = employee_profile.image_file
         if form.picture.data:
             picture_file = save_picture(form.picture.data)
             employee_profile.image_file = picture_file
@@ -351,6 +330,10 @@ def edit_employee(employee_id):
         if form.designation.data and form.designation.data.role:
             user.user_role = form.designation.data.role
             
+        new_manager_id = form.reports_to.data.id if form.reports_to.data else None
+        if new_manager_id != employee_profile.reports_to_id:
+            # Pending requests follow the employee to the new manager
+            approvals.reassign(employee_profile.id, new_manager_id)
         employee_profile.manager = form.reports_to.data
         employee_profile.previous_employer = form.previous_employer.data
         employee_profile.years_of_experience = form.years_of_experience.data
@@ -368,16 +351,18 @@ def edit_employee(employee_id):
             employee_profile.resigned_date = form.resigned_date.data
             
         if not was_resigned and employee_profile.is_resigned:
-            # Trigger Offboarding Tasks
-            offboarding_tasks = Task.query.filter_by(task_type='Offboarding').all()
-            for task in offboarding_tasks:
-                # Check if already assigned to avoid duplicates (though unlikely in this flow)
-                exists = EmployeeTask.query.filter_by(employee_id=employee_profile.id, task_id=task.id).first()
-                if not exists:
-                    emp_task = EmployeeTask(employee_id=employee_profile.id, task_id=task.id)
-                    db.session.add(emp_task)
+            # Trigger Offboarding Tasks (already assigned ones are skipped)
+            assign_task_type(employee_profile.id, 'Offboarding')
         
         db.session.commit()
+        if employee_profile.image_file != previous_image:
+            images.discard_if_unused(previous_image)
+        if was_resigned != employee_profile.is_resigned:
+            # Resigned employees drop out of face matching; reinstated ones come back
+            if employee_profile.is_resigned:
+                faces.remove(employee_profile.id)
+            else:
+                faces.enroll_stored(employee_profile)
         log_audit('UPDATE', 'Employee', employee_profile.id, f"Updated profile for {user.employeeid}", current_user)
         flash('Employee profile updated successfully!', 'success')
         return redirect(url_for('admin.view_employees'))
@@ -502,9 +487,9 @@ def delete_salary_structure(structure_id):
 @bp.route('/admin/api/payroll/prefill/<int:employee_id>')
 @admin_required
 def api_prefill_payroll(employee_id):
+    from employee_portal.payroll_days import month_day_counts
     from employee_portal.models import SalaryStructure, ExpenseClaim, Attendance, Leave, EmployeeProfile
     from datetime import date, datetime
-    import calendar
     
     employee = EmployeeProfile.query.get_or_404(employee_id)
     structure = SalaryStructure.query.filter_by(employee_id=employee_id).first()
@@ -515,18 +500,12 @@ def api_prefill_payroll(employee_id):
     month = request.args.get('month', date.today().month, type=int)
     year = request.args.get('year', date.today().year, type=int)
     
-    # Total days in the month
-    days_in_month = calendar.monthrange(year, month)[1]
-    net_worked_days = float(days_in_month)
-    
-    # If resigned, calculate worked days in the final month
-    if employee.is_resigned and employee.resigned_date:
-        if employee.resigned_date.year == year and employee.resigned_date.month == month:
-            # worked until resigned_date
-            net_worked_days = float(employee.resigned_date.day)
+    # Day counts from attendance, approved leave, holidays and shift roster
+    days = month_day_counts(year, month, employee_ids=[employee.id]).loc[employee.id]
+    days_in_month = int(days['days_in_month'])
     
-    # Calculate pro-rated factor
-    factor = net_worked_days / float(days_in_month)
+    # Pro-rated factor for the employment window (joining / resignation within the month)
+    factor = float(days['factor'])
     
     # Calculate Reimbursements
     reimbursements = db.session.query(db.func.sum(ExpenseClaim.amount)).filter(
@@ -545,7 +524,10 @@ def api_prefill_payroll(employee_id):
         'professional_tax': structure.professional_tax, # Usually fixed
         'reimbursements': reimbursements,
         'days_in_month': days_in_month,
-        'net_worked_days': net_worked_days
+        'worked_days': int(days['worked_days']),
+        'lop_days': int(days['lop_days']),
+        'lop': float(days['lop']),
+        'net_worked_days': float(days['paid_days'])
     })
 
 @bp.route('/admin/payroll/release_offer', methods=['GET', 'POST'])
@@ -562,7 +544,7 @@ def release_offer():
         
         # Generate PDF
         from employee_portal.pdf import generate_offer_letter_pdf
-        pdf_filename = generate_offer_letter_pdf(employee, salary_structure)
+        pdf_filename = documents.import_file(os.path.join(current_app.root_path, 'static', 'documents', generate_offer_letter_pdf(employee, salary_structure)))
         
         # Check if an offer letter already exists for this employee
         existing_doc = EmployeeDocument.query.filter_by(
@@ -570,8 +552,11 @@ def release_offer():
             document_type="Offer Letter"
         ).first()
 
+        previous_file = None
         if existing_doc:
             # Update existing record
+            previous_file = existing_doc.file_path
+            existing_doc.file_path = pdf_filename
             existing_doc.upload_date = datetime.utcnow()
             doc_id = existing_doc.id
         else:
@@ -587,6 +572,8 @@ def release_offer():
             doc_id = doc.id
         
         db.session.commit()
+        if previous_file != pdf_filename:
+            documents.release(previous_file)
         
         log_audit('CREATE' if not existing_doc else 'UPDATE', 'OfferLetter', doc_id, f"Released offer letter for {employee.first_name}", current_user)
         flash(f'Offer letter generated and released for {employee.first_name}.', 'success')
@@ -648,6 +635,7 @@ def manage_payroll():
             
             for claim in claims_to_pay:
                 claim.status = 'Paid'
+                approvals.sync_item('ExpenseClaim', claim)
                 # Create Debit Record
                 debit = Debit(
                     date=date.today(),
@@ -691,6 +679,8 @@ def manage_payroll():
 @bp.route('/admin/payroll/bulk_generate', methods=['POST'])
 @admin_required
 def bulk_generate_payroll():
+    from employee_portal.payroll_days import month_day_counts
+    from employee_portal.payroll_rules import load_structures, compute as compute_statutory
     month = request.form.get('month', type=int)
     year = request.form.get('year', type=int)
     
@@ -704,45 +694,75 @@ def bulk_generate_payroll():
     else:
         end_date = date(year, month + 1, 1) - timedelta(days=1)
         
-    days_in_month = end_date.day
+    day_counts = month_day_counts(year, month).to_dict('index')
+    
+    # Existing drafts and approved reimbursements for everyone, one query each
+    existing = {emp_id for emp_id, in db.session.query(Payroll.employee_id).filter(Payroll.pay_period_end == end_date).all()}
+    reimbursement_totals = dict(db.session.query(
+        ExpenseClaim.employee_id, db.func.sum(ExpenseClaim.amount)
+    ).filter(ExpenseClaim.status == 'Approved').group_by(ExpenseClaim.employee_id).all())
+    
+    # Optionally compute PF, ESI, PT and TDS from the statutory rules instead of the typed-in structure amounts
+    statutory = {}
+    if request.form.get('statutory') == '1':
+        frame = load_structures()
+        earned = [day_counts[emp_id]['paid_days'] / day_counts[emp_id]['days_in_month'] if emp_id in day_counts else 0.0 for emp_id in frame.index]
+        statutory = compute_statutory(frame, earned=earned).to_dict('index')
     
     employees_with_structure = SalaryStructure.query.all()
     count = 0
     
     for structure in employees_with_structure:
         # Check if payroll already exists for this period
-        existing = Payroll.query.filter_by(employee_id=structure.employee_id, pay_period_end=end_date).first()
-        if existing:
+        if structure.employee_id in existing:
             continue
-            
-        # Calculate reimbursements
-        reimbursements = db.session.query(db.func.sum(ExpenseClaim.amount)).filter(
-            ExpenseClaim.employee_id == structure.employee_id,
-            ExpenseClaim.status == 'Approved'
-        ).scalar() or 0.0
         
-        gross = structure.basic + structure.hra + structure.conveyance + \
-                structure.medical + structure.special_allowance + reimbursements
+        days = day_counts.get(structure.employee_id)
+        if not days or not days['employed_days']:
+            # Not employed during this period
+            continue
         
-        deductions = structure.pf + structure.esi + structure.professional_tax
+        # Pro-rate fixed components on the employment window; absences are charged as LOP
+        factor = days['factor']
+        reimbursements = reimbursement_totals.get(structure.employee_id) or 0.0
+        basic = round(structure.basic * factor, 2)
+        hra = round(structure.hra * factor, 2)
+        conveyance = round(structure.conveyance * factor, 2)
+        medical = round(structure.medical * factor, 2)
+        special_allowance = round(structure.special_allowance * factor, 2)
+        pf = round(structure.pf * factor, 2)
+        esi = round(structure.esi * factor, 2)
+        professional_tax = structure.professional_tax
+        tds = 0.0
+        rules = statutory.get(structure.employee_id)
+        if rules:
+            pf, esi, professional_tax, tds = rules['pf'], rules['esi'], rules['professional_tax'], rules['tds']
+        lop = float(days['lop'])
+        
+        gross = basic + hra + conveyance + medical + special_allowance + reimbursements
+        
+        deductions = pf + esi + professional_tax + tds + lop
         
         payroll = Payroll(
             employee_id=structure.employee_id,
             pay_period_start=start_date,
             pay_period_end=end_date,
-            basic=structure.basic,
-            hra=structure.hra,
-            conveyance=structure.conveyance,
-            medical=structure.medical,
-            special_allowance=structure.special_allowance,
+            basic=basic,
+            hra=hra,
+            conveyance=conveyance,
+            medical=medical,
+            special_allowance=special_allowance,
             reimbursements=reimbursements,
-            pf=structure.pf,
-            esi=structure.esi,
-            professional_tax=structure.professional_tax,
+            pf=pf,
+            esi=esi,
+            professional_tax=professional_tax,
+            tds=tds,
+            lop=lop,
             gross_salary=gross,
             total_deductions=deductions,
             net_salary=gross - deductions,
-            days_in_month=days_in_month,
+            days_in_month=int(days['days_in_month']),
+            lop_days=int(days['lop_days']),
             status='Draft'
         )
         db.session.add(payroll)
@@ -796,6 +816,7 @@ def bulk_update_payroll_status(status):
             
             for claim in claims_to_pay:
                 claim.status = 'Paid'
+                approvals.sync_item('ExpenseClaim', claim)
                 # Create Debit Record
                 debit = Debit(
                     date=date.today(),
@@ -840,6 +861,7 @@ def update_payroll_status(payroll_id, status):
         
         for claim in claims_to_pay:
             claim.status = 'Paid'
+            approvals.sync_item('ExpenseClaim', claim)
             # Create Debit Record
             debit = Debit(
                 date=date.today(),
@@ -873,6 +895,7 @@ def change_role():
 @bp.route('/admin/employee/<int:user_id>/delete', methods=['POST'])
 @admin_required
 def delete_employee(user_id):
+    from employee_portal import faces
     user_to_delete = User.query.get_or_404(user_id)
     if user_to_delete.role == 'admin': 
         flash('Cannot delete an admin user!', 'danger')
@@ -882,11 +905,20 @@ def delete_employee(user_id):
     emp_name = f"{employee_profile.first_name} {employee_profile.last_name}" if employee_profile else "Unknown"
     emp_id = user_to_delete.employeeid
 
+    previous_image = employee_profile.image_file if employee_profile else None
+    previous_face = employee_profile.biometric_image if employee_profile else None
+    profile_id = employee_profile.id if employee_profile else None
     if employee_profile:
+        # Items routed to this person fall back to the admin queue
+        ApprovalItem.query.filter_by(approver_profile_id=employee_profile.id).update({'approver_profile_id': None}, synchronize_session=False)
         db.session.delete(employee_profile)
     
     db.session.delete(user_to_delete)
     db.session.commit()
+    images.discard_if_unused(previous_image)
+    if profile_id:
+        faces.remove(profile_id)
+    documents.release(previous_face)
     
     log_audit('DELETE', 'Employee', user_id, f"Deleted employee {emp_name} ({emp_id})", current_user)
     
@@ -897,9 +929,37 @@ def delete_employee(user_id):
 @admin_required
 def admin_view_employee_profile(employee_id):
     employee_profile = EmployeeProfile.query.get_or_404(employee_id)
-    image_file = url_for('static', filename='img/' + (employee_profile.image_file or 'default.jpg'))
+    image_file = images.image_url(employee_profile.image_file, 150)
     doc_form = EmployeeDocumentForm()
-    return render_template('admin/_employee_profile_details.html', employee=employee_profile, title=f"{employee_profile.first_name}'s Profile", image_file=image_file, doc_form=doc_form)
+    leave_balances = balance_summary(employee_profile.id, date.today().year)
+    return render_template('admin/_employee_profile_details.html', employee=employee_profile, title=f"{employee_profile.first_name}'s Profile", image_file=image_file, doc_form=doc_form, leave_balances=leave_balances)
+
+@bp.route('/admin/employee/<int:employee_id>/face', methods=['POST'])
+@admin_required
+def enroll_face(employee_id):
+    from employee_portal import faces
+    employee_profile = EmployeeProfile.query.get_or_404(employee_id)
+    upload = request.files.get('face_image')
+    if not upload or not upload.filename:
+        flash('Choose a photo to enroll.', 'warning')
+        return redirect(url_for('admin.admin_view_employee_profile', employee_id=employee_id))
+    if employee_profile.is_resigned:
+        flash('Resigned employees cannot be enrolled.', 'warning')
+        return redirect(url_for('admin.admin_view_employee_profile', employee_id=employee_id))
+    try:
+        previous = faces.enroll(employee_profile, upload)
+    except OSError:
+        flash('The uploaded file is not a readable image.', 'danger')
+        return redirect(url_for('admin.admin_view_employee_profile', employee_id=employee_id))
+    except faces.NoFaceError:
+        flash('No face found in the photo. Upload a clear, front-facing photo.', 'danger')
+        return redirect(url_for('admin.admin_view_employee_profile', employee_id=employee_id))
+    db.session.commit()
+    if previous != employee_profile.biometric_image:
+        documents.release(previous)
+    log_audit('UPDATE', 'Employee', employee_profile.id, f"Enrolled face for {employee_profile.user.employeeid}", current_user)
+    flash('Face enrolled for biometric attendance.', 'success')
+    return redirect(url_for('admin.admin_view_employee_profile', employee_id=employee_id))
 
 # --- Asset Routes ---
 # ... (Asset routes are here, no change needed)
@@ -1203,7 +1263,9 @@ def delete_vendor(vendor_id):
 
 @bp.route('/admin/assets/export')
 @admin_required
+@read_replica
 def export_assets():
+    from employee_portal.excel import export_assets_to_excel
     assets = Asset.query.all()
     output = export_assets_to_excel(assets)
     return make_response(output, 200, {
@@ -1213,7 +1275,9 @@ def export_assets():
 
 @bp.route('/admin/vendors/export')
 @admin_required
+@read_replica
 def export_vendors():
+    from employee_portal.excel import export_vendors_to_excel
     vendors = Vendor.query.all()
     output = export_vendors_to_excel(vendors)
     return make_response(output, 200, {
@@ -1223,7 +1287,9 @@ def export_vendors():
 
 @bp.route('/admin/employees/export')
 @admin_required
+@read_replica
 def export_employees():
+    from employee_portal.excel import export_employees_to_excel
     query = EmployeeProfile.query.join(User).join(Role).filter(Role.name != 'Admin')
     employees = query.all()
     output = export_employees_to_excel(employees)
@@ -1235,6 +1301,7 @@ def export_employees():
 @bp.route('/admin/employees/template')
 @admin_required
 def download_employee_template():
+    from employee_portal.excel import generate_employee_template
     designations = [d.title for d in Designation.query.all()]
     departments = [d.name for d in Department.query.all()]
     output = generate_employee_template(designation_options=designations, department_options=departments)
@@ -1246,6 +1313,7 @@ def download_employee_template():
 @bp.route('/admin/employees/bulk_upload', methods=['POST'])
 @admin_required
 def bulk_upload_employees():
+    import pandas as pd
     if 'file' not in request.files:
         flash('No file part', 'danger')
         return redirect(url_for('admin.add_employee'))
@@ -1512,14 +1580,11 @@ def manage_tasks():
         db.session.flush()
 
         # Create instance records
-        if form.task_add_to.data:
-            et = EmployeeTask(employee_id=form.task_add_to.data.id, task_id=task.id)
-            db.session.add(et)
-        elif form.assigned_role.data:
-            role_members = EmployeeProfile.query.join(User).filter(User.role_id == form.assigned_role.data.id, EmployeeProfile.is_resigned == False).all()
-            for member in role_members:
-                et = EmployeeTask(employee_id=member.id, task_id=task.id)
-                db.session.add(et)
+        assignees = target_employee_ids(
+            role_id=form.assigned_role.data.id if form.assigned_role.data else None,
+            employee_id=form.task_add_to.data.id if form.task_add_to.data else None
+        )
+        sync_task_assignees(task, assignees)
 
         db.session.commit()
         flash(f'Task {next_no} added and assigned successfully.', 'success')
@@ -1540,12 +1605,7 @@ def manage_tasks():
 @bp.route('/admin/api/employees_by_role/<int:role_id>')
 @admin_required
 def get_employees_by_role(role_id):
-    employees = EmployeeProfile.query.join(User).filter(
-        User.role_id == role_id,
-        EmployeeProfile.is_resigned == False
-    ).all()
-    
-    return jsonify([{'id': e.id, 'name': f"{e.first_name} {e.last_name}"} for e in employees])
+    return jsonify([{'id': emp_id, 'name': name} for emp_id, name in reference_cache.choices('role_members', role_id)])
 
 @bp.route('/admin/tasks/<int:task_id>/edit', methods=['POST'])
 @admin_required
@@ -1592,25 +1652,15 @@ def edit_task(task_id):
     # Logic: Reassign if Role changed OR Employee changed
     # Note: If Role is same but Emp changed from None to ID (or vice versa), reassign.
     if new_role_id != current_role_id or new_emp_id != current_emp_id:
-        # Delete old instances
-        EmployeeTask.query.filter_by(task_id=task.id).delete()
-        
         # Update Master Task Assignment
         task.assigned_role_id = new_role_id
         task.task_add_to_id = new_emp_id
         task.status = 'Assigned' # Reset status on reassignment
 
-        # Create new instances
-        if new_emp_id:
-            et = EmployeeTask(employee_id=new_emp_id, task_id=task.id)
-            db.session.add(et)
-        elif new_role_id:
-            role_members = EmployeeProfile.query.join(User).filter(User.role_id == new_role_id, EmployeeProfile.is_resigned == False).all()
-            for member in role_members:
-                et = EmployeeTask(employee_id=member.id, task_id=task.id)
-                db.session.add(et)
+        # Apply only the difference so members kept across the change retain their progress
+        added, removed = sync_task_assignees(task, target_employee_ids(new_role_id, new_emp_id))
         
-        flash('Task updated and reassigned.', 'success')
+        flash(f'Task updated and reassigned ({added} added, {removed} removed).', 'success')
     else:
         flash('Task details updated.', 'success')
 
@@ -1649,7 +1699,7 @@ def upload_employee_document(employee_id):
     form = EmployeeDocumentForm()
     if form.validate_on_submit():
         if form.file.data:
-            filename = save_file(form.file.data, folder='documents')
+            filename = documents.save(form.file.data)
             
             doc = EmployeeDocument(
                 title=form.title.data,
@@ -1668,13 +1718,12 @@ def upload_employee_document(employee_id):
 def delete_employee_document(doc_id):
     doc = EmployeeDocument.query.get_or_404(doc_id)
     emp_id = doc.employee_id
-    from flask import current_app
-    file_path = os.path.join(current_app.root_path, 'static/documents', doc.file_path)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    file_path = doc.file_path
     
     db.session.delete(doc)
     db.session.commit()
+    # The file may still be shared with other documents or claims
+    documents.release(file_path)
     flash('Document deleted.', 'success')
     return redirect(url_for('admin.admin_view_employee_profile', employee_id=emp_id))
 
@@ -1781,6 +1830,7 @@ def delete_holiday(holiday_id):
 @bp.route('/admin/holidays/template')
 @admin_required
 def download_holiday_template_route():
+    from employee_portal.excel import generate_holiday_template
     output = generate_holiday_template()
     return make_response(output, 200, {
         'Content-Disposition': 'attachment; filename=holiday_template.xlsx',
@@ -1790,6 +1840,7 @@ def download_holiday_template_route():
 @bp.route('/admin/holidays/bulk_upload', methods=['POST'])
 @admin_required
 def bulk_upload_holidays():
+    import pandas as pd
     if 'file' not in request.files:
         flash('No file part', 'danger')
         return redirect(url_for('admin.manage_holidays'))
@@ -1853,17 +1904,19 @@ def manage_expenses():
 @admin_required
 def expense_action(claim_id, action):
     claim = ExpenseClaim.query.get_or_404(claim_id)
-    if action == 'approve':
-        claim.status = 'Approved'
-        claim.approved_by = current_user.email
-        flash('Expense claim approved.', 'success')
-    elif action == 'reject':
-        claim.status = 'Rejected'
-        claim.approved_by = current_user.email
-        claim.rejection_reason = request.form.get('reason', '')
-        flash('Expense claim rejected.', 'warning')
+    if action in approvals.ACTIONS:
+        row = approvals.find('ExpenseClaim', claim)
+        reason = request.form.get('reason', '') if action == 'reject' else None
+        if row is None or not approvals.decide([row], action, current_user, reason=reason):
+            flash('This expense claim has already been processed.', 'info')
+            return redirect(url_for('admin.manage_expenses'))
+        if action == 'approve':
+            flash('Expense claim approved.', 'success')
+        else:
+            flash('Expense claim rejected.', 'warning')
     elif action == 'pay':
         claim.status = 'Paid'
+        approvals.sync_item('ExpenseClaim', claim)
         
         # Create Debit Record
         debit = Debit(
@@ -1882,6 +1935,42 @@ def expense_action(claim_id, action):
     log_audit('UPDATE', 'ExpenseClaim', claim.id, f"Action {action} on claim '{claim.title}'", current_user)
     return redirect(url_for('admin.manage_expenses'))
 
+@bp.route('/admin/approvals')
+@admin_required
+def manage_approvals():
+    page = request.args.get('page', 1, type=int)
+    status_filter = request.args.get('status', 'Pending')
+    type_filter = request.args.get('item_type', '')
+    
+    items = approvals.admin_queue(status=status_filter or None, item_type=type_filter or None).options(
+        db.joinedload(ApprovalItem.employee), db.joinedload(ApprovalItem.approver)
+    ).paginate(page=page, per_page=25)
+    return render_template('admin/manage_approvals.html', items=items, status_filter=status_filter, type_filter=type_filter, item_types=list(approvals.MODELS), title='Approvals Inbox')
+
+@bp.route('/admin/approvals/bulk', methods=['POST'])
+@admin_required
+def bulk_approvals():
+    action = request.form.get('action')
+    item_ids = request.form.getlist('item_ids', type=int)
+    redirect_args = {'status': request.form.get('status', 'Pending'), 'item_type': request.form.get('item_type', '')}
+    
+    if action not in approvals.ACTIONS or not item_ids:
+        flash('Select at least one item and an action.', 'warning')
+        return redirect(url_for('admin.manage_approvals', **redirect_args))
+    
+    rows = ApprovalItem.query.filter(ApprovalItem.id.in_(item_ids)).with_for_update().all()
+    try:
+        decided = approvals.decide(rows, action, current_user, reason=request.form.get('reason', ''))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Bulk {action} failed, nothing was changed: {str(e)}', 'danger')
+        return redirect(url_for('admin.manage_approvals', **redirect_args))
+    
+    log_audit('BULK_UPDATE', 'ApprovalItem', None, f"Bulk {approvals.ACTIONS[action].lower()} {decided} approval items", current_user)
+    flash(f'{decided} item(s) {approvals.ACTIONS[action].lower()}.', 'success')
+    return redirect(url_for('admin.manage_approvals', **redirect_args))
+
 @bp.route('/admin/appraisals', methods=['GET', 'POST'])
 @admin_required
 def manage_appraisals():
@@ -1897,6 +1986,8 @@ def manage_appraisals():
             status=form.status.data
         )
         db.session.add(appraisal)
+        db.session.flush()
+        approvals.sync_item('Appraisal', appraisal)
         db.session.commit()
         log_audit('CREATE', 'Appraisal', appraisal.id, f"Created appraisal for {appraisal.employee.first_name} ({appraisal.period})", current_user)
         flash('Appraisal recorded.', 'success')
@@ -1917,6 +2008,7 @@ def edit_appraisal(appraisal_id):
         appraisal.feedback = form.feedback.data
         appraisal.goals = form.goals.data
         appraisal.status = form.status.data
+        approvals.sync_item('Appraisal', appraisal)
         db.session.commit()
         log_audit('UPDATE', 'Appraisal', appraisal.id, f"Updated appraisal for {appraisal.employee.first_name}", current_user)
         flash('Appraisal updated.', 'success')
@@ -1935,8 +2027,9 @@ def edit_appraisal(appraisal_id):
 @bp.route('/admin/liquidity/credits')
 @admin_required
 def manage_credits():
-    credits = Credit.query.order_by(Credit.date.desc()).all()
-    return render_template('admin/manage_credits.html', title='Manage Credits', credits=credits)
+    page = registers.fetch('credits', request.args)
+    return render_template('admin/manage_credits.html', title='Manage Credits', credits=page, page=page,
+                           categories=registers.choices(Credit.category))
 
 @bp.route('/admin/liquidity/credits/add', methods=['GET', 'POST'])
 @admin_required
@@ -1962,6 +2055,7 @@ def add_credit():
 @admin_required
 @csrf.exempt
 def bill_estimation():
+    from employee_portal.pdf import generate_bill_estimate_pdf
     form = BillEstimationForm()
     if request.method == 'POST':
         try:
@@ -1998,7 +2092,7 @@ def bill_estimation():
             estimate.pdf_file = filename
             db.session.commit()
             
-            return send_from_directory(directory='../instance', path=filename, as_attachment=True)
+            return downloads.send(os.path.join(downloads.generated_dir(), filename))
             
         except Exception as e:
             flash(f'Error generating estimate: {e}', 'danger')
@@ -2019,7 +2113,7 @@ def download_estimate(estimate_id):
     if not estimate.pdf_file:
         flash('PDF file not found for this estimate.', 'danger')
         return redirect(url_for('admin.bill_estimation_history'))
-    return send_from_directory(directory='../instance', path=estimate.pdf_file, as_attachment=False)
+    return downloads.send(os.path.join(downloads.generated_dir(), os.path.basename(estimate.pdf_file)), as_attachment=False)
 
 @bp.route('/admin/bill_estimation/delete/<int:estimate_id>', methods=['POST'])
 @admin_required
@@ -2045,6 +2139,7 @@ def delete_estimate(estimate_id):
 @admin_required
 @csrf.exempt
 def edit_estimate(estimate_id):
+    from employee_portal.pdf import generate_bill_estimate_pdf
     estimate = BillEstimate.query.get_or_404(estimate_id)
     form = BillEstimationForm(obj=estimate)
     
@@ -2101,26 +2196,9 @@ def edit_estimate(estimate_id):
 @bp.route('/admin/liquidity/debits')
 @admin_required
 def manage_debits():
-    query = Debit.query
-    
-    # Filters
-    paid_by = request.args.get('paid_by')
-    amount = request.args.get('amount')
-    category = request.args.get('category')
-    
-    if paid_by:
-        query = query.filter(Debit.paid_by.ilike(f'%{paid_by}%'))
-    if amount:
-        try:
-            amt = float(amount)
-            query = query.filter(Debit.amount == amt)
-        except ValueError:
-            pass # Ignore invalid amount
-    if category:
-        query = query.filter(Debit.category == category)
-        
-    debits = query.order_by(Debit.date.desc()).all()
-    return render_template('admin/manage_debits.html', title='Manage Debits', debits=debits)
+    page = registers.fetch('debits', request.args)
+    return render_template('admin/manage_debits.html', title='Manage Debits', debits=page, page=page,
+                           categories=registers.choices(Debit.category), payers=registers.choices(Debit.paid_by))
 
 @bp.route('/admin/liquidity/debits/add', methods=['GET', 'POST'])
 @admin_required
@@ -2137,7 +2215,7 @@ def add_debit():
     if form.validate_on_submit():
         bill_filename = None
         if form.bill.data:
-            bill_filename = save_file(form.bill.data, 'documents')
+            bill_filename = documents.save(form.bill.data)
 
         debit = Debit(
             date=form.date.data,
@@ -2172,8 +2250,9 @@ def edit_debit(debit_id):
         form.paid_by.data = debit.paid_by
 
     if form.validate_on_submit():
+        previous_bill = debit.bill_file
         if form.bill.data:
-            bill_filename = save_file(form.bill.data, 'documents')
+            bill_filename = documents.save(form.bill.data)
             debit.bill_file = bill_filename
             
         debit.date = form.date.data
@@ -2185,6 +2264,8 @@ def edit_debit(debit_id):
         debit.paid_by = form.paid_by.data
         
         db.session.commit()
+        if debit.bill_file != previous_bill:
+            documents.release(previous_bill)
         log_audit('UPDATE', 'Debit', debit.id, f'Updated debit of {form.amount.data}', current_user)
         flash('Debit transaction updated successfully!', 'success')
         return redirect(url_for('admin.manage_debits'))
@@ -2197,79 +2278,46 @@ def delete_debit(debit_id):
     debit = Debit.query.get_or_404(debit_id)
     db.session.delete(debit)
     db.session.commit()
+    documents.release(debit.bill_file)
     log_audit('DELETE', 'Debit', debit.id, f'Deleted debit transaction of {debit.amount}', current_user)
     flash('Debit transaction deleted successfully!', 'success')
     return redirect(url_for('admin.manage_debits'))
 
+def _export_transactions(kind, back):
+    args = request.values
+    try:
+        start, end, label = reports.parse_period(args)
+    except ValueError:
+        flash('Please select a valid month, quarter, financial year or date range to export.', 'warning')
+        return redirect(url_for(back))
+
+    report = reports.transaction_report(kind, start, end, label)
+    if report is None:
+        flash(f'No {kind} records found for {label}.', 'info')
+        return redirect(url_for(back))
+    data, filename = report
+    return downloads.send_data(data, filename)
+
 @bp.route('/admin/liquidity/debits/export_pdf', methods=['GET', 'POST'])
 @admin_required
 @csrf.exempt
+@read_replica
 def export_debits_pdf():
-    month_str = request.args.get('month') or request.form.get('month')
-    if not month_str:
-        flash('Please select a month to export.', 'warning')
-        return redirect(url_for('admin.manage_debits'))
-
-    try:
-        year, month = map(int, month_str.split('-'))
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
-
-        debits = Debit.query.filter(Debit.date >= start_date, Debit.date < end_date).order_by(Debit.date.asc()).all()
-
-        if not debits:
-            flash('No debit records found for the selected month.', 'info')
-            return redirect(url_for('admin.manage_debits'))
-
-        total_amount = sum(d.amount for d in debits)
-        filename = generate_transactions_pdf(debits, f"Debit Transactions - {start_date.strftime('%B %Y')}", total_amount)
-        
-        return send_from_directory(directory='../instance', path=filename, as_attachment=True)
-
-    except ValueError:
-        flash('Invalid month format.', 'danger')
-        return redirect(url_for('admin.manage_debits'))
+    return _export_transactions('debit', 'admin.manage_debits')
 
 @bp.route('/admin/liquidity/credits/export_pdf', methods=['GET', 'POST'])
 @admin_required
 @csrf.exempt
+@read_replica
 def export_credits_pdf():
-    month_str = request.args.get('month') or request.form.get('month')
-    if not month_str:
-        flash('Please select a month to export.', 'warning')
-        return redirect(url_for('admin.manage_credits'))
-
-    try:
-        year, month = map(int, month_str.split('-'))
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
-
-        credits = Credit.query.filter(Credit.date >= start_date, Credit.date < end_date).order_by(Credit.date.asc()).all()
-
-        if not credits:
-            flash('No credit records found for the selected month.', 'info')
-            return redirect(url_for('admin.manage_credits'))
-
-        total_amount = sum(c.amount for c in credits)
-        filename = generate_transactions_pdf(credits, f"Credit Transactions - {start_date.strftime('%B %Y')}", total_amount)
-        
-        return send_from_directory(directory='../instance', path=filename, as_attachment=True)
-
-    except ValueError:
-        flash('Invalid month format.', 'danger')
-        return redirect(url_for('admin.manage_credits'))
+    return _export_transactions('credit', 'admin.manage_credits')
 
 @bp.route('/admin/liquidity/invoices')
 @admin_required
 def manage_invoices():
-    invoices = Invoice.query.order_by(Invoice.date.desc()).all()
-    return render_template('admin/manage_invoices.html', title='Manage Invoices', invoices=invoices)
+    page = registers.fetch('invoices', request.args)
+    return render_template('admin/manage_invoices.html', title='Manage Invoices', invoices=page, page=page,
+                           statuses=['Unpaid', 'Paid', 'Overdue', 'Cancelled'], vendors=registers.vendor_choices())
 
 @bp.route('/admin/liquidity/invoices/add', methods=['GET', 'POST'])
 @admin_required
@@ -2278,7 +2326,7 @@ def add_invoice():
     if form.validate_on_submit():
         file_filename = None
         if form.file.data:
-            file_filename = save_file(form.file.data, 'documents')
+            file_filename = documents.save(form.file.data)
             
         invoice = Invoice(
             invoice_number=form.invoice_number.data,
@@ -2326,21 +2374,29 @@ def pay_invoice(invoice_id):
 @bp.route('/admin/liquidity/cash-position')
 @admin_required
 def cash_position():
-    total_credits = db.session.query(db.func.sum(Credit.amount)).scalar() or 0
-    total_debits = db.session.query(db.func.sum(Debit.amount)).scalar() or 0
-    closing_balance = total_credits - total_debits
-    
+    # Everything here reads the per-day rollup, so cost grows with days, not transactions
+    as_of = request.args.get('as_of', type=lambda v: datetime.strptime(v, '%Y-%m-%d').date()) or date.today()
+    position = cash_ledger.totals(as_of=as_of)
+    trend = cash_ledger.monthly_trend(12, as_of=as_of)
+    peak = max([max(m['credits'], m['debits']) for m in trend] + [1])
+    categories = cash_ledger.category_totals(as_of=as_of)
+
     return render_template('admin/cash_position.html', 
                            title='Cash Position', 
-                           total_credits=total_credits, 
-                           total_debits=total_debits, 
-                           closing_balance=closing_balance)
+                           total_credits=position['credits'], 
+                           total_debits=position['debits'], 
+                           closing_balance=position['balance'],
+                           as_of=as_of,
+                           trend=trend,
+                           peak=peak,
+                           categories=categories)
 
 @bp.route('/admin/liquidity/purchase-orders')
 @admin_required
 def manage_purchase_orders():
-    orders = PurchaseOrder.query.order_by(PurchaseOrder.date.desc()).all()
-    return render_template('admin/manage_purchase_orders.html', title='Manage Purchase Orders', orders=orders)
+    page = registers.fetch('purchase_orders', request.args)
+    return render_template('admin/manage_purchase_orders.html', title='Manage Purchase Orders', orders=page, page=page,
+                           statuses=['Draft', 'Sent', 'Approved', 'Paid', 'Completed', 'Cancelled'], vendors=registers.vendor_choices())
 
 @bp.route('/admin/liquidity/signatures')
 @admin_required
@@ -2404,21 +2460,7 @@ def add_purchase_order():
 @admin_required
 def print_purchase_order(po_id):
     po = PurchaseOrder.query.get_or_404(po_id)
-    
-    # Parse items JSON if it's a string
-    items = []
-    if po.items_json:
-        try:
-            parsed = json.loads(po.items_json)
-            if isinstance(parsed, list):
-                items = parsed
-            else:
-                items = [{'item': po.items_json, 'qty': '-', 'price': '-'}]
-        except:
-            # If not valid JSON, treat as a single description item or plain text
-            items = [{'item': po.items_json, 'qty': '-', 'price': '-'}]
-            
-    return render_template('admin/print_purchase_order.html', po=po, items=items, today=date.today())
+    return render_template('admin/print_purchase_order.html', po=po, items=po.items, today=date.today())
 
 @bp.route('/admin/liquidity/purchase-orders/<int:po_id>/delete', methods=['POST'])
 @admin_required
@@ -2430,6 +2472,55 @@ def delete_purchase_order(po_id):
     flash('Purchase Order deleted successfully.', 'success')
     return redirect(url_for('admin.manage_purchase_orders'))
 
+@bp.route('/admin/liquidity/vendor-spend')
+@admin_required
+@read_replica
+def vendor_spend():
+    args = request.args.to_dict()
+    if not any(args.get(key) for key in ('month', 'quarter', 'fy', 'start')):
+        today = date.today()
+        args['fy'] = str(today.year if today.month >= reports.FY_START_MONTH else today.year - 1)
+    try:
+        start, end, label = reports.parse_period(args)
+    except ValueError:
+        flash('Please select a valid month, quarter, financial year or date range.', 'warning')
+        return redirect(url_for('admin.vendor_spend'))
+
+    item = args.get('item', '').strip()
+    vendor_id = request.args.get('vendor_id', type=int)
+    by_vendor = line_items.vendor_spend(start, end, item)
+    by_item = line_items.item_spend(start, end, vendor_id, item)
+    return render_template('admin/vendor_spend.html', title='Vendor Spend', label=label, args=args,
+                           by_vendor=by_vendor, by_item=by_item, item=item, vendor_id=vendor_id,
+                           vendors=registers.vendor_choices(), total=round(sum(v['amount'] for v in by_vendor), 2))
+
+@bp.route('/admin/perf')
+@admin_required
+def perf_dashboard():
+    if current_user.role != 'admin':
+        flash('Access denied. Only Admins can view performance data.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+    perf_store = perf.store()
+    order = 'avg' if request.args.get('order') == 'avg' else 'total'
+    endpoints = perf_store.slowest_endpoints(order) if perf_store else []
+    statements = perf_store.slowest_statements() if perf_store else []
+    return render_template('admin/perf.html', title='Performance', enabled=perf_store is not None, order=order,
+                           endpoints=endpoints, statements=statements,
+                           threshold=current_app.config.get('PERF_N_PLUS_ONE_THRESHOLD', 5))
+
+@bp.route('/admin/perf/reset', methods=['POST'])
+@admin_required
+def reset_perf():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+    perf_store = perf.store()
+    if perf_store:
+        perf_store.reset()
+        log_audit('DELETE', 'PerfStats', None, 'Reset request and query timings', current_user)
+        flash('Performance statistics cleared.', 'success')
+    return redirect(url_for('admin.perf_dashboard'))
+
 @bp.route('/admin/shifts', methods=['GET', 'POST'])
 def manage_shifts():
     if not current_user.is_authenticated:
@@ -2449,12 +2540,14 @@ def manage_shifts():
         if is_admin:
             return EmployeeProfile.query.filter_by(is_resigned=False).order_by(EmployeeProfile.first_name).all()
         elif is_manager:
-            return EmployeeProfile.query.filter_by(manager_id=current_user.profile.id, is_resigned=False).order_by(EmployeeProfile.first_name).all()
+            return EmployeeProfile.query.filter_by(reports_to_id=current_user.profile.id, is_resigned=False).order_by(EmployeeProfile.first_name).all()
         else:
             return [current_user.profile]
 
     form = ShiftForm()
-    form.employee.query = get_filtered_employees()
+    if not is_admin:
+        # Admins pick from the cached list of all active employees
+        form.employee.choices = [(e.id, f"{e.first_name} {e.last_name} ({e.user.employeeid})") for e in get_filtered_employees()]
     
     selected_date_str = request.args.get('date', date.today().strftime('%Y-%m-%d'))
     try:
@@ -2784,8 +2877,23 @@ def clear_table():
         return redirect(url_for('admin.manage_data'))
 
     try:
+        # Bulk deletes skip ORM cascades, so clear the derived leave calendar and ledger explicitly
+        if model is Leave:
+            db.session.query(LeaveDay).delete()
+            db.session.query(LeaveLedgerEntry).delete()
+            db.session.query(LeaveBalance).delete()
+        # ... and the line items that point at purchase orders and estimates
+        if model is PurchaseOrder:
+            db.session.query(LineItem).filter(LineItem.purchase_order_id.isnot(None)).delete()
+        if model is BillEstimate:
+            db.session.query(LineItem).filter(LineItem.bill_estimate_id.isnot(None)).delete()
+        if table_name in approvals.MODELS:
+            db.session.query(ApprovalItem).filter(ApprovalItem.item_type == table_name).delete()
+
         # Delete all records
         num_deleted = db.session.query(model).delete()
+        if model in (Credit, Debit):
+            cash_ledger.rebuild()
         db.session.commit()
 
         log_audit('DELETE_ALL', table_name, None, f"Cleared {num_deleted} records from {table_name}", current_user)
@@ -2811,13 +2919,10 @@ def backup_database():
 
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_filename = f"backup_genhr_{timestamp}.db"
+        # Under WAL recent commits may still sit in app.db-wal
+        sqlite_tuning.checkpoint()
 
-        return send_file(
-            db_path,
-            as_attachment=True,
-            download_name=backup_filename,
-            mimetype='application/x-sqlite3'
-        )
+        return downloads.send(db_path, download_name=backup_filename, mimetype='application/x-sqlite3')
     except Exception as e:
         flash(f'Error creating backup: {str(e)}', 'danger')
         return redirect(url_for('admin.manage_data'))
@@ -2841,14 +2946,16 @@ def restore_database():
             if os.path.exists(db_path):
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 safety_backup = os.path.join(current_app.instance_path, f"safety_backup_{timestamp}.db")
+                sqlite_tuning.checkpoint()
                 shutil.copy2(db_path, safety_backup)
             filename = secure_filename(file.filename)
             temp_path = os.path.join(current_app.instance_path, f"temp_restore_{filename}")
             file.save(temp_path)
             db.session.remove()
             db.engine.dispose()
-            if os.path.exists(db_path):
-                os.remove(db_path)
+            for stale in (db_path, db_path + '-wal', db_path + '-shm'):
+                if os.path.exists(stale):
+                    os.remove(stale)
             shutil.move(temp_path, db_path)
             log_audit('RESTORE', 'Database', None, f"Restored database from {filename}", current_user)
             flash('Database restored successfully. Please log in again.', 'success')
@@ -2869,13 +2976,17 @@ def backup_full():
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_filename = f"full_backup_genhr_{timestamp}.zip"
 
-        temp_dir = tempfile.gettempdir()
-        temp_zip_path = os.path.join(temp_dir, backup_filename)
+        # Written under the instance folder so nginx can stream it; skipped by the walk below
+        exports_path = downloads.exports_dir()
+        temp_zip_path = os.path.join(exports_path, backup_filename)
+        sqlite_tuning.checkpoint()
 
         with zipfile.ZipFile(temp_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
             instance_path = current_app.instance_path
             if os.path.exists(instance_path):
                 for root, dirs, files in os.walk(instance_path):
+                    if root == exports_path:
+                        continue
                     for file in files:
                         if not file.startswith('temp_restore_'):
                             file_path = os.path.join(root, file)
@@ -2898,12 +3009,7 @@ def backup_full():
                         arcname = os.path.relpath(file_path, os.path.join(current_app.root_path, '..'))
                         zipf.write(file_path, arcname)
 
-        return send_file(
-            temp_zip_path,
-            as_attachment=True,
-            download_name=backup_filename,
-            mimetype='application/zip'
-        )
+        return downloads.send(temp_zip_path, download_name=backup_filename, mimetype='application/zip')
     except Exception as e:
         flash(f'Error creating full backup: {str(e)}', 'danger')
         return redirect(url_for('admin.manage_data'))
@@ -2911,6 +3017,7 @@ def backup_full():
 @bp.route('/admin/letter-head', methods=['GET', 'POST'])
 @admin_required
 def letter_head():
+    from employee_portal.pdf import generate_letter_head_pdf
     form = LetterHeadForm()
     if form.validate_on_submit():
         sig = form.authorized_signature.data
@@ -2923,13 +3030,14 @@ def letter_head():
         }
         
         filename = generate_letter_head_pdf(data)
-        return send_from_directory(directory='../instance', path=filename, as_attachment=True)
+        return downloads.send(os.path.join(downloads.generated_dir(), filename))
         
     return render_template('admin/letter_head.html', title='Letter Head', form=form)
 
 @bp.route('/admin/assets/template')
 @admin_required
 def download_asset_template():
+    from employee_portal.excel import generate_asset_template
     vendors = [v.name for v in Vendor.query.all()]
     output = generate_asset_template(vendor_options=vendors)
     return make_response(output, 200, {
@@ -2940,6 +3048,7 @@ def download_asset_template():
 @bp.route('/admin/assets/bulk_upload', methods=['POST'])
 @admin_required
 def bulk_upload_assets():
+    import pandas as pd
     if 'file' not in request.files:
         flash('No file part', 'danger')
         return redirect(url_for('admin.add_asset', tab='bulk'))
@@ -0,0 +1,183 @@
+from datetime import datetime
+from employee_portal import db
+from employee_portal.models import ApprovalItem, Leave, ExpenseClaim, Appraisal, EmployeeProfile
+from employee_portal.leave_calendar import sync_leave_status
+from employee_portal.leave_ledger import sync_leave_ledger
+
+MODELS = {'Leave': Leave, 'ExpenseClaim': ExpenseClaim, 'Appraisal': Appraisal}
+
+ACTIONS = {'approve': 'Approved', 'reject': 'Rejected'}
+
+
+def inbox_status(item_type, status):
+    """Map an item's own status onto the inbox (Pending/Approved/Rejected), or None for no entry."""
+    if item_type == 'Appraisal':
+        return {'Submitted': 'Pending', 'Finalized': 'Approved'}.get(status)
+    if status == 'Paid':
+        return 'Approved'
+    return status if status in ('Pending', 'Approved', 'Rejected') else None
+
+
+def summary(item_type, item):
+    if item_type == 'Leave':
+        return f"{item.leave_type} leave {item.start_date.strftime('%d %b')} - {item.end_date.strftime('%d %b %Y')}"
+    if item_type == 'ExpenseClaim':
+        return f"{item.category}: {item.title} ({item.amount:,.2f})"
+    return f"Appraisal {item.period}"
+
+
+def _manager_id(employee_id):
+    return db.session.query(EmployeeProfile.reports_to_id).filter(EmployeeProfile.id == employee_id).scalar()
+
+
+def sync_item(item_type, item):
+    """Create or update the inbox row of a leave, claim or appraisal.
+
+    Call after the item is added (flush first so it has an id) or its status
+    changes. New and resubmitted items are routed to the employee's current
+    manager. The caller owns the transaction.
+    """
+    status = inbox_status(item_type, item.status)
+    row = ApprovalItem.query.filter_by(item_type=item_type, item_id=item.id).first()
+    if status is None:
+        if row:
+            db.session.delete(row)
+        return None
+
+    if row is None:
+        row = ApprovalItem(item_type=item_type, item_id=item.id, employee_id=item.employee_id, submitted_at=datetime.utcnow())
+        row.approver_profile_id = _manager_id(item.employee_id)
+        db.session.add(row)
+    elif status == 'Pending' and row.status != 'Pending':
+        row.approver_profile_id = _manager_id(item.employee_id)
+        row.submitted_at = datetime.utcnow()
+        row.decided_by = None
+        row.decided_at = None
+
+    row.status = status
+    row.summary = summary(item_type, item)
+    return row
+
+
+def find(item_type, item):
+    """The inbox row of an item, creating it for items that predate the inbox."""
+    return ApprovalItem.query.filter_by(item_type=item_type, item_id=item.id).first() or sync_item(item_type, item)
+
+
+def can_decide(user, row):
+    if user.role == 'admin':
+        return True
+    return bool(user.profile and row.approver_profile_id == user.profile.id)
+
+
+def pending_for(approver_profile_id, item_type=None):
+    """A manager's queue: one lookup on the (approver_profile_id, status) index."""
+    query = ApprovalItem.query.filter_by(approver_profile_id=approver_profile_id, status='Pending')
+    if item_type:
+        query = query.filter_by(item_type=item_type)
+    return query.order_by(ApprovalItem.submitted_at.asc())
+
+
+def pending_leaves_for(approver_profile_id):
+    return Leave.query.join(
+        ApprovalItem, db.and_(ApprovalItem.item_type == 'Leave', ApprovalItem.item_id == Leave.id)
+    ).filter(
+        ApprovalItem.approver_profile_id == approver_profile_id,
+        ApprovalItem.status == 'Pending'
+    ).order_by(ApprovalItem.submitted_at.asc())
+
+
+def admin_queue(status='Pending', item_type=None):
+    query = ApprovalItem.query
+    if status:
+        query = query.filter_by(status=status)
+    if item_type:
+        query = query.filter_by(item_type=item_type)
+    return query.order_by(ApprovalItem.submitted_at.desc(), ApprovalItem.id.desc())
+
+
+def _apply(item_type, item, status, user, reason):
+    approver = f"{user.profile.first_name} {user.profile.last_name}" if user.profile else 'Admin'
+    if item_type == 'Leave':
+        item.status = status
+        item.approved_by = approver
+        if status == 'Rejected':
+            item.rejection_reason = reason or ''
+        sync_leave_status(item)
+        sync_leave_ledger(item, created_by=user.email)
+    elif item_type == 'ExpenseClaim':
+        item.status = status
+        item.approved_by = user.email
+        if status == 'Rejected':
+            item.rejection_reason = reason or ''
+    else:
+        # A rejected appraisal goes back to Draft for revision
+        item.status = 'Finalized' if status == 'Approved' else 'Draft'
+
+
+def decide(rows, action, user, reason=None):
+    """Approve or reject inbox rows together with the records behind them.
+
+    Underlying items are loaded with one query per type. Rows that are no
+    longer pending are skipped. Nothing is committed here, so a bulk decision
+    lands in a single transaction. Returns the number of items decided.
+    """
+    status = ACTIONS[action]
+    rows = [row for row in rows if row.status == 'Pending']
+
+    items = {}
+    for item_type, model in MODELS.items():
+        ids = [row.item_id for row in rows if row.item_type == item_type]
+        if ids:
+            items[item_type] = {obj.id: obj for obj in model.query.filter(model.id.in_(ids)).all()}
+
+    now = datetime.utcnow()
+    decided = 0
+    for row in rows:
+        item = items.get(row.item_type, {}).get(row.item_id)
+        if item is None:
+            db.session.delete(row)
+            continue
+        _apply(row.item_type, item, status, user, reason)
+        row.status = status
+        row.decided_by = user.email
+        row.decided_at = now
+        decided += 1
+    return decided
+
+
+def reassign(employee_id, approver_profile_id):
+    """Move an employee's pending items to their new manager."""
+    return ApprovalItem.query.filter_by(employee_id=employee_id, status='Pending').update(
+        {'approver_profile_id': approver_profile_id}, synchronize_session=False
+    )
+
+
+def rebuild(batch_size=500):
+    """Regenerate the inbox from all leaves, expense claims and appraisals.
+
+    Items are routed to each employee's current manager.
+    """
+    ApprovalItem.query.delete(synchronize_session=False)
+    total = 0
+    for item_type, model in MODELS.items():
+        rows = []
+        for item in model.query.order_by(model.id).yield_per(batch_size):
+            status = inbox_status(item_type, item.status)
+            if status is None:
+                continue
+            rows.append({
+                'item_type': item_type, 'item_id': item.id, 'employee_id': item.employee_id,
+                'status': status, 'summary': summary(item_type, item),
+                'submitted_at': getattr(item, 'applied_date', None) or datetime.utcnow(),
+            })
+        managers = dict(db.session.query(EmployeeProfile.id, EmployeeProfile.reports_to_id).filter(
+            EmployeeProfile.id.in_({row['employee_id'] for row in rows})
+        ).all()) if rows else {}
+        for row in rows:
+            row['approver_profile_id'] = managers.get(row['employee_id'])
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(db.insert(ApprovalItem), rows[start:start + batch_size])
+        total += len(rows)
+    db.session.commit()
+    return total
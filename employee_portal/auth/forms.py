@@ -2,40 +2,79 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, SubmitField, SelectField, TextAreaField, IntegerField, FileField, FloatField, DateField, HiddenField, SelectMultipleField
 from wtforms.validators import DataRequired, Email, EqualTo, ValidationError, Length, Optional, Regexp
 from flask_wtf.file import FileField, FileAllowed
-from employee_portal.models import User, Role, AuthorizedSignature
+from wtforms.fields import SelectFieldBase
+from employee_portal import db, reference_cache
+from employee_portal.models import User, Role, AuthorizedSignature, Designation, Department, EmployeeProfile, Vendor, JobOpening
 from datetime import date
 from wtforms import widgets
-from employee_portal.utils.helpers import get_vendors
-from wtforms_sqlalchemy.fields import QuerySelectField
-
-# --- Helper Functions ---
-
-def get_roles():
-    try:
-        return Role.query.all()
-    except:
-        return []
-
-def get_designations():
-    try:
-        return Designation.query.all()
-    except:
-        return []
-
-def get_departments():
-    try:
-        return Department.query.all()
-    except:
-        return []
-
-def get_employees():
-    try:
-        return EmployeeProfile.query.filter_by(is_resigned=False).order_by(EmployeeProfile.first_name).all()
-    except:
-        return []
-
-def get_all_users():
-    return User.query.all()
+
+# --- Fields ---
+
+class CachedSelectField(SelectFieldBase):
+    """Drop-in for QuerySelectField that renders from the reference-data cache.
+
+    Options come from cached (id, label) tuples, so a warm form runs no
+    queries. ``data`` is still a model instance: it is loaded by primary key
+    only when a submitted value is read. Views may set ``field.choices`` to
+    a narrower ``[(id, label)]`` list.
+    """
+    widget = widgets.Select()
+
+    def __init__(self, label=None, validators=None, entity=None, model=None, allow_blank=False, blank_text='', blank_value='__None', **kwargs):
+        super().__init__(label, validators, **kwargs)
+        self.entity = entity
+        self.model = model
+        self.allow_blank = allow_blank
+        self.blank_text = blank_text
+        self.blank_value = blank_value
+        self.choices = None
+        self._formdata = None
+
+    def _get_choices(self):
+        return self.choices if self.choices is not None else reference_cache.choices(self.entity)
+
+    def _get_data(self):
+        if self._formdata is not None:
+            try:
+                pk = int(self._formdata)
+            except ValueError:
+                pk = None
+            self._set_data(db.session.get(self.model, pk) if pk is not None else None)
+        return self._data
+
+    def _set_data(self, data):
+        self._data = data
+        self._formdata = None
+
+    data = property(_get_data, _set_data)
+
+    def _selected(self):
+        if self._formdata is not None:
+            return self._formdata
+        return str(self._data.id) if self._data is not None else None
+
+    def iter_choices(self):
+        selected = self._selected()
+        if self.allow_blank:
+            yield (self.blank_value, self.blank_text, selected is None, {})
+        for pk, label in self._get_choices():
+            yield (str(pk), label, str(pk) == selected, {})
+
+    def process_formdata(self, valuelist):
+        if valuelist:
+            if self.allow_blank and valuelist[0] == self.blank_value:
+                self.data = None
+            else:
+                self._data = None
+                self._formdata = valuelist[0]
+
+    def pre_validate(self, form):
+        selected = self._selected()
+        if selected is not None:
+            if selected not in {str(pk) for pk, _ in self._get_choices()}:
+                raise ValidationError(self.gettext('Not a valid choice'))
+        elif not self.allow_blank:
+            raise ValidationError(self.gettext('Not a valid choice'))
 
 # --- Forms ---
 
@@ -69,7 +108,7 @@ class MultiCheckboxField(SelectMultipleField):
     option_widget = widgets.CheckboxInput()
 
 class RoleForm(FlaskForm):
-    name = QuerySelectField('Role Name (from Designations)', query_factory=get_designations, get_label='title', allow_blank=False, validators=[DataRequired()])
+    name = CachedSelectField('Role Name (from Designations)', entity='designations', model=Designation, allow_blank=False, validators=[DataRequired()])
     permissions = MultiCheckboxField('Permissions', choices=[
         ('dashboard', 'Dashboard'),
         ('view_employees', 'View Employees (Team)'),
@@ -92,7 +131,7 @@ class RoleForm(FlaskForm):
 
 class JobOpeningForm(FlaskForm):
     title = StringField('Job Title', validators=[DataRequired()])
-    department = QuerySelectField('Department', query_factory=get_departments, get_label='name', allow_blank=True)
+    department = CachedSelectField('Department', entity='departments', model=Department, allow_blank=True)
     description = StringField('Description', widget=widgets.TextArea())
     status = SelectField('Status', choices=[('Open', 'Open'), ('Closed', 'Closed'), ('On Hold', 'On Hold')], default='Open')
     submit = SubmitField('Save Job')
@@ -102,7 +141,7 @@ class CandidateForm(FlaskForm):
     last_name = StringField('Last Name', validators=[DataRequired()])
     email = StringField('Email', validators=[DataRequired(), Email()])
     phone = StringField('Phone')
-    job_opening = QuerySelectField('Applied For', query_factory=lambda: JobOpening.query.filter_by(status='Open').all(), get_label='title', allow_blank=True)
+    job_opening = CachedSelectField('Applied For', entity='open_jobs', model=JobOpening, allow_blank=True)
     status = SelectField('Status', choices=[('Applied', 'Applied'), ('Interviewing', 'Interviewing'), ('Offered', 'Offered'), ('Hired', 'Hired'), ('Rejected', 'Rejected')], default='Applied')
     submit = SubmitField('Save Candidate')
 
@@ -111,18 +150,18 @@ class TaskForm(FlaskForm):
     task_type = SelectField('Type', choices=[('Onboarding', 'Onboarding'), ('Offboarding', 'Offboarding'), ('Others', 'Others')], default='Onboarding')
     other_type_name = StringField('Other Type Details')
     priority = SelectField('Priority', choices=[('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High')], default='Low')
-    assigned_role = QuerySelectField('Responsible Role', query_factory=get_roles, get_label='name', allow_blank=True)
-    task_add_to = QuerySelectField('Task Add To (Optional)', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name}", allow_blank=True, blank_text='All Role Members')
+    assigned_role = CachedSelectField('Responsible Role', entity='roles', model=Role, allow_blank=True)
+    task_add_to = CachedSelectField('Task Add To (Optional)', entity='employees', model=EmployeeProfile, allow_blank=True, blank_text='All Role Members')
     target_date = DateField('Target Date', format='%Y-%m-%d', validators=[Optional()])
     submit = SubmitField('Save Task')
 
 class AppraisalForm(FlaskForm):
-    employee = QuerySelectField('Employee', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name}", allow_blank=False)
+    employee = CachedSelectField('Employee', entity='employees', model=EmployeeProfile, allow_blank=False)
     period = StringField('Period (e.g., 2025 Q1)', validators=[DataRequired()])
     score = SelectField('Score (1-5)', choices=[(1, '1 - Poor'), (2, '2 - Needs Improvement'), (3, '3 - Meets Expectations'), (4, '4 - Exceeds Expectations'), (5, '5 - Outstanding')], coerce=int, default=3)
     feedback = StringField('Feedback', widget=widgets.TextArea(), validators=[DataRequired()])
     goals = StringField('Goals for Next Period', widget=widgets.TextArea())
-    status = SelectField('Status', choices=[('Draft', 'Draft'), ('Finalized', 'Finalized')], default='Draft')
+    status = SelectField('Status', choices=[('Draft', 'Draft'), ('Submitted', 'Submitted for Manager Review'), ('Finalized', 'Finalized')], default='Draft')
     submit = SubmitField('Save Appraisal')
 
 class ExpenseClaimForm(FlaskForm):
@@ -153,7 +192,7 @@ class EmployeeDocumentForm(FlaskForm):
 
 class DesignationForm(FlaskForm):
     title = StringField('Designation Title', validators=[DataRequired()])
-    role = QuerySelectField('Default Role', query_factory=get_roles, get_label='name', allow_blank=True, blank_text='Select Role')
+    role = CachedSelectField('Default Role', entity='roles', model=Role, allow_blank=True, blank_text='Select Role')
     submit = SubmitField('Save')
 
 class DepartmentForm(FlaskForm):
@@ -186,9 +225,9 @@ class AdminAddEmployeeForm(FlaskForm):
     branch = StringField('Branch', validators=[DataRequired()])
     
     # Job Information
-    department = QuerySelectField('Department', query_factory=get_departments, get_label='name', allow_blank=True, blank_text='Select Department')
-    designation = QuerySelectField('Designation', query_factory=get_designations, get_label='title', allow_blank=True, blank_text='Select Designation', validators=[DataRequired()])
-    reports_to = QuerySelectField('Reports To', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name}", allow_blank=True, blank_text='Select Manager')
+    department = CachedSelectField('Department', entity='departments', model=Department, allow_blank=True, blank_text='Select Department')
+    designation = CachedSelectField('Designation', entity='designations', model=Designation, allow_blank=True, blank_text='Select Designation', validators=[DataRequired()])
+    reports_to = CachedSelectField('Reports To', entity='employees', model=EmployeeProfile, allow_blank=True, blank_text='Select Manager')
     previous_employer = StringField('Previous Employer')
     years_of_experience = StringField('Years of Experience')
     employment_type = SelectField('Employment Type', choices=[('Full-time', 'Full-time'), ('Probation', 'Probation'), ('Training', 'Training')], default='Full-time')
@@ -241,9 +280,9 @@ class AdminEditEmployeeForm(FlaskForm):
     branch = StringField('Branch', validators=[DataRequired()])
     
     # Job Information
-    department = QuerySelectField('Department', query_factory=get_departments, get_label='name', allow_blank=True, blank_text='Select Department')
-    designation = QuerySelectField('Designation', query_factory=get_designations, get_label='title', allow_blank=True, blank_text='Select Designation', validators=[DataRequired()])
-    reports_to = QuerySelectField('Reports To', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name}", allow_blank=True, blank_text='Select Manager')
+    department = CachedSelectField('Department', entity='departments', model=Department, allow_blank=True, blank_text='Select Department')
+    designation = CachedSelectField('Designation', entity='designations', model=Designation, allow_blank=True, blank_text='Select Designation', validators=[DataRequired()])
+    reports_to = CachedSelectField('Reports To', entity='employees', model=EmployeeProfile, allow_blank=True, blank_text='Select Manager')
     previous_employer = StringField('Previous Employer')
     years_of_experience = StringField('Years of Experience')
     employment_type = SelectField('Employment Type', choices=[('Full-time', 'Full-time'), ('Probation', 'Probation'), ('Training', 'Training')], default='Full-time')
@@ -271,7 +310,7 @@ class AdminEditEmployeeForm(FlaskForm):
             raise ValidationError('That email is already taken.')
 
 class SalaryStructureForm(FlaskForm):
-    employee = QuerySelectField('Employee', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name}")
+    employee = CachedSelectField('Employee', entity='employees', model=EmployeeProfile)
     monthly_ctc = FloatField('Monthly CTC (Fixed)', validators=[DataRequired()])
     
     basic = FloatField('Basic Salary', default=0.0)
@@ -287,7 +326,7 @@ class SalaryStructureForm(FlaskForm):
     submit = SubmitField('Update Structure')
 
 class PayrollForm(FlaskForm):
-    employee = QuerySelectField('Employee', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name}")
+    employee = CachedSelectField('Employee', entity='employees', model=EmployeeProfile)
     pay_period_start = DateField('Start Date', format='%Y-%m-%d', validators=[DataRequired()])
     pay_period_end = DateField('End Date', format='%Y-%m-%d', validators=[DataRequired()])
     
@@ -324,8 +363,8 @@ class PayrollForm(FlaskForm):
         pass
 
 class AdminChangeUserRoleForm(FlaskForm):
-    user_id = QuerySelectField('Employee', query_factory=get_all_users, get_label=lambda u: f"{u.employeeid} ({u.email})")
-    role = QuerySelectField('New Role', query_factory=get_roles, get_label='name', validators=[DataRequired()])
+    user_id = CachedSelectField('Employee', entity='users', model=User)
+    role = CachedSelectField('New Role', entity='roles', model=Role, validators=[DataRequired()])
     submit = SubmitField('Change Role')
 
 class VendorForm(FlaskForm):
@@ -351,12 +390,6 @@ class VendorForm(FlaskForm):
     
     submit = SubmitField('Save Vendor')
 
-def get_vendors():
-    try:
-        return Vendor.query.all()
-    except:
-        return []
-
 class AssetForm(FlaskForm):
     name = StringField('Asset Name', validators=[DataRequired()])
     brand = StringField('Brand')
@@ -371,8 +404,8 @@ class AssetForm(FlaskForm):
     purchase_cost = FloatField('Purchase Cost', validators=[Optional()])
     warranty_expiry = DateField('Warranty Expiry', format='%Y-%m-%d', validators=[Optional()])
     
-    vendor = QuerySelectField('Vendor / Owner', query_factory=get_vendors, get_label='name', allow_blank=True, blank_text='-- Internal (Gentize) --')
-    assigned_to = QuerySelectField('Assigned To', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name} ({e.user.employeeid})", allow_blank=True, blank_text='-- Available --')
+    vendor = CachedSelectField('Vendor / Owner', entity='vendors', model=Vendor, allow_blank=True, blank_text='-- Internal (Gentize) --')
+    assigned_to = CachedSelectField('Assigned To', entity='employees_with_id', model=EmployeeProfile, allow_blank=True, blank_text='-- Available --')
     submit = SubmitField('Save Asset')
 
     def validate_serial_number(self, serial_number):
@@ -402,7 +435,7 @@ class InvoiceForm(FlaskForm):
     invoice_number = StringField('Invoice Number', validators=[DataRequired()])
     date = DateField('Invoice Date', format='%Y-%m-%d', validators=[DataRequired()])
     due_date = DateField('Due Date', format='%Y-%m-%d', validators=[Optional()])
-    vendor = QuerySelectField('Vendor', query_factory=get_vendors, get_label='name', allow_blank=False)
+    vendor = CachedSelectField('Vendor', entity='vendors', model=Vendor, allow_blank=False)
     amount = FloatField('Amount', validators=[DataRequired()])
     status = SelectField('Status', choices=[('Unpaid', 'Unpaid'), ('Paid', 'Paid'), ('Overdue', 'Overdue'), ('Cancelled', 'Cancelled')], default='Unpaid')
     description = StringField('Description', widget=widgets.TextArea())
@@ -415,12 +448,6 @@ class BillEstimationForm(FlaskForm):
     total_amount = FloatField('Total Amount')
     submit = SubmitField('Generate Estimate')
 
-def get_signatures():
-    try:
-        return AuthorizedSignature.query.all()
-    except:
-        return []
-
 class AuthorizedSignatureForm(FlaskForm):
     name = StringField('Name of Signatory', validators=[DataRequired()])
     designation = StringField('Designation', validators=[DataRequired()])
@@ -430,7 +457,7 @@ class AuthorizedSignatureForm(FlaskForm):
 class PurchaseOrderForm(FlaskForm):
     po_number = StringField('PO Number', validators=[DataRequired()])
     date = DateField('Date', format='%Y-%m-%d', validators=[DataRequired()])
-    vendor = QuerySelectField('Vendor', query_factory=get_vendors, get_label='name', allow_blank=False)
+    vendor = CachedSelectField('Vendor', entity='vendors', model=Vendor, allow_blank=False)
     
     # Items can be handled dynamically in frontend, passing JSON or just a simple text area for now
     items_json = StringField('Items JSON', widget=widgets.HiddenInput()) 
@@ -438,12 +465,12 @@ class PurchaseOrderForm(FlaskForm):
     tax_percentage = FloatField('Tax (%)', default=0.0, validators=[Optional()])
     total_amount = FloatField('Total Amount', validators=[DataRequired()])
     status = SelectField('Status', choices=[('Draft', 'Draft'), ('Sent', 'Sent'), ('Approved', 'Approved'), ('Paid', 'Paid'), ('Completed', 'Completed'), ('Cancelled', 'Cancelled')], default='Draft')
-    authorized_signature = QuerySelectField('Authorized Signature', query_factory=get_signatures, get_label='name', allow_blank=True)
+    authorized_signature = CachedSelectField('Authorized Signature', entity='signatures', model=AuthorizedSignature, allow_blank=True)
     notes = StringField('Notes', widget=widgets.TextArea())
     submit = SubmitField('Save Purchase Order')
 
 class ShiftForm(FlaskForm):
-    employee = QuerySelectField('Employee', query_factory=get_employees, get_label=lambda e: f"{e.first_name} {e.last_name} ({e.user.employeeid})", allow_blank=False)
+    employee = CachedSelectField('Employee', entity='employees_with_id', model=EmployeeProfile, allow_blank=False)
     date = DateField('From Date', format='%Y-%m-%d', validators=[DataRequired()])
     end_date = DateField('To Date (Optional)', format='%Y-%m-%d', validators=[Optional()])
     shift_type = SelectField('Shift Type', choices=[
@@ -456,6 +483,6 @@ class ShiftForm(FlaskForm):
 class LetterHeadForm(FlaskForm):
     date = DateField('Date', validators=[DataRequired()], default=date.today)
     content = TextAreaField('Content', validators=[DataRequired()])
-    authorized_signature = QuerySelectField('Signature', query_factory=get_signatures, get_label='name', allow_blank=False, validators=[DataRequired()])
+    authorized_signature = CachedSelectField('Signature', entity='signatures', model=AuthorizedSignature, allow_blank=False, validators=[DataRequired()])
     submit = SubmitField('Generate Letter Head')
 
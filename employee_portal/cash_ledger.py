@@ -0,0 +1,200 @@
+from collections import defaultdict
+from datetime import date
+from sqlalchemy import event, inspect
+from employee_portal import db
+from employee_portal.models import Credit, Debit, CashDailyTotal
+
+AMOUNTS = ('credits', 'debits', 'credit_count', 'debit_count')
+
+# Rollup and source totals closer than this (half a paisa) are equal
+TOLERANCE = 0.005
+
+
+def _committed(obj, attr):
+    """An attribute's value as of the last flush (before pending edits)."""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attr)
+
+
+def _add(deltas, obj, day, category, amount, sign):
+    if amount is None:
+        return
+    delta = deltas[(day or date.today(), category or '')]
+    if isinstance(obj, Credit):
+        delta[0] += sign * amount
+        delta[2] += sign
+    else:
+        delta[1] += sign * amount
+        delta[3] += sign
+
+
+def pending_deltas(session):
+    """Rollup changes implied by the Credit/Debit inserts, edits and deletes about to be flushed."""
+    deltas = defaultdict(lambda: [0.0, 0.0, 0, 0])
+    for obj in session.new:
+        if isinstance(obj, (Credit, Debit)):
+            _add(deltas, obj, obj.date, obj.category, obj.amount, 1)
+    for obj in session.deleted:
+        if isinstance(obj, (Credit, Debit)):
+            _add(deltas, obj, _committed(obj, 'date'), _committed(obj, 'category'), _committed(obj, 'amount'), -1)
+    for obj in session.dirty:
+        if isinstance(obj, (Credit, Debit)) and session.is_modified(obj):
+            old = (_committed(obj, 'date'), _committed(obj, 'category'), _committed(obj, 'amount'))
+            new = (obj.date, obj.category, obj.amount)
+            if old != new:
+                _add(deltas, obj, *old, -1)
+                _add(deltas, obj, *new, 1)
+    return {key: delta for key, delta in deltas.items() if any(delta)}
+
+
+def apply_deltas(connection, deltas):
+    """Add deltas to the rollup rows with one upsert, dropping rows left with no transactions."""
+    if not deltas:
+        return
+    table = CashDailyTotal.__table__
+    rows = [dict(zip(('day', 'category') + AMOUNTS, key + tuple(delta))) for key, delta in deltas.items()]
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', 'category'],
+            set_={name: table.c[name] + stmt.excluded[name] for name in AMOUNTS},
+        )
+        connection.execute(stmt, rows)
+    else:
+        for row in rows:
+            updated = connection.execute(
+                table.update()
+                .where(table.c.day == row['day'], table.c.category == row['category'])
+                .values({name: table.c[name] + row[name] for name in AMOUNTS})
+            ).rowcount
+            if not updated:
+                connection.execute(table.insert().values(row))
+
+    emptied = [key for key, delta in deltas.items() if delta[2] < 0 or delta[3] < 0]
+    for day, category in emptied:
+        connection.execute(table.delete().where(
+            table.c.day == day, table.c.category == category,
+            table.c.credit_count <= 0, table.c.debit_count <= 0,
+        ))
+
+
+def _before_flush(session, flush_context, instances):
+    apply_deltas(session.connection(), pending_deltas(session))
+
+
+def init_app(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+
+
+def totals(as_of=None, start=None):
+    """Credits, debits and net for days in [start, as_of], read from the rollup."""
+    query = db.session.query(
+        db.func.coalesce(db.func.sum(CashDailyTotal.credits), 0.0),
+        db.func.coalesce(db.func.sum(CashDailyTotal.debits), 0.0),
+    )
+    if as_of:
+        query = query.filter(CashDailyTotal.day <= as_of)
+    if start:
+        query = query.filter(CashDailyTotal.day >= start)
+    credits, debits = query.one()
+    return {'credits': round(credits, 2), 'debits': round(debits, 2), 'balance': round(credits - debits, 2)}
+
+
+def category_totals(as_of=None, start=None):
+    """Per-category credits and debits for days in [start, as_of], largest movement first."""
+    query = db.session.query(
+        CashDailyTotal.category,
+        db.func.sum(CashDailyTotal.credits),
+        db.func.sum(CashDailyTotal.debits),
+    ).group_by(CashDailyTotal.category)
+    if as_of:
+        query = query.filter(CashDailyTotal.day <= as_of)
+    if start:
+        query = query.filter(CashDailyTotal.day >= start)
+    rows = [{'category': category or 'Uncategorized', 'credits': round(credits, 2), 'debits': round(debits, 2)}
+            for category, credits, debits in query.all()]
+    return sorted(rows, key=lambda r: r['credits'] + r['debits'], reverse=True)
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def monthly_trend(months=12, as_of=None):
+    """Inflow, outflow and closing balance for each of the last ``months`` calendar months."""
+    as_of = as_of or date.today()
+    first = _add_months(as_of.replace(day=1), -(months - 1))
+    opening = db.session.query(
+        db.func.coalesce(db.func.sum(CashDailyTotal.credits - CashDailyTotal.debits), 0.0)
+    ).filter(CashDailyTotal.day < first).scalar()
+
+    year = db.extract('year', CashDailyTotal.day)
+    month = db.extract('month', CashDailyTotal.day)
+    rows = db.session.query(
+        year, month, db.func.sum(CashDailyTotal.credits), db.func.sum(CashDailyTotal.debits)
+    ).filter(CashDailyTotal.day >= first, CashDailyTotal.day <= as_of).group_by(year, month).all()
+    by_month = {(int(y), int(m)): (credits, debits) for y, m, credits, debits in rows}
+
+    trend, balance = [], opening
+    for i in range(months):
+        start = _add_months(first, i)
+        credits, debits = by_month.get((start.year, start.month), (0.0, 0.0))
+        balance += credits - debits
+        trend.append({
+            'month': start, 'credits': round(credits, 2), 'debits': round(debits, 2),
+            'net': round(credits - debits, 2), 'closing': round(balance, 2),
+        })
+    return trend
+
+
+def _source_totals():
+    """(day, category) -> [credits, debits, credit_count, debit_count] aggregated from the transactions."""
+    expected = defaultdict(lambda: [0.0, 0.0, 0, 0])
+    for model, amount_slot, count_slot in ((Credit, 0, 2), (Debit, 1, 3)):
+        rows = db.session.query(
+            model.date, model.category, db.func.sum(model.amount), db.func.count(model.id)
+        ).group_by(model.date, model.category).all()
+        for day, category, amount, count in rows:
+            key = (day, category or '')
+            expected[key][amount_slot] += amount or 0.0
+            expected[key][count_slot] += count
+    return expected
+
+
+def rebuild():
+    """Recompute the whole rollup from Credit and Debit. The caller commits. Returns the rows written."""
+    expected = _source_totals()
+    db.session.query(CashDailyTotal).delete()
+    if expected:
+        db.session.execute(CashDailyTotal.__table__.insert(), [
+            dict(zip(('day', 'category') + AMOUNTS, key + tuple(values))) for key, values in expected.items()
+        ])
+    return len(expected)
+
+
+def verify():
+    """Rollup rows that disagree with the transactions: a list of (day, category, expected, stored)."""
+    expected = _source_totals()
+    stored = {
+        (row.day, row.category): [row.credits, row.debits, row.credit_count, row.debit_count]
+        for row in CashDailyTotal.query.all()
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1])):
+        want = expected.get(key, [0.0, 0.0, 0, 0])
+        have = stored.get(key, [0.0, 0.0, 0, 0])
+        if (abs(want[0] - have[0]) > TOLERANCE or abs(want[1] - have[1]) > TOLERANCE
+                or want[2] != have[2] or want[3] != have[3]):
+            mismatches.append((key[0], key[1], want, have))
+    return mismatches
@@ -0,0 +1,206 @@
+import click
+from flask.cli import AppGroup
+
+leave_cli = AppGroup('leave', help='Leave calendar and ledger maintenance.')
+payroll_cli = AppGroup('payroll', help='Payroll rules and projections.')
+approvals_cli = AppGroup('approvals', help='Approvals inbox maintenance.')
+images_cli = AppGroup('images', help='Profile picture storage maintenance.')
+documents_cli = AppGroup('documents', help='Uploaded document store maintenance.')
+faces_cli = AppGroup('faces', help='Face verification index maintenance.')
+ledger_cli = AppGroup('ledger', help='Cash ledger rollup maintenance.')
+audit_cli = AppGroup('audit', help='Audit log maintenance.')
+
+
+@leave_cli.command('rebuild-calendar')
+def rebuild_leave_calendar():
+    """Regenerate the per-day leave table from all Leave rows."""
+    from employee_portal.leave_calendar import rebuild
+    total = rebuild()
+    click.echo(f'Rebuilt leave calendar: {total} leave days.')
+
+
+@leave_cli.command('check-calendar')
+def check_leave_calendar():
+    """Report leave days that are missing from or stale in the calendar."""
+    from employee_portal.leave_calendar import check_consistency
+    missing, extra = check_consistency()
+    for row in missing[:20]:
+        click.echo(f'missing: leave={row[0]} employee={row[1]} date={row[2]} {row[3]} {row[4]}')
+    for row in extra[:20]:
+        click.echo(f'extra:   leave={row[0]} employee={row[1]} date={row[2]} {row[3]} {row[4]}')
+    if missing or extra:
+        raise click.ClickException(f'Leave calendar is inconsistent: {len(missing)} missing, {len(extra)} extra.')
+    click.echo('Leave calendar is consistent.')
+
+
+@leave_cli.command('carry-forward')
+@click.argument('year', type=int)
+def carry_forward_leave(year):
+    """Carry unused leave balances of YEAR into the following year."""
+    from employee_portal.leave_ledger import carry_forward
+    carried = carry_forward(year)
+    click.echo(f'Carried forward {carried} leave balances from {year} to {year + 1}.')
+
+
+@payroll_cli.command('what-if')
+@click.option('--hike', type=float, required=True, help='Percentage raise to apply.')
+@click.option('--department', help='Limit the raise to one department (by name).')
+def payroll_what_if(hike, department):
+    """Project org-wide gross, deductions and net pay after a hike. Nothing is saved."""
+    from employee_portal.models import Department
+    from employee_portal.payroll_rules import what_if
+    department_id = None
+    if department:
+        dept = Department.query.filter_by(name=department).first()
+        if not dept:
+            raise click.ClickException(f'Unknown department: {department}')
+        department_id = dept.id
+    summary = what_if(hike, department_id=department_id)
+    click.echo(f"{'':<18}{'before':>16}{'after':>16}{'change':>14}")
+    for name, row in summary.iterrows():
+        click.echo(f"{name:<18}{row['before']:>16,.2f}{row['after']:>16,.2f}{row['change']:>14,.2f}")
+
+
+@approvals_cli.command('rebuild')
+def rebuild_approvals():
+    """Regenerate the approvals inbox from leaves, expense claims and appraisals."""
+    from employee_portal.approvals import rebuild
+    total = rebuild()
+    click.echo(f'Rebuilt approvals inbox: {total} items.')
+
+
+@images_cli.command('gc')
+@click.option('--grace', type=int, default=3600, show_default=True, help='Keep images uploaded within this many seconds.')
+@click.option('--dry-run', is_flag=True, help='List unreferenced images without deleting them.')
+def images_gc(grace, dry_run):
+    """Delete stored pictures no employee profile references any more."""
+    from employee_portal.images import collect_garbage
+    removed = collect_garbage(grace_seconds=grace, dry_run=dry_run)
+    for key in removed[:20]:
+        click.echo(key)
+    click.echo(f"{'Would remove' if dry_run else 'Removed'} {len(removed)} unreferenced images.")
+
+
+@images_cli.command('regenerate')
+def images_regenerate():
+    """Rebuild size variants for every stored profile picture."""
+    from employee_portal import db
+    from employee_portal.models import EmployeeProfile
+    from employee_portal.images import is_stored, generate_variants
+    keys = [name for name, in db.session.query(EmployeeProfile.image_file).distinct().all() if is_stored(name)]
+    for key in keys:
+        generate_variants(key)
+    click.echo(f'Regenerated variants for {len(keys)} images.')
+
+
+@documents_cli.command('sweep')
+@click.option('--grace', type=int, default=3600, show_default=True, help='Keep files written within this many seconds.')
+@click.option('--dry-run', is_flag=True, help='List orphaned files without deleting them.')
+def documents_sweep(grace, dry_run):
+    """Delete stored documents no document, claim, invoice or debit references."""
+    from employee_portal.documents import sweep
+    removed = sweep(grace_seconds=grace, dry_run=dry_run)
+    for name in removed[:20]:
+        click.echo(name)
+    click.echo(f"{'Would remove' if dry_run else 'Removed'} {len(removed)} orphaned files.")
+
+
+@documents_cli.command('import-legacy')
+def documents_import_legacy():
+    """Move files still served from static/documents into the store."""
+    from employee_portal.documents import import_legacy
+    updated, moved = import_legacy()
+    click.echo(f'Moved {moved} files into the store and updated {updated} rows.')
+
+
+@faces_cli.command('rebuild')
+def faces_rebuild():
+    """Re-index every active employee's enrollment photo from scratch."""
+    from employee_portal.faces import rebuild
+    indexed, missing = rebuild()
+    click.echo(f'Indexed {indexed} enrolled faces' + (f'; {missing} enrollment photos are missing.' if missing else '.'))
+
+
+@faces_cli.command('stats')
+def faces_stats():
+    """Show how many faces the index holds and whether kiosk identification is on."""
+    from employee_portal.faces import accuracy, identification_allowed, index
+    face_index = index()
+    click.echo(f'{len(face_index)} enrolled faces in {face_index.directory}')
+    measured = accuracy()
+    if measured and measured['far'] is not None:
+        click.echo(f"Measured {measured['measured_at']} at {measured['threshold']}: false-accept rate "
+                   f"{measured['far']:.2%} over {measured['non_matching']} non-matching pairs")
+    click.echo(f"Kiosk identification is {'on' if identification_allowed() else 'off'}.")
+
+
+@faces_cli.command('evaluate')
+@click.argument('pairs_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, help='Report the rates without recording them.')
+def faces_evaluate(pairs_file, dry_run):
+    """Measure false accepts and rejects on labelled photo pairs and record the result.
+
+    PAIRS_FILE is a CSV of photo_a,photo_b,same rows (same is 1 for two photos
+    of one person, 0 for two people), paths relative to the file. Kiosk
+    identification turns on once a recorded false-accept rate is low enough.
+    """
+    import csv
+    import os
+    from employee_portal import faces
+    base = os.path.dirname(os.path.abspath(pairs_file))
+    with open(pairs_file, newline='') as f:
+        pairs = [(os.path.join(base, row['photo_a']), os.path.join(base, row['photo_b']), row['same'].strip() == '1')
+                 for row in csv.DictReader(f)]
+    result = faces.evaluate(pairs, faces.embedder(), faces.threshold())
+    far = 'n/a' if result['far'] is None else f"{result['far']:.2%}"
+    frr = 'n/a' if result['frr'] is None else f"{result['frr']:.2%}"
+    click.echo(f"{result['embedder']} at {result['threshold']}: "
+               f"{result['false_accepts']}/{result['non_matching']} false accepts ({far}), "
+               f"{result['false_rejects']}/{result['matching']} false rejects ({frr})")
+    if dry_run:
+        return
+    faces.record_accuracy(result)
+    if faces.identification_allowed():
+        click.echo('Recorded; kiosk identification is on.')
+    else:
+        click.echo(f'Recorded; kiosk identification stays off (needs a false-accept rate of at most '
+                   f'{faces.max_false_accept():g} over at least {3 / faces.max_false_accept():.0f} non-matching pairs).')
+
+
+@audit_cli.command('prune')
+@click.option('--days', type=int, default=None, help='Keep this many days (default: AUDIT_LOG_RETENTION_DAYS).')
+def audit_prune(days):
+    """Delete audit log entries past the retention period; run it daily (deployment/startup.sh runs it at boot)."""
+    from flask import current_app
+    from employee_portal.utils.helpers import prune_audit_logs
+    days = days if days is not None else current_app.config['AUDIT_LOG_RETENTION_DAYS']
+    click.echo(f'Removed {prune_audit_logs(days)} audit log entries older than {days} days.')
+
+
+@ledger_cli.command('rebuild')
+@click.option('--verify-only', is_flag=True, help='Only report rollup rows that disagree with the transactions.')
+def ledger_rebuild(verify_only):
+    """Recompute the daily cash rollup from credits and debits, then verify it."""
+    from employee_portal import db
+    from employee_portal.cash_ledger import rebuild, verify
+    if not verify_only:
+        rows = rebuild()
+        db.session.commit()
+        click.echo(f'Rebuilt cash rollup: {rows} day/category rows.')
+    mismatches = verify()
+    for day, category, expected, stored in mismatches[:20]:
+        click.echo(f'{day} {category or "(none)"}: expected {expected}, stored {stored}')
+    if mismatches:
+        raise click.ClickException(f'{len(mismatches)} rollup rows disagree with the transactions.')
+    click.echo('Cash rollup matches the transactions.')
+
+
+def register_commands(app):
+    app.cli.add_command(leave_cli)
+    app.cli.add_command(payroll_cli)
+    app.cli.add_command(approvals_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(documents_cli)
+    app.cli.add_command(faces_cli)
+    app.cli.add_command(ledger_cli)
+    app.cli.add_command(audit_cli)
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from flask import current_app
+from werkzeug.utils import secure_filename
+from employee_portal import db, downloads
+from employee_portal.models import EmployeeDocument, ExpenseClaim, Invoice, Debit, EmployeeProfile, Attendance
+
+CHUNK_SIZE = 64 * 1024
+
+# Blobs written or re-uploaded this recently are left to the sweeper
+RELEASE_GRACE = 60
+
+# Every column that may hold a document key, with the owning employee column where there is one
+REFERENCES = [
+    (EmployeeDocument.file_path, EmployeeDocument.employee_id),
+    (ExpenseClaim.receipt_file, ExpenseClaim.employee_id),
+    (Invoice.file_path, None),
+    (Debit.bill_file, None),
+    (EmployeeProfile.biometric_image, EmployeeProfile.id),
+    (Attendance.verification_image, Attendance.employee_id),
+]
+
+_KEY = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]{1,8})?$')
+
+
+def store_root():
+    """Blob store directory: DOCUMENT_STORE_PATH, or documents/ under the instance folder."""
+    return current_app.config.get('DOCUMENT_STORE_PATH') or os.path.join(current_app.instance_path, 'documents')
+
+
+def legacy_root():
+    return os.path.join(current_app.root_path, 'static', 'documents')
+
+
+def is_stored(name):
+    """Stored keys are a SHA-256 hex digest plus the original extension."""
+    return bool(name) and bool(_KEY.match(name))
+
+
+def digest_of(name):
+    return name.split('.', 1)[0]
+
+
+def path_for(name):
+    """Absolute path of a document, for stored keys and legacy static/documents names alike."""
+    if is_stored(name):
+        return os.path.join(store_root(), name[:2], name[2:4], name)
+    return os.path.join(legacy_root(), os.path.basename(name))
+
+
+def _extension(filename):
+    _, ext = os.path.splitext(secure_filename(filename or ''))
+    ext = ext.lower()
+    return ext if re.match(r'^\.[a-z0-9]{1,8}$', ext) else ''
+
+
+def _commit_blob(tmp_path, digest, ext):
+    key = digest + ext
+    final = path_for(key)
+    if os.path.exists(final):
+        # Identical content is already stored; touch it so a concurrent release() keeps it
+        os.remove(tmp_path)
+        os.utime(final)
+    else:
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(tmp_path, final)
+    return key
+
+
+def _temp_file():
+    tmp_dir = os.path.join(store_root(), 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    return tempfile.mkstemp(dir=tmp_dir)
+
+
+def save(upload):
+    """Stream an uploaded file into the store, hashing as it is written.
+
+    The upload is never held in memory as a whole. Identical uploads map to
+    the same key and are stored once. Returns the key to keep in the model.
+    """
+    hasher = hashlib.sha256()
+    fd, tmp_path = _temp_file()
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            stream = getattr(upload, 'stream', upload)
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return _commit_blob(tmp_path, hasher.hexdigest(), _extension(upload.filename))
+
+
+def import_file(path):
+    """Move a file already on disk (e.g. a generated PDF) into the store and return its key."""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    fd, tmp_path = _temp_file()
+    os.close(fd)
+    shutil.move(path, tmp_path)
+    return _commit_blob(tmp_path, hasher.hexdigest(), _extension(path))
+
+
+def reference_counts(names=None):
+    """How many rows reference each document name, across all referencing tables in one query."""
+    selects = []
+    for column, _ in REFERENCES:
+        query = db.select(column.label('name')).where(column.isnot(None))
+        if names is not None:
+            query = query.where(column.in_(list(names)))
+        selects.append(query)
+    rows = db.session.execute(db.union_all(*selects)).scalars().all()
+    return Counter(rows)
+
+
+def release(*names):
+    """Delete documents that are no longer referenced.
+
+    Call after the commit that removed or replaced the referencing rows.
+    Returns the number of files removed.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return 0
+    counts = reference_counts(names)
+    removed = 0
+    for name in names:
+        if counts[name]:
+            continue
+        path = path_for(name)
+        if os.path.isfile(path) and os.path.getmtime(path) < time.time() - RELEASE_GRACE:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def owner_ids(name):
+    """Employee profile ids that own a document (empty for company documents)."""
+    owners = set()
+    for column, owner in REFERENCES:
+        if owner is not None:
+            owners.update(owner_id for owner_id, in db.session.query(owner).filter(column == name).all())
+    return owners
+
+
+def send(name, download_name=None, as_attachment=False):
+    """Serve a document with ETag, If-None-Match and Range support.
+
+    Stored documents are immutable, so their digest is a strong ETag and they
+    may be cached indefinitely. Behind nginx the transfer is handed off via
+    downloads.send. Returns None when the file does not exist.
+    """
+    path = path_for(name)
+    if not os.path.isfile(path):
+        return None
+    if not is_stored(name):
+        return downloads.send(path, download_name=download_name or name, as_attachment=as_attachment)
+    return downloads.send(path, download_name=download_name or name, as_attachment=as_attachment,
+                          etag=digest_of(name), max_age=31536000)
+
+
+def sweep(grace_seconds=3600, dry_run=False):
+    """Remove stored blobs that no row references, and stale temporary files.
+
+    Files younger than ``grace_seconds`` are kept so an upload whose row has
+    not been committed yet is not swept. Returns the removed keys.
+    """
+    root = store_root()
+    if not os.path.isdir(root):
+        return []
+    referenced = set(reference_counts())
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for dirpath, _, files in os.walk(root):
+        in_tmp = os.path.relpath(dirpath, root).split(os.sep)[0] == 'tmp'
+        for name in files:
+            path = os.path.join(dirpath, name)
+            if not in_tmp and (not is_stored(name) or name in referenced):
+                continue
+            if os.path.getmtime(path) > cutoff:
+                continue
+            removed.append(name)
+            if not dry_run:
+                os.remove(path)
+    return removed
+
+
+def import_legacy():
+    """Move files referenced from static/documents into the store and repoint their rows.
+
+    Duplicate files collapse into one blob. Returns (rows updated, files moved).
+    """
+    moved = {}
+    updated = 0
+    for column, _ in REFERENCES:
+        model = column.class_
+        names = [name for name, in db.session.query(column).filter(column.isnot(None)).distinct().all() if not is_stored(name)]
+        for name in names:
+            if name not in moved:
+                path = path_for(name)
+                if not os.path.isfile(path):
+                    continue
+                moved[name] = import_file(path)
+            updated += model.query.filter(column == name).update({column: moved[name]}, synchronize_session=False)
+        db.session.commit()
+    return updated, len(moved)
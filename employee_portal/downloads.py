@@ -0,0 +1,106 @@
+import mimetypes
+import os
+import time
+import unicodedata
+from urllib.parse import quote
+from flask import current_app, request, send_file
+from werkzeug.exceptions import NotFound
+
+
+def generated_dir():
+    """Folder the PDF generators in employee_portal.pdf write to (the project's instance/)."""
+    return os.path.abspath(os.path.join(current_app.root_path, '..', 'instance'))
+
+
+def exports_dir(max_age=86400):
+    """Folder for one-off exports such as full backups, clearing files older than ``max_age`` seconds.
+
+    Exports can't be deleted right after the response when nginx streams
+    them, so old ones are removed the next time the folder is used.
+    """
+    path = os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(path, exist_ok=True)
+    cutoff = time.time() - max_age
+    for name in os.listdir(path):
+        file_path = os.path.join(path, name)
+        if os.path.isfile(file_path) and os.path.getmtime(file_path) < cutoff:
+            os.remove(file_path)
+    return path
+
+
+def _accel_mapping():
+    """(directory, internal URI) pairs announced by nginx, or [] when not behind it.
+
+    nginx sets ``X-Sendfile-Type: X-Accel-Redirect`` and
+    ``X-Accel-Mapping: /dir/=/_internal/,...`` on proxied requests (see
+    deployment/nginx.conf); without them downloads are sent by Flask.
+    """
+    if request.headers.get('X-Sendfile-Type') != 'X-Accel-Redirect':
+        return []
+    mapping = []
+    for pair in request.headers.get('X-Accel-Mapping', '').split(','):
+        directory, sep, uri = pair.strip().partition('=')
+        if sep and directory and uri:
+            mapping.append((os.path.realpath(directory), uri.rstrip('/') + '/'))
+    return mapping
+
+
+def accel_uri(path):
+    """Internal nginx URI for a file, or None when no announced location covers it."""
+    path = os.path.realpath(path)
+    for directory, uri in _accel_mapping():
+        if path.startswith(directory + os.sep):
+            return uri + quote(os.path.relpath(path, directory).replace(os.sep, '/'))
+    return None
+
+
+def _content_disposition(response, download_name, as_attachment):
+    # Same encoding as flask.send_file, for names outside ASCII
+    try:
+        download_name.encode('ascii')
+        names = {'filename': download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"}
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline', **names)
+
+
+def send(path, download_name=None, as_attachment=True, mimetype=None, etag=True, max_age=None):
+    """Send a file the caller has already authorized.
+
+    Behind nginx the response only carries headers and an X-Accel-Redirect
+    to the internal location, so the worker is released at once and nginx
+    handles the transfer (including Range and conditional requests).
+    Otherwise it falls back to ``send_file``. Raises NotFound for missing files.
+    """
+    if not os.path.isfile(path):
+        raise NotFound()
+    download_name = download_name or os.path.basename(path)
+    mimetype = mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    uri = accel_uri(path)
+    if uri is None:
+        response = send_file(path, mimetype=mimetype, as_attachment=as_attachment, download_name=download_name,
+                             conditional=True, etag=etag, max_age=max_age)
+    else:
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = uri
+        _content_disposition(response, download_name, as_attachment)
+        if isinstance(etag, str):
+            response.set_etag(etag)
+        if max_age:
+            response.cache_control.max_age = max_age
+    # Everything sent here is behind a permission check, so shared caches must not keep it
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+
+def send_data(data, download_name, as_attachment=True, mimetype=None):
+    """Send a document built in memory (e.g. a rendered report); nothing is written to disk."""
+    mimetype = mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+    response = current_app.response_class(data, mimetype=mimetype)
+    _content_disposition(response, download_name, as_attachment)
+    response.cache_control.no_store = True
+    response.cache_control.private = True
+    return response
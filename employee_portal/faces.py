@@ -0,0 +1,463 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+from PIL import Image, ImageOps
+from flask import current_app
+
+# HOG descriptor: orientation histograms over a 4x4 grid of a 64x64 crop
+FACE_SIZE = 64
+CELLS = 4
+BINS = 8
+DIM = CELLS * CELLS * BINS
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_EMBEDDER = 'dlib'
+
+# 1:N identification stays off until a measured false-accept rate is at most this
+DEFAULT_MAX_FALSE_ACCEPT = 0.001
+
+# Captures are shrunk to this many pixels on the long side before face detection
+MAX_SIDE = 800
+
+_INITIAL_CAPACITY = 1024
+
+
+class NoFaceError(ValueError):
+    """The photo has no face the embedder can find."""
+
+
+def _open(source):
+    image = source if isinstance(source, Image.Image) else Image.open(getattr(source, 'stream', source))
+    return ImageOps.exif_transpose(image)
+
+
+class HogEmbedder:
+    """Gradient-orientation histograms of the centre-cropped photo.
+
+    There is no face detection or alignment: the whole frame is described,
+    background included, so two people in front of the same wall can score
+    as alike as one person photographed twice. Kept for installs without
+    dlib; like any embedder it only identifies employees on its own once
+    ``flask faces evaluate`` has measured it.
+    """
+
+    name = 'hog'
+    dim = DIM
+    threshold = DEFAULT_THRESHOLD
+
+    def embed(self, source):
+        """Unit-length float32 descriptor of a photo (path, file object or PIL image)."""
+        image = _open(source).convert('L')
+        image = ImageOps.equalize(ImageOps.fit(image, (FACE_SIZE, FACE_SIZE), Image.BILINEAR))
+        pixels = np.asarray(image, dtype=np.float32)
+
+        gx = np.zeros_like(pixels)
+        gy = np.zeros_like(pixels)
+        gx[:, 1:-1] = pixels[:, 2:] - pixels[:, :-2]
+        gy[1:-1, :] = pixels[2:, :] - pixels[:-2, :]
+        magnitude = np.hypot(gx, gy)
+        orientation = np.floor(np.mod(np.arctan2(gy, gx), np.pi) / np.pi * BINS).astype(np.intp) % BINS
+
+        cell = FACE_SIZE // CELLS
+        cell_index = (np.arange(FACE_SIZE) // cell)[:, None] * CELLS + (np.arange(FACE_SIZE) // cell)[None, :]
+        histogram = np.bincount((cell_index * BINS + orientation).ravel(), weights=magnitude.ravel(), minlength=DIM)
+        histogram = histogram.reshape(CELLS * CELLS, BINS)
+        histogram /= np.linalg.norm(histogram, axis=1, keepdims=True) + 1e-6
+        vector = histogram.ravel().astype(np.float32)
+        vector -= vector.mean()
+        return vector / (np.linalg.norm(vector) + 1e-6)
+
+
+class DlibEmbedder:
+    """dlib's face detector, 5-point alignment and ResNet face descriptor.
+
+    The largest face in the photo is aligned on its eyes and nose into a
+    150x150 chip and reduced to 128 numbers. dlib separates identities at a
+    Euclidean distance of 0.6, about 0.91 cosine once the vectors are unit
+    length; the default threshold is a little stricter. Needs ``dlib`` (the
+    dlib-bin wheels) and ``face_recognition_models`` for the model files.
+    """
+
+    name = 'dlib'
+    dim = 128
+    threshold = 0.92
+
+    def __init__(self, upsample=1):
+        import dlib
+        import face_recognition_models
+        self._dlib = dlib
+        self.upsample = upsample
+        self._detector = dlib.get_frontal_face_detector()
+        self._landmarks = dlib.shape_predictor(face_recognition_models.pose_predictor_five_point_model_location())
+        self._model = dlib.face_recognition_model_v1(face_recognition_models.face_recognition_model_location())
+        # The dlib objects are not documented as thread-safe
+        self._lock = threading.Lock()
+
+    def embed(self, source):
+        """Unit-length float32 descriptor of the largest face in a photo; NoFaceError if there is none."""
+        image = _open(source).convert('RGB')
+        if max(image.size) > MAX_SIDE:
+            image = ImageOps.contain(image, (MAX_SIDE, MAX_SIDE))
+        pixels = np.asarray(image)
+        with self._lock:
+            found = self._detector(pixels, self.upsample)
+            if not found:
+                raise NoFaceError('No face found in the photo')
+            face = max(found, key=lambda rect: rect.area())
+            chip = self._dlib.get_face_chip(pixels, self._landmarks(pixels, face), size=150)
+            vector = np.asarray(self._model.compute_face_descriptor(chip), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) + 1e-6)
+
+
+EMBEDDERS = {'hog': HogEmbedder, 'dlib': DlibEmbedder}
+
+
+def embedder():
+    """The FACE_EMBEDDER embedder, loaded once per process."""
+    name = current_app.config.get('FACE_EMBEDDER') or DEFAULT_EMBEDDER
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown FACE_EMBEDDER {name!r}; expected one of {', '.join(EMBEDDERS)}")
+    loaded = current_app.extensions.setdefault('face_embedders', {})
+    if name not in loaded:
+        loaded[name] = EMBEDDERS[name]()
+    return loaded[name]
+
+
+def embed(source):
+    """Descriptor of a photo from the configured embedder."""
+    return embedder().embed(source)
+
+
+class FaceIndex:
+    """Enrolled face descriptors in one contiguous, memory-mapped matrix.
+
+    ``embeddings.f32`` holds one row per slot and ``ids.i4`` the employee
+    profile id of each slot (0 marks a free slot). Both are mapped
+    read-only by every worker, so the OS page cache keeps a single copy
+    and in-place enroll/remove writes from any process are visible at once.
+    Writers hold an flock on ``lock``. When the files grow, readers notice
+    the size change and remap. Rows are unit length, so cosine similarity
+    against all of them is one matrix-vector product.
+    """
+
+    def __init__(self, directory, dim=DIM):
+        self.directory = directory
+        self.dim = dim
+        self._vectors_path = os.path.join(directory, 'embeddings.f32')
+        self._ids_path = os.path.join(directory, 'ids.i4')
+        self._capacity = -1
+        self._vectors = None
+        self._ids = None
+
+    def __len__(self):
+        self._refresh()
+        return int(np.count_nonzero(self._ids)) if self._capacity else 0
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        try:
+            capacity = os.path.getsize(self._ids_path) // 4
+        except OSError:
+            capacity = 0
+        if capacity == self._capacity:
+            return
+        self._capacity = capacity
+        if capacity:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(capacity, self.dim))
+            self._ids = np.memmap(self._ids_path, dtype=np.int32, mode='r', shape=(capacity,))
+        else:
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int32)
+
+    def _grow(self, needed):
+        capacity = max(self._capacity, _INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        # Vectors first: a reader sizes both maps from the ids file
+        for path, itemsize in ((self._vectors_path, 4 * self.dim), (self._ids_path, 4)):
+            with open(path, 'ab') as f:
+                f.truncate(capacity * itemsize)
+        self._refresh()
+
+    def _writable(self):
+        vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+', shape=(self._capacity, self.dim))
+        ids = np.memmap(self._ids_path, dtype=np.int32, mode='r+', shape=(self._capacity,))
+        return vectors, ids
+
+    def _normalize(self, vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f'Expected a {self.dim}-dimensional face descriptor, got {vector.shape[0]}')
+        return vector / (np.linalg.norm(vector) + 1e-12)
+
+    def enroll(self, employee_id, vector):
+        """Add or replace an employee's descriptor in place."""
+        vector = self._normalize(vector)
+        with self._locked():
+            slots = np.flatnonzero(self._ids == employee_id)
+            if slots.size:
+                slot = int(slots[0])
+            else:
+                free = np.flatnonzero(self._ids == 0)
+                if not free.size:
+                    self._grow(self._capacity + 1)
+                    free = np.flatnonzero(self._ids == 0)
+                slot = int(free[0])
+            vectors, ids = self._writable()
+            # Row before id, so a concurrent match never pairs the id with a stale row
+            vectors[slot] = vector
+            vectors.flush()
+            ids[slot] = employee_id
+            ids.flush()
+
+    def remove(self, employee_id):
+        """Free an employee's slot. Returns whether one was enrolled."""
+        with self._locked():
+            slots = np.flatnonzero(self._ids == employee_id)
+            if not slots.size:
+                return False
+            vectors, ids = self._writable()
+            ids[slots] = 0
+            ids.flush()
+            vectors[slots] = 0
+            vectors.flush()
+            return True
+
+    def rebuild(self, employee_ids, vectors):
+        """Replace the whole index with the given ids and descriptors (one row each)."""
+        employee_ids = np.asarray(employee_ids, dtype=np.int32)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(employee_ids), self.dim)
+        vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+        with self._locked():
+            self._grow(len(employee_ids))
+            all_vectors, all_ids = self._writable()
+            all_ids[:] = 0
+            all_ids.flush()
+            all_vectors[:len(employee_ids)] = vectors
+            all_vectors[len(employee_ids):] = 0
+            all_vectors.flush()
+            all_ids[:len(employee_ids)] = employee_ids
+            all_ids.flush()
+
+    def scores(self, vector):
+        """Cosine similarity of a descriptor against every slot (free slots score 0)."""
+        self._refresh()
+        return self._vectors @ self._normalize(vector)
+
+    def match(self, vector, threshold=DEFAULT_THRESHOLD):
+        """Best enrolled (employee_id, score) for a descriptor, or None below the threshold."""
+        scores = self.scores(vector)
+        if not scores.size:
+            return None
+        best = int(np.argmax(scores))
+        employee_id, score = int(self._ids[best]), float(scores[best])
+        if not employee_id or score < threshold:
+            return None
+        return employee_id, score
+
+    def verify(self, employee_id, vector, threshold=DEFAULT_THRESHOLD):
+        """Similarity of a descriptor to one employee's enrolled face: (matched, score)."""
+        self._refresh()
+        slots = np.flatnonzero(self._ids == employee_id)
+        if not slots.size:
+            return False, 0.0
+        score = float(self._vectors[slots[0]] @ self._normalize(vector))
+        return score >= threshold, score
+
+
+def index():
+    """The app's face index for the configured embedder, one per process.
+
+    Lives in FACE_INDEX_PATH (default instance/faces) under the embedder's
+    name: descriptors from different embedders cannot be compared.
+    """
+    face_index = current_app.extensions.get('face_index')
+    if face_index is None:
+        face_embedder = embedder()
+        base = current_app.config.get('FACE_INDEX_PATH') or os.path.join(current_app.instance_path, 'faces')
+        face_index = current_app.extensions['face_index'] = FaceIndex(
+            os.path.join(base, face_embedder.name), face_embedder.dim)
+    return face_index
+
+
+def threshold():
+    """FACE_MATCH_THRESHOLD, or the configured embedder's own default."""
+    return current_app.config.get('FACE_MATCH_THRESHOLD') or embedder().threshold
+
+
+def enroll(profile, upload):
+    """Store an enrollment photo, index its descriptor and point the profile at it.
+
+    The caller commits. Returns the previous photo's document key so it can
+    be released after the commit. Raises NoFaceError before storing anything
+    if the photo has no usable face.
+    """
+    from employee_portal import documents
+    vector = embed(upload)
+    upload.stream.seek(0)
+    previous, profile.biometric_image = profile.biometric_image, documents.save(upload)
+    index().enroll(profile.id, vector)
+    return previous
+
+
+def _stored_vector(profile):
+    from employee_portal import documents
+    path = documents.path_for(profile.biometric_image) if profile.biometric_image else None
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        return embed(path)
+    except NoFaceError:
+        return None
+
+
+def enroll_stored(profile):
+    """Re-index a profile from its stored enrollment photo. Returns whether it had a usable one."""
+    vector = _stored_vector(profile)
+    if vector is None:
+        return False
+    index().enroll(profile.id, vector)
+    return True
+
+
+def remove(profile_id):
+    return index().remove(profile_id)
+
+
+def identify(upload):
+    """(employee_id, score) of the enrolled face that best matches a capture, or None.
+
+    Callers that act on the answer without a person confirming it must
+    check identification_allowed() first.
+    """
+    return index().match(embed(upload), threshold())
+
+
+def verify(profile_id, upload):
+    """Whether a capture matches this employee's enrolled face: (matched, score)."""
+    return index().verify(profile_id, embed(upload), threshold())
+
+
+def rebuild():
+    """Re-index every active employee from their enrollment photo.
+
+    Returns (indexed, missing); photos that are gone or have no usable face
+    count as missing.
+    """
+    from employee_portal.models import EmployeeProfile
+    profiles = EmployeeProfile.query.filter(
+        EmployeeProfile.is_resigned == False, EmployeeProfile.biometric_image.isnot(None)
+    ).all()
+    ids, vectors, missing = [], [], 0
+    for profile in profiles:
+        vector = _stored_vector(profile)
+        if vector is None:
+            missing += 1
+            continue
+        ids.append(profile.id)
+        vectors.append(vector)
+    face_index = index()
+    face_index.rebuild(ids, np.array(vectors, dtype=np.float32).reshape(len(ids), face_index.dim))
+    return len(ids), missing
+
+
+# --- Accuracy -----------------------------------------------------------
+
+def evaluate(pairs, face_embedder, match_threshold):
+    """False-accept and false-reject rates of an embedder over labelled photo pairs.
+
+    ``pairs`` yields (photo_a, photo_b, same_person). Each photo is embedded
+    once. A matching pair with a faceless photo is a false reject; a
+    non-matching one is left out, since it was never compared. Returns a
+    dict with the pair counts, error counts, far, frr, the lowest matching
+    and highest non-matching scores, the embedder name and the threshold.
+    """
+    vectors = {}
+
+    def vector(photo):
+        if photo not in vectors:
+            try:
+                vectors[photo] = face_embedder.embed(photo)
+            except NoFaceError:
+                vectors[photo] = None
+        return vectors[photo]
+
+    matching = non_matching = false_accepts = false_rejects = 0
+    lowest_match, highest_non_match = None, None
+    for photo_a, photo_b, same in pairs:
+        a, b = vector(photo_a), vector(photo_b)
+        score = None if a is None or b is None else float(a @ b)
+        if same:
+            matching += 1
+            false_rejects += score is None or score < match_threshold
+            if score is not None:
+                lowest_match = score if lowest_match is None else min(lowest_match, score)
+        elif score is not None:
+            non_matching += 1
+            false_accepts += score >= match_threshold
+            highest_non_match = score if highest_non_match is None else max(highest_non_match, score)
+    return {
+        'embedder': face_embedder.name, 'threshold': match_threshold,
+        'matching': matching, 'non_matching': non_matching,
+        'false_accepts': false_accepts, 'false_rejects': false_rejects,
+        'far': false_accepts / non_matching if non_matching else None,
+        'frr': false_rejects / matching if matching else None,
+        'lowest_match': lowest_match, 'highest_non_match': highest_non_match,
+    }
+
+
+def _accuracy_path():
+    return os.path.join(index().directory, 'accuracy.json')
+
+
+def record_accuracy(result):
+    """Keep an evaluate() result for the configured embedder, replacing any earlier one."""
+    os.makedirs(index().directory, exist_ok=True)
+    with open(_accuracy_path(), 'w') as f:
+        json.dump(dict(result, measured_at=datetime.utcnow().isoformat(timespec='seconds')), f, indent=1)
+
+
+def accuracy():
+    """The recorded evaluate() result for the configured embedder, or None."""
+    try:
+        with open(_accuracy_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def max_false_accept():
+    return current_app.config.get('FACE_MAX_FALSE_ACCEPT') or DEFAULT_MAX_FALSE_ACCEPT
+
+
+def identification_allowed():
+    """Whether a 1:N match may punch an employee in or out without anyone confirming who it is.
+
+    Needs a recorded measurement of the configured embedder at or below the
+    current threshold (raising the threshold only lowers the rate) with a
+    false-accept rate within FACE_MAX_FALSE_ACCEPT, over enough non-matching
+    pairs to show it: with no false accepts in n pairs the rate is below 3/n
+    at 95% confidence, so n must be at least 3 / FACE_MAX_FALSE_ACCEPT.
+    """
+    measured = accuracy()
+    if not measured or measured.get('embedder') != embedder().name or measured.get('far') is None:
+        return False
+    limit = max_false_accept()
+    return (measured['threshold'] <= threshold() and measured['far'] <= limit
+            and measured['non_matching'] >= 3 / limit)
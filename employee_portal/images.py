@@ -0,0 +1,191 @@
+import hashlib
+import io
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app, url_for
+
+# Square variants by name and edge length in pixels, smallest first
+VARIANTS = {'avatar': 64, 'card': 128, 'profile': 320}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='images')
+
+
+def is_stored(name):
+    """Content-addressed keys are bare hex digests; legacy uploads keep their extension."""
+    return bool(name) and '.' not in name
+
+
+def _root():
+    return os.path.join(current_app.root_path, 'static', 'img', 'cas')
+
+
+def _dir(key):
+    return os.path.join(_root(), key[:2], key)
+
+
+@lru_cache(maxsize=None)
+def _webp():
+    # Pillow is only loaded to store or resize pictures, never to render their URLs
+    from PIL import features
+    return features.check('webp')
+
+
+def _variant_file(variant):
+    return f"{variant}.{'webp' if _webp() else 'jpg'}"
+
+
+def _original(key):
+    directory = _dir(key)
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.startswith('original.'):
+                return os.path.join(directory, name)
+    return None
+
+
+def _write_atomic(path, data):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def store_image(upload):
+    """Store an uploaded image by content hash and queue its variants.
+
+    The request only hashes and writes the original; resizing happens on a
+    background thread. Identical uploads map to the same key and share
+    storage. Returns the key to keep in the model (16 hex chars).
+    """
+    from PIL import Image
+    data = upload.read()
+    with Image.open(io.BytesIO(data)) as probe:
+        probe.verify()
+        fmt = (probe.format or 'png').lower()
+
+    key = hashlib.sha256(data).hexdigest()[:16]
+    directory = _dir(key)
+    os.makedirs(directory, exist_ok=True)
+    if _original(key) is None:
+        _write_atomic(os.path.join(directory, f'original.{fmt}'), data)
+
+    if not all(os.path.exists(os.path.join(directory, _variant_file(v))) for v in VARIANTS):
+        app = current_app._get_current_object()
+        _executor.submit(_generate_in_context, app, key)
+    return key
+
+
+def _generate_in_context(app, key):
+    with app.app_context():
+        try:
+            generate_variants(key)
+        except Exception as e:
+            app.logger.warning(f'Image variants for {key} failed: {e}')
+
+
+def generate_variants(key):
+    """Write every size variant of a stored image (WebP when Pillow supports it, else JPEG)."""
+    from PIL import Image, ImageOps
+    original = _original(key)
+    if original is None:
+        return 0
+    directory = _dir(key)
+    written = 0
+    with Image.open(original) as img:
+        img = ImageOps.exif_transpose(img).convert('RGB')
+        for variant, size in VARIANTS.items():
+            resized = ImageOps.fit(img, (size, size), Image.LANCZOS)
+            path = os.path.join(directory, _variant_file(variant))
+            tmp = f'{path}.{os.getpid()}.tmp'
+            if _webp():
+                resized.save(tmp, 'WEBP', quality=80, method=4)
+            else:
+                resized.save(tmp, 'JPEG', quality=85, optimize=True, progressive=True)
+            os.replace(tmp, path)
+            written += 1
+    return written
+
+
+def variant_for(size):
+    """Smallest variant whose edge is at least ``size`` pixels."""
+    for variant, edge in VARIANTS.items():
+        if edge >= size:
+            return variant
+    return list(VARIANTS)[-1]
+
+
+def image_url(name, size=VARIANTS['profile']):
+    """URL of an employee picture for a given display size in pixels.
+
+    Stored images resolve to the smallest variant that fits; until the
+    background job has produced it the original is served. Legacy file names
+    and missing pictures fall back to the old static paths.
+    """
+    if not name:
+        return url_for('static', filename='img/default.jpg')
+    if not is_stored(name):
+        return url_for('static', filename='img/' + name)
+
+    relative = f'img/cas/{name[:2]}/{name}/'
+    variant = variant_for(size)
+    for variant_file in (f'{variant}.webp', f'{variant}.jpg'):
+        if os.path.exists(os.path.join(_dir(name), variant_file)):
+            return url_for('static', filename=relative + variant_file)
+    original = _original(name)
+    if original:
+        return url_for('static', filename=relative + os.path.basename(original))
+    return url_for('static', filename='img/default.jpg')
+
+
+def _referenced():
+    from employee_portal.models import EmployeeProfile, AuthorizedSignature
+    from employee_portal import db
+    names = {name for name, in db.session.query(EmployeeProfile.image_file).distinct().all() if name}
+    names |= {name for name, in db.session.query(AuthorizedSignature.file_path).distinct().all() if name}
+    return names
+
+
+def discard_if_unused(name):
+    """Delete a superseded picture once no profile references it any more.
+
+    Call after the commit that replaced it. The bundled default image is never removed.
+    """
+    if not name or name == 'default.jpg' or name in _referenced():
+        return False
+    if is_stored(name):
+        shutil.rmtree(_dir(name), ignore_errors=True)
+        return True
+    path = os.path.join(current_app.root_path, 'static', 'img', os.path.basename(name))
+    if os.path.isfile(path):
+        os.remove(path)
+        return True
+    return False
+
+
+def collect_garbage(grace_seconds=3600, dry_run=False):
+    """Remove stored images no profile references.
+
+    Directories younger than ``grace_seconds`` are kept so an upload whose
+    transaction has not committed yet is not swept. Returns the removed keys.
+    """
+    root = _root()
+    if not os.path.isdir(root):
+        return []
+    referenced = _referenced()
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for shard in os.listdir(root):
+        shard_dir = os.path.join(root, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for key in os.listdir(shard_dir):
+            path = os.path.join(shard_dir, key)
+            if key in referenced or os.path.getmtime(path) > cutoff:
+                continue
+            removed.append(key)
+            if not dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+    return removed
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from employee_portal import db
+from employee_portal.models import Leave, LeaveDay
+
+
+def _expand(leave):
+    """Yield one LeaveDay row mapping per day covered by a leave."""
+    current_day = leave.start_date
+    while current_day <= leave.end_date:
+        yield {
+            'leave_id': leave.id,
+            'employee_id': leave.employee_id,
+            'date': current_day,
+            'leave_type': leave.leave_type,
+            'status': leave.status or 'Pending',
+        }
+        current_day += timedelta(days=1)
+
+
+def sync_leave(leave):
+    """Rewrite the per-day rows of a single leave.
+
+    The leave must already have an id (flush before calling). The caller owns
+    the transaction.
+    """
+    LeaveDay.query.filter_by(leave_id=leave.id).delete(synchronize_session=False)
+    rows = list(_expand(leave))
+    if rows:
+        db.session.execute(db.insert(LeaveDay), rows)
+    return len(rows)
+
+
+def sync_leave_status(leave):
+    """Propagate a status change (approve/reject) without re-expanding dates."""
+    return LeaveDay.query.filter_by(leave_id=leave.id).update(
+        {'status': leave.status}, synchronize_session=False
+    )
+
+
+def on_leave_ids(day, status='Approved'):
+    """Return the ids of employees on leave on ``day``."""
+    rows = db.session.query(LeaveDay.employee_id).filter(
+        LeaveDay.date == day,
+        LeaveDay.status == status
+    ).distinct().all()
+    return [emp_id for emp_id, in rows]
+
+
+def count_on_leave(day, status='Approved'):
+    return db.session.query(db.func.count(db.distinct(LeaveDay.employee_id))).filter(
+        LeaveDay.date == day,
+        LeaveDay.status == status
+    ).scalar() or 0
+
+
+def leave_days(from_date=None, to_date=None, employee_id=None, status=None):
+    """Query the expanded leave days for an optional employee, range and status."""
+    query = LeaveDay.query
+    if employee_id:
+        query = query.filter(LeaveDay.employee_id == employee_id)
+    if from_date:
+        query = query.filter(LeaveDay.date >= from_date)
+    if to_date:
+        query = query.filter(LeaveDay.date <= to_date)
+    if status:
+        query = query.filter(LeaveDay.status == status)
+    return query.order_by(LeaveDay.date.asc(), LeaveDay.id.asc())
+
+
+def _iter_leaves(batch_size=500):
+    """Walk the Leave table in id order, one keyset page at a time."""
+    last_id = 0
+    while True:
+        batch = db.session.query(
+            Leave.id, Leave.employee_id, Leave.start_date, Leave.end_date, Leave.leave_type, Leave.status
+        ).filter(Leave.id > last_id).order_by(Leave.id).limit(batch_size).all()
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1].id
+
+
+def rebuild(batch_size=500):
+    """Drop and regenerate the whole expansion table from Leave rows."""
+    LeaveDay.query.delete(synchronize_session=False)
+    total = 0
+    rows = []
+    for leave in _iter_leaves(batch_size):
+        rows.extend(_expand(leave))
+        if len(rows) >= batch_size:
+            db.session.execute(db.insert(LeaveDay), rows)
+            total += len(rows)
+            rows = []
+    if rows:
+        db.session.execute(db.insert(LeaveDay), rows)
+        total += len(rows)
+    db.session.commit()
+    return total
+
+
+def check_consistency():
+    """Compare the expansion table against the Leave rows.
+
+    Returns ``(missing, extra)``: rows that should exist but do not, and rows
+    that exist but no longer match any leave day.
+    """
+    expected = set()
+    for leave in _iter_leaves():
+        for row in _expand(leave):
+            expected.add((row['leave_id'], row['employee_id'], row['date'], row['leave_type'], row['status']))
+
+    actual = set(db.session.query(
+        LeaveDay.leave_id, LeaveDay.employee_id, LeaveDay.date, LeaveDay.leave_type, LeaveDay.status
+    ).all())
+
+    return sorted(expected - actual), sorted(actual - expected)
@@ -0,0 +1,184 @@
+from datetime import date, timedelta
+from flask import current_app
+from employee_portal import db
+from employee_portal.models import LeaveLedgerEntry, LeaveBalance
+
+
+def entitlement(leave_type):
+    return float(current_app.config.get('LEAVE_ENTITLEMENTS', {}).get(leave_type, 0))
+
+
+def carry_forward_limit(leave_type):
+    return float(current_app.config.get('LEAVE_CARRY_FORWARD_LIMITS', {}).get(leave_type, 0))
+
+
+def leave_days_by_year(start_date, end_date):
+    """Split an inclusive date range into {year: calendar days}."""
+    days = {}
+    current = start_date
+    while current <= end_date:
+        year_end = date(current.year, 12, 31)
+        last = min(year_end, end_date)
+        days[current.year] = (last - current).days + 1
+        current = last + timedelta(days=1)
+    return days
+
+
+def get_balance(employee_id, leave_type, year):
+    """Single-row lookup on the (employee, leave_type, year) unique index."""
+    return LeaveBalance.query.filter_by(employee_id=employee_id, leave_type=leave_type, year=year).first()
+
+
+def available_days(employee_id, leave_type, year):
+    balance = get_balance(employee_id, leave_type, year)
+    return balance.balance if balance else entitlement(leave_type)
+
+
+def balance_summary(employee_id, year):
+    """Balances for every configured leave type, without writing anything.
+
+    Types with no ledger activity yet show the full entitlement.
+    """
+    rows = {b.leave_type: b for b in LeaveBalance.query.filter_by(employee_id=employee_id, year=year).all()}
+    leave_types = list(current_app.config.get('LEAVE_ENTITLEMENTS', {}).keys())
+    leave_types += [t for t in rows if t not in leave_types]
+
+    summary = []
+    for leave_type in leave_types:
+        b = rows.get(leave_type)
+        if b:
+            summary.append({'leave_type': leave_type, 'accrued': b.accrued, 'carried_forward': b.carried_forward, 'used': b.used, 'balance': b.balance})
+        else:
+            allowance = entitlement(leave_type)
+            summary.append({'leave_type': leave_type, 'accrued': allowance, 'carried_forward': 0.0, 'used': 0.0, 'balance': allowance})
+    return summary
+
+
+def balances_for(pairs, year):
+    """Available days for many (employee_id, leave_type) pairs in one query."""
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    employee_ids = {emp_id for emp_id, _ in pairs}
+    rows = LeaveBalance.query.filter(
+        LeaveBalance.employee_id.in_(list(employee_ids)),
+        LeaveBalance.year == year
+    ).all()
+    found = {(b.employee_id, b.leave_type): b.balance for b in rows}
+    return {pair: found.get(pair, entitlement(pair[1])) for pair in pairs}
+
+
+def _open_balance(employee_id, leave_type, year, created_by=None):
+    """Fetch the balance row for update, opening it with the annual accrual if new."""
+    balance = LeaveBalance.query.filter_by(
+        employee_id=employee_id, leave_type=leave_type, year=year
+    ).with_for_update().first()
+    if balance:
+        return balance
+
+    allowance = entitlement(leave_type)
+    balance = LeaveBalance(
+        employee_id=employee_id, leave_type=leave_type, year=year,
+        accrued=allowance, carried_forward=0.0, used=0.0, balance=allowance
+    )
+    db.session.add(balance)
+    db.session.add(LeaveLedgerEntry(
+        employee_id=employee_id, leave_type=leave_type, year=year,
+        entry_type='Accrual', days=allowance, note=f'Annual entitlement {year}', created_by=created_by
+    ))
+    return balance
+
+
+def _apply(balance, entry_type, days):
+    if entry_type == 'Accrual':
+        balance.accrued = (balance.accrued or 0.0) + days
+    elif entry_type == 'CarryForward':
+        balance.carried_forward = (balance.carried_forward or 0.0) + days
+    else:
+        balance.used = (balance.used or 0.0) - days
+    balance.balance = (balance.balance or 0.0) + days
+
+
+def post_entry(employee_id, leave_type, year, entry_type, days, leave_id=None, note=None, created_by=None, balance=None):
+    """Append a ledger entry and move the running balance with it.
+
+    The caller owns the transaction, so the entry and the balance commit together.
+    """
+    if balance is None:
+        balance = _open_balance(employee_id, leave_type, year, created_by)
+    entry = LeaveLedgerEntry(
+        employee_id=employee_id, leave_type=leave_type, year=year, entry_type=entry_type,
+        days=days, leave_id=leave_id, note=note, created_by=created_by
+    )
+    db.session.add(entry)
+    _apply(balance, entry_type, days)
+    return entry
+
+
+def sync_leave_ledger(leave, created_by=None):
+    """Post whatever debit or reversal brings a leave's ledger in line with its status.
+
+    Approved leaves should have consumed their days; any other status should
+    have consumed nothing. Only the delta is posted, so repeated or reversed
+    actions stay consistent.
+    """
+    target = leave_days_by_year(leave.start_date, leave.end_date) if leave.status == 'Approved' else {}
+
+    posted = dict(db.session.query(
+        LeaveLedgerEntry.year, db.func.sum(LeaveLedgerEntry.days)
+    ).filter(LeaveLedgerEntry.leave_id == leave.id).group_by(LeaveLedgerEntry.year).all())
+
+    for year in sorted(set(target) | set(posted)):
+        delta = -float(target.get(year, 0)) - float(posted.get(year) or 0)
+        if not delta:
+            continue
+        entry_type = 'Debit' if delta < 0 else 'Reversal'
+        post_entry(
+            leave.employee_id, leave.leave_type, year, entry_type, delta,
+            leave_id=leave.id, note=f'Leave {leave.start_date} to {leave.end_date} {leave.status}', created_by=created_by
+        )
+
+
+def carry_forward(from_year, batch_size=500, created_by='System'):
+    """Year-end job: carry unused balance (capped per leave type) into the next year.
+
+    Walks the balances of ``from_year`` in keyset batches and commits per batch.
+    Pairs that already received a carry-forward are skipped, so the job can be
+    re-run safely. Returns the number of balances carried.
+    """
+    to_year = from_year + 1
+    carried = 0
+    last_id = 0
+    while True:
+        batch = LeaveBalance.query.filter(
+            LeaveBalance.year == from_year,
+            LeaveBalance.id > last_id
+        ).order_by(LeaveBalance.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        employee_ids = list({b.employee_id for b in batch})
+        targets = {(t.employee_id, t.leave_type): t for t in LeaveBalance.query.filter(
+            LeaveBalance.employee_id.in_(employee_ids),
+            LeaveBalance.year == to_year
+        ).with_for_update().all()}
+        done = set(db.session.query(LeaveLedgerEntry.employee_id, LeaveLedgerEntry.leave_type).filter(
+            LeaveLedgerEntry.employee_id.in_(employee_ids),
+            LeaveLedgerEntry.year == to_year,
+            LeaveLedgerEntry.entry_type == 'CarryForward'
+        ).all())
+
+        for b in batch:
+            amount = min(b.balance or 0.0, carry_forward_limit(b.leave_type))
+            if amount <= 0 or (b.employee_id, b.leave_type) in done:
+                continue
+            post_entry(
+                b.employee_id, b.leave_type, to_year, 'CarryForward', amount,
+                note=f'Carried forward from {from_year}', created_by=created_by,
+                balance=targets.get((b.employee_id, b.leave_type))
+            )
+            carried += 1
+
+        db.session.commit()
+    return carried
@@ -0,0 +1,139 @@
+import json
+from sqlalchemy import event, inspect
+from employee_portal import db
+from employee_portal.models import LineItem, PurchaseOrder, BillEstimate, Vendor
+
+# Purchase orders in these states are not counted as vendor spend
+EXCLUDED_STATUSES = ('Draft', 'Cancelled')
+
+
+def normalize(name):
+    """Grouping key for an item name: lower-cased with runs of whitespace collapsed."""
+    return ' '.join(str(name or '').lower().split())[:200]
+
+
+def _number(value):
+    try:
+        return float(str(value).replace(',', '')) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def _line(position, name, quantity=None, unit_price=None, amount=None):
+    name = str(name or '').strip()[:200]
+    if amount is None and quantity is not None and unit_price is not None:
+        amount = round(quantity * unit_price, 2)
+    return LineItem(position=position, item=name, item_key=normalize(name),
+                    quantity=quantity, unit_price=unit_price, amount=amount)
+
+
+def from_json(raw):
+    """LineItems for the items JSON posted by the PO and estimate forms.
+
+    Entries may name the item as ``item`` or ``description`` and the price
+    as ``price`` or ``rate``; ``total`` (or ``amount``) falls back to
+    qty x price. Text that is not a JSON list becomes a single line, as the
+    print view has always shown it.
+    """
+    if not raw:
+        return []
+    try:
+        entries = json.loads(raw) if isinstance(raw, str) else raw
+    except ValueError:
+        return [_line(0, raw)]
+    if not isinstance(entries, list):
+        return [_line(0, raw if isinstance(raw, str) else json.dumps(raw))]
+    lines = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            lines.append(_line(len(lines), entry))
+            continue
+        name = entry.get('item') or entry.get('description') or entry.get('name')
+        quantity = _number(entry.get('qty', entry.get('quantity')))
+        unit_price = _number(entry.get('price', entry.get('rate')))
+        amount = _number(entry.get('total', entry.get('amount')))
+        if not name and quantity is None and unit_price is None:
+            continue
+        lines.append(_line(len(lines), name, quantity, unit_price, amount))
+    return lines
+
+
+def _text(value):
+    if value is None:
+        return ''
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def as_dicts(lines, name_key='item'):
+    """LineItems in the shape the forms and print view read: {name_key, qty, price, total}."""
+    return [{
+        name_key: line.item, 'qty': _text(line.quantity), 'price': _text(line.unit_price),
+        'total': f'{line.amount:.2f}' if line.amount is not None else '',
+    } for line in lines]
+
+
+def to_json(lines, name_key='item'):
+    return json.dumps(as_dicts(lines, name_key))
+
+
+def _changed(obj, *attrs):
+    state = inspect(obj)
+    return state.pending or any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _before_flush(session, flush_context, instances):
+    # Keep the vendor and date copied onto each line in step with its parent
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, PurchaseOrder) and _changed(obj, 'vendor', 'vendor_id', 'date', 'line_items'):
+            vendor_id = obj.vendor.id if obj.vendor is not None else obj.vendor_id
+            for line in obj.line_items:
+                line.vendor_id, line.date = vendor_id, obj.date
+        elif isinstance(obj, BillEstimate) and _changed(obj, 'date', 'line_items'):
+            for line in obj.line_items:
+                line.date = obj.date
+
+
+def init_app(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+
+
+def _spend_query(columns, start, end, vendor_id=None, item=None):
+    query = db.session.query(*columns).join(PurchaseOrder, LineItem.purchase_order_id == PurchaseOrder.id).filter(
+        LineItem.date >= start, LineItem.date < end, PurchaseOrder.status.notin_(EXCLUDED_STATUSES),
+    )
+    if vendor_id:
+        query = query.filter(LineItem.vendor_id == vendor_id)
+    if item:
+        query = query.filter(LineItem.item_key.startswith(normalize(item), autoescape=True))
+    return query
+
+
+def vendor_spend(start, end, item=None):
+    """Per-vendor purchase-order spend for dates in [start, end), largest first.
+
+    ``item`` narrows to lines whose item starts with it, which answers
+    "how many laptops did we order from each vendor this year".
+    """
+    amount = db.func.coalesce(db.func.sum(LineItem.amount), 0.0)
+    rows = _spend_query((
+        Vendor.id, Vendor.name, db.func.count(db.distinct(LineItem.purchase_order_id)),
+        db.func.count(LineItem.id), db.func.coalesce(db.func.sum(LineItem.quantity), 0.0), amount,
+    ), start, end, item=item).join(Vendor, LineItem.vendor_id == Vendor.id).group_by(
+        Vendor.id, Vendor.name
+    ).order_by(amount.desc()).all()
+    return [{'vendor_id': vendor_id, 'vendor': name, 'orders': orders, 'lines': lines,
+             'quantity': quantity, 'amount': round(total, 2)}
+            for vendor_id, name, orders, lines, quantity, total in rows]
+
+
+def item_spend(start, end, vendor_id=None, item=None, limit=50):
+    """Quantity, spend and average unit price per item for dates in [start, end), largest spend first."""
+    amount = db.func.coalesce(db.func.sum(LineItem.amount), 0.0)
+    rows = _spend_query((
+        LineItem.item_key, db.func.min(LineItem.item), db.func.coalesce(db.func.sum(LineItem.quantity), 0.0),
+        amount, db.func.count(db.distinct(LineItem.vendor_id)),
+    ), start, end, vendor_id, item).group_by(LineItem.item_key).order_by(amount.desc()).limit(limit).all()
+    return [{'item': name or '-', 'quantity': quantity, 'amount': round(total, 2), 'vendors': vendors,
+             'unit_price': round(total / quantity, 2) if quantity else None}
+            for key, name, quantity, total, vendors in rows]
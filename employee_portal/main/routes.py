@@ -1,18 +1,20 @@
-from flask import render_template, flash, redirect, url_for, send_from_directory, request, make_response, current_app, jsonify
+from flask import render_template, flash, redirect, url_for, request, make_response, jsonify
 from flask_login import login_required, current_user
 from sqlalchemy import extract
-from employee_portal.admin.routes import admin_required
-from employee_portal.utils.helpers import save_picture, save_file
+from employee_portal.admin.routes import admin_required, has_admin_access
+from employee_portal.utils.helpers import save_picture
+from employee_portal.replicas import read_replica
 from . import bp
 from employee_portal import db
 from employee_portal.main.forms import LeaveForm
 from employee_portal.auth.forms import ExpenseClaimForm
-from employee_portal.models import Attendance, Payroll, EmployeeProfile, Leave, User, Role, Appraisal, ExpenseClaim, Announcement, Holiday, EmployeeTask, ChatMessage
-from employee_portal.excel import export_attendance_to_excel
+from employee_portal.models import Attendance, Payroll, EmployeeProfile, Leave, User, Role, Appraisal, ExpenseClaim, Announcement, Holiday, EmployeeTask, ChatMessage, ApprovalItem
 from employee_portal.utils.helpers import utc_to_ist
-from employee_portal.pdf import generate_payslip_pdf
+from employee_portal.leave_calendar import sync_leave, leave_days
+from employee_portal.leave_ledger import balance_summary, balances_for, leave_days_by_year, available_days
+from employee_portal import approvals, images, documents, downloads
 import os
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from functools import wraps
 
 def employee_required(f):
@@ -38,10 +40,11 @@ def apply_expense():
             employee_id=current_user.profile.id
         )
         if form.receipt.data:
-            receipt_file = save_file(form.receipt.data, folder='documents')
-            claim.receipt_file = receipt_file
+            claim.receipt_file = documents.save(form.receipt.data)
             
         db.session.add(claim)
+        db.session.flush()
+        approvals.sync_item('ExpenseClaim', claim)
         db.session.commit()
         flash('Your expense claim has been submitted.', 'success')
         return redirect(url_for('main.my_expenses'))
@@ -71,9 +74,11 @@ def upload_image():
     if 'image' in request.files:
         image = request.files['image']
         if image.filename != '':
+            previous_image = current_user.profile.image_file
             picture_file = save_picture(image)
             current_user.profile.image_file = picture_file
             db.session.commit()
+            images.discard_if_unused(previous_image)
             flash('Your profile picture has been updated!', 'success')
         else:
             flash('No image selected!', 'danger')
@@ -105,7 +110,7 @@ def index():
             attendance_records = current_user.profile.attendances.order_by(Attendance.check_in.desc()).limit(10).all()
             
             if current_user.profile.image_file:
-                image_file = url_for('static', filename='img/' + current_user.profile.image_file)
+                image_file = images.image_url(current_user.profile.image_file, 120)
         
         announcements = Announcement.query.filter_by(is_active=True).order_by(Announcement.date_posted.desc()).limit(3).all()
         holidays = Holiday.query.filter(Holiday.date >= today).order_by(Holiday.date.asc()).limit(3).all()
@@ -140,7 +145,7 @@ def profile():
         assigned_tasks = EmployeeTask.query.filter_by(employee_id=current_user.profile.id).all()
         
         if current_user.profile.image_file:
-            image_file = url_for('static', filename='img/' + current_user.profile.image_file)
+            image_file = images.image_url(current_user.profile.image_file, 120)
 
         # Check for Task Proximity Warnings (Target Date N and N-1)
         for task in assigned_tasks:
@@ -282,7 +287,7 @@ def directory():
 @login_required
 def view_colleague(profile_id):
     employee = EmployeeProfile.query.get_or_404(profile_id)
-    image_file = url_for('static', filename='img/' + (employee.image_file or 'default.jpg'))
+    image_file = images.image_url(employee.image_file, 140)
     return render_template('directory_profile.html', employee=employee, image_file=image_file)
 
 @bp.route('/api/org_chart')
@@ -328,7 +333,7 @@ def org_chart_api():
 
         role = emp.designation.title if emp.designation else (emp.user.user_role.name if emp.user.user_role else 'Employee')
         name = f"{emp.first_name} {emp.last_name}"
-        image_url = url_for('static', filename='img/' + (emp.image_file or 'default.jpg'))
+        image_url = images.image_url(emp.image_file, 50)
         profile_url = url_for('main.view_colleague', profile_id=emp.id, source='orgchart')
         
         content = f'<div class="org-node-card">' \
@@ -357,6 +362,12 @@ def settings():
 def apply_leave():
     form = LeaveForm()
     if form.validate_on_submit():
+        # Warn (but still submit) when the request exceeds the available balance
+        for year, days in leave_days_by_year(form.start_date.data, form.end_date.data).items():
+            available = available_days(current_user.profile.id, form.leave_type.data, year)
+            if days > available:
+                flash(f'{form.leave_type.data} leave for {year} exceeds your balance of {available:g} day(s); the excess may be treated as loss of pay.', 'warning')
+
         leave = Leave(
             start_date=form.start_date.data,
             end_date=form.end_date.data,
@@ -365,10 +376,14 @@ def apply_leave():
             employee_id=current_user.profile.id
         )
         db.session.add(leave)
+        db.session.flush()
+        sync_leave(leave)
+        approvals.sync_item('Leave', leave)
         db.session.commit()
         flash('Your leave application has been submitted.', 'success')
         return redirect(url_for('main.profile'))
-    return render_template('apply_leave.html', title='Apply for Leave', form=form)
+    balances = balance_summary(current_user.profile.id, date.today().year)
+    return render_template('apply_leave.html', title='Apply for Leave', form=form, balances=balances)
 
 @bp.route('/leave_requests')
 @login_required
@@ -377,80 +392,155 @@ def leave_requests():
     if current_user.role == 'admin':
         leaves = Leave.query.filter_by(status='Pending').all()
     elif current_user.profile:
-        full_name = f"{current_user.profile.first_name} {current_user.profile.last_name}"
-        leaves = Leave.query.join(EmployeeProfile).filter(
-            Leave.status == 'Pending',
-            EmployeeProfile.reports_to == full_name
-        ).all()
+        leaves = approvals.pending_leaves_for(current_user.profile.id).all()
     
-    return render_template('leave_requests.html', leaves=leaves, title='Leave Requests')
+    balances = balances_for(((l.employee_id, l.leave_type) for l in leaves), date.today().year)
+    return render_template('leave_requests.html', leaves=leaves, balances=balances, title='Leave Requests')
 
 @bp.route('/leave_action/<int:leave_id>/<string:action>', methods=['POST'])
 @login_required
 def leave_action(leave_id, action):
     leave = Leave.query.get_or_404(leave_id)
+    row = approvals.find('Leave', leave)
     
-    # Permission Check
-    is_authorized = False
-    if current_user.role == 'admin':
-        is_authorized = True
-    elif current_user.profile:
-        full_name = f"{current_user.profile.first_name} {current_user.profile.last_name}"
-        if leave.employee.reports_to == full_name:
-            is_authorized = True
-            
-    if not is_authorized:
+    # Permission Check: admins, or the manager the request was routed to
+    if row is None or not approvals.can_decide(current_user, row):
         flash('You are not authorized to perform this action.', 'danger')
         return redirect(url_for('main.index'))
 
-    if action == 'approve':
-        leave.status = 'Approved'
-        approver = f"{current_user.profile.first_name} {current_user.profile.last_name}" if current_user.profile else 'Admin'
-        leave.approved_by = approver
-        flash('Leave request approved.', 'success')
-    elif action == 'reject':
-        leave.status = 'Rejected'
-        approver = f"{current_user.profile.first_name} {current_user.profile.last_name}" if current_user.profile else 'Admin'
-        leave.approved_by = approver
-        leave.rejection_reason = request.form.get('reason', '')
-        flash('Leave request rejected.', 'warning')
+    if action in approvals.ACTIONS:
+        if not approvals.decide([row], action, current_user, reason=request.form.get('reason', '')):
+            flash('This leave request has already been processed.', 'info')
+            return redirect(url_for('main.leave_requests'))
+        if action == 'approve':
+            flash('Leave request approved.', 'success')
+        else:
+            flash('Leave request rejected.', 'warning')
     
     db.session.commit()
     return redirect(url_for('main.leave_requests'))
 
-@bp.route('/attendance_action', methods=['POST'])
+@bp.route('/approvals')
 @login_required
-def attendance_action():
-    if not current_user.profile:
-        return jsonify({'success': False, 'message': 'Profile not found.'}), 400
-        
+def approvals_inbox():
+    items = []
+    if current_user.profile:
+        items = approvals.pending_for(current_user.profile.id).options(db.joinedload(ApprovalItem.employee)).all()
+    return render_template('approvals.html', items=items, title='Approvals')
+
+@bp.route('/approvals/<int:item_id>/<string:action>', methods=['POST'])
+@login_required
+def approval_action(item_id, action):
+    row = ApprovalItem.query.get_or_404(item_id)
+    if not approvals.can_decide(current_user, row) or action not in approvals.ACTIONS:
+        flash('You are not authorized to perform this action.', 'danger')
+        return redirect(url_for('main.index'))
+
+    if approvals.decide([row], action, current_user, reason=request.form.get('reason', '')):
+        db.session.commit()
+        flash(f'{row.summary} {approvals.ACTIONS[action].lower()}.', 'success' if action == 'approve' else 'warning')
+    else:
+        flash('This item has already been processed.', 'info')
+    return redirect(request.referrer or url_for('main.approvals_inbox'))
+
+def _toggle_attendance(employee_id, verification_method='Manual', capture=None):
+    """Check an employee in, or out if already checked in today. Returns (success, message).
+
+    ``capture`` is stored as the check-in's verification image; check-outs
+    and refused attempts keep nothing.
+    """
     today = date.today()
     # Find the latest check-in for the user for today
     todays_attendance = Attendance.query.filter(
         db.and_(
-            Attendance.employee_id == current_user.profile.id,
+            Attendance.employee_id == employee_id,
             db.func.date(Attendance.check_in) == today
         )
     ).order_by(Attendance.check_in.desc()).first()
 
-    message = ""
     if todays_attendance and todays_attendance.check_out is None:
         # User is checking out
         todays_attendance.check_out = datetime.utcnow()
         db.session.commit()
-        message = 'Thanks for your hard work! See you tomorrow!'
+        return True, 'Thanks for your hard work! See you tomorrow!'
     elif todays_attendance and todays_attendance.check_out is not None:
         # User has already checked in and out for the day
-        return jsonify({'success': False, 'message': 'You have already completed your attendance for today.'}), 400
+        return False, 'You have already completed your attendance for today.'
+    # User is checking in
+    attendance = Attendance(employee_id=employee_id, verification_method=verification_method,
+                            verification_image=_save_capture(capture) if capture else None)
+    db.session.add(attendance)
+    db.session.commit()
+    return True, 'Welcome! Have a productive day!'
+
+def _save_capture(capture):
+    capture.stream.seek(0)
+    return documents.save(capture)
+
+@bp.route('/attendance_action', methods=['POST'])
+@login_required
+def attendance_action():
+    from employee_portal import faces
+    if not current_user.profile:
+        return jsonify({'success': False, 'message': 'Profile not found.'}), 400
+
+    # Biometric clients post a camera capture, checked against the employee's enrolled face
+    capture = request.files.get('capture')
+    if capture:
+        try:
+            matched, score = faces.verify(current_user.profile.id, capture)
+        except OSError:
+            return jsonify({'success': False, 'message': 'The capture is not a readable image.'}), 400
+        except faces.NoFaceError:
+            return jsonify({'success': False, 'message': 'No face found in the capture. Please try again.'}), 400
+        if not matched:
+            return jsonify({'success': False, 'message': 'Face not recognised. Please try again.', 'score': round(score, 3)}), 403
+        success, message = _toggle_attendance(current_user.profile.id, 'Biometric', capture)
     else:
-        # User is checking in
-        attendance = Attendance(employee_id=current_user.profile.id)
-        db.session.add(attendance)
-        db.session.commit()
-        message = 'Welcome! Have a productive day!'
-        
+        success, message = _toggle_attendance(current_user.profile.id)
+    if not success:
+        return jsonify({'success': False, 'message': message}), 400
     return jsonify({'success': True, 'message': message})
 
+@bp.route('/attendance/face', methods=['POST'])
+@admin_required
+def face_attendance():
+    """Kiosk check-in/out from a camera capture.
+
+    With ``employee_id`` (the admin at the kiosk picks who is punching) the
+    capture is verified against that employee's enrolled face. Without it
+    the employee is identified against every enrolled face, which is only
+    allowed once the matcher's false-accept rate has been measured.
+    """
+    from employee_portal import faces
+    capture = request.files.get('capture')
+    if not capture:
+        return jsonify({'success': False, 'message': 'No capture received.'}), 400
+    employee_id = request.form.get('employee_id', type=int)
+    if employee_id is None and not faces.identification_allowed():
+        return jsonify({'success': False, 'message': 'Automatic face identification is off until its accuracy has been '
+                                                     'measured. Select the employee to verify.'}), 409
+    try:
+        if employee_id is None:
+            match = faces.identify(capture)
+        else:
+            matched, score = faces.verify(employee_id, capture)
+            match = (employee_id, score) if matched else None
+    except OSError:
+        return jsonify({'success': False, 'message': 'The capture is not a readable image.'}), 400
+    except faces.NoFaceError:
+        return jsonify({'success': False, 'message': 'No face found in the capture. Please try again.'}), 400
+    if match is None:
+        return jsonify({'success': False, 'message': 'Face not recognised. Please try again.'}), 404
+    employee_id, score = match
+    employee = db.session.get(EmployeeProfile, employee_id)
+    if employee is None or employee.is_resigned:
+        faces.remove(employee_id)
+        return jsonify({'success': False, 'message': 'Face not recognised. Please try again.'}), 404
+    success, message = _toggle_attendance(employee.id, 'Biometric', capture)
+    return jsonify({'success': success, 'message': message, 'employee': f'{employee.first_name} {employee.last_name}',
+                    'score': round(score, 3)}), 200 if success else 400
+
 @bp.route('/my_payslips')
 @login_required
 def my_payslips():
@@ -479,6 +569,7 @@ def my_payslips():
 @bp.route('/download_payslip/<int:payroll_id>')
 @login_required
 def download_payslip(payroll_id):
+    from employee_portal.pdf import generate_payslip_pdf
     payroll = Payroll.query.get_or_404(payroll_id)
     
     # Permission: Either the employee themselves OR an Admin
@@ -496,15 +587,21 @@ def download_payslip(payroll_id):
     safe_name = f"{payroll.employee.first_name}{payroll.employee.last_name}"
     download_filename = f"Payslip_{safe_name}_{month_year}.pdf"
     
-    # Use absolute path to the instance folder
-    instance_dir = os.path.join(current_app.root_path, '..', 'instance')
-    
-    return send_from_directory(
-        instance_dir,
-        pdf_file,
-        as_attachment=True,
-        download_name=download_filename
-    )
+    return downloads.send(os.path.join(downloads.generated_dir(), pdf_file), download_name=download_filename)
+
+@bp.route('/documents/<name>')
+@login_required
+def document(name):
+    # Company documents are admin-only; employee documents and receipts are also visible to their owner
+    if not has_admin_access(current_user):
+        if not (current_user.profile and current_user.profile.id in documents.owner_ids(name)):
+            flash('You are not authorized to view this document.', 'danger')
+            return redirect(url_for('main.index'))
+    response = documents.send(name, as_attachment=request.args.get('download') == '1')
+    if response is None:
+        flash('Document not found.', 'danger')
+        return redirect(request.referrer or url_for('main.index'))
+    return response
 
 @bp.route('/get_attendance_status')
 @login_required
@@ -547,6 +644,7 @@ def view_calendar():
 @bp.route('/attendance', methods=['GET', 'POST'])
 @login_required
 @admin_required
+@read_replica
 def attendance():
     # Only show employees who haven't fully resigned yet
     employees = [e for e in EmployeeProfile.query.all() if not e.is_effectively_resigned]
@@ -565,19 +663,15 @@ def attendance():
 
     # --- Data fetching ---
     attendance_query = Attendance.query
-    leave_query = Leave.query
     if employee_id:
         attendance_query = attendance_query.filter(Attendance.employee_id == employee_id)
-        leave_query = leave_query.filter(Leave.employee_id == employee_id)
     if from_date:
         attendance_query = attendance_query.filter(db.func.date(Attendance.check_in) >= from_date)
-        leave_query = leave_query.filter(Leave.end_date >= from_date)
     if to_date:
         attendance_query = attendance_query.filter(db.func.date(Attendance.check_in) <= to_date)
-        leave_query = leave_query.filter(Leave.start_date <= to_date)
         
     attendance_records = attendance_query.all()
-    leave_records = leave_query.all()
+    leave_records = leave_days(from_date, to_date, employee_id=employee_id).all()
 
     # --- Data merging ---
     daily_records = {}
@@ -600,23 +694,16 @@ def attendance():
     for record in leave_records:
         if not record.employee:
             continue
-        
-        current_day = record.start_date
-        while current_day <= record.end_date:
-            if (from_date and current_day < from_date) or (to_date and current_day > to_date):
-                current_day += timedelta(days=1)
-                continue
-                
-            key = (record.employee_id, current_day)
-            daily_records[key] = {
-                'employee': record.employee,
-                'date': current_day,
-                'status': f"On Leave ({record.leave_type})",
-                'check_in': None,
-                'check_out': None,
-                'hours': 0
-            }
-            current_day += timedelta(days=1)
+            
+        key = (record.employee_id, record.date)
+        daily_records[key] = {
+            'employee': record.employee,
+            'date': record.date,
+            'status': f"On Leave ({record.leave_type})",
+            'check_in': None,
+            'check_out': None,
+            'hours': 0
+        }
 
     # --- Calculations ---
     employee_summary = {}
@@ -643,7 +730,9 @@ def attendance():
 @bp.route('/export_attendance')
 @login_required
 @admin_required
+@read_replica
 def export_attendance():
+    from employee_portal.excel import export_attendance_to_excel
     employee_id = request.args.get('employee_id')
     from_date_str = request.args.get('from_date')
     to_date_str = request.args.get('to_date')
@@ -653,19 +742,15 @@ def export_attendance():
 
     # --- Data fetching ---
     attendance_query = Attendance.query
-    leave_query = Leave.query
     if employee_id:
         attendance_query = attendance_query.filter(Attendance.employee_id == employee_id)
-        leave_query = leave_query.filter(Leave.employee_id == employee_id)
     if from_date:
         attendance_query = attendance_query.filter(db.func.date(Attendance.check_in) >= from_date)
-        leave_query = leave_query.filter(Leave.end_date >= from_date)
     if to_date:
         attendance_query = attendance_query.filter(db.func.date(Attendance.check_in) <= to_date)
-        leave_query = leave_query.filter(Leave.start_date <= to_date)
         
     attendance_records = attendance_query.all()
-    leave_records = leave_query.all()
+    leave_records = leave_days(from_date, to_date, employee_id=employee_id).all()
 
     # --- Data merging ---
     daily_records = {}
@@ -688,23 +773,16 @@ def export_attendance():
     for record in leave_records:
         if not record.employee:
             continue
-        
-        current_day = record.start_date
-        while current_day <= record.end_date:
-            if (from_date and current_day < from_date) or (to_date and current_day > to_date):
-                current_day += timedelta(days=1)
-                continue
-                
-            key = (record.employee_id, current_day)
-            daily_records[key] = {
-                'employee': record.employee,
-                'date': current_day,
-                'status': f"On Leave ({record.leave_type})",
-                'check_in': None,
-                'check_out': None,
-                'hours': 0
-            }
-            current_day += timedelta(days=1)
+            
+        key = (record.employee_id, record.date)
+        daily_records[key] = {
+            'employee': record.employee,
+            'date': record.date,
+            'status': f"On Leave ({record.leave_type})",
+            'check_in': None,
+            'check_out': None,
+            'hours': 0
+        }
 
     # --- Calculations ---
     final_records = sorted(daily_records.values(), key=lambda r: (r['date'], r['employee'].id), reverse=True)
@@ -115,10 +115,9 @@ class PurchaseOrder(db.Model):
     date = db.Column(db.Date, nullable=False, default=date.today)
     vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False)
     
-    # Item Details (JSON or Text for simplicity in this iteration, or separate table)
-    # Storing as JSON string for flexibility: [{"item": "Laptop", "qty": 2, "rate": 50000, "amount": 100000}, ...]
-    items_json = db.Column(db.Text) 
-    
+    # Item details live in LineItem; items_json is kept as a read/write view for the forms
+    line_items = db.relationship('LineItem', backref='purchase_order', order_by='LineItem.position', cascade="all, delete-orphan")
+
     tax_percentage = db.Column(db.Float, default=0.0)
     total_amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(50), default='Draft') # Draft, Sent, Approved, Completed, Cancelled
@@ -129,6 +128,29 @@ class PurchaseOrder(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Register listing: keyset on (date, id), optionally behind an equality filter
+    __table_args__ = (
+        db.Index('ix_purchase_order_date_id', 'date', 'id'),
+        db.Index('ix_purchase_order_status_date_id', 'status', 'date', 'id'),
+        db.Index('ix_purchase_order_vendor_date_id', 'vendor_id', 'date', 'id'),
+    )
+
+    @property
+    def items(self):
+        """Line items as the dicts the PO form and print view use: item, qty, price, total."""
+        from employee_portal import line_items
+        return line_items.as_dicts(self.line_items, 'item')
+
+    @property
+    def items_json(self):
+        from employee_portal import line_items
+        return line_items.to_json(self.line_items, 'item')
+
+    @items_json.setter
+    def items_json(self, raw):
+        from employee_portal import line_items
+        self.line_items = line_items.from_json(raw)
+
     def __repr__(self):
         return f'<PurchaseOrder {self.po_number}>'
 
@@ -142,6 +164,11 @@ class Credit(db.Model):
     reference_number = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_credit_date_id', 'date', 'id'),
+        db.Index('ix_credit_category_date_id', 'category', 'date', 'id'),
+    )
+
     def __repr__(self):
         return f'<Credit {self.id} - {self.amount}>'
 
@@ -157,9 +184,30 @@ class Debit(db.Model):
     paid_by = db.Column(db.String(100)) # Name of the person who paid (Director)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_debit_date_id', 'date', 'id'),
+        db.Index('ix_debit_category_date_id', 'category', 'date', 'id'),
+        db.Index('ix_debit_paid_by_date_id', 'paid_by', 'date', 'id'),
+    )
+
     def __repr__(self):
         return f'<Debit {self.id} - {self.amount}>'
 
+class CashDailyTotal(db.Model):
+    # Per-day, per-category rollup of Credit and Debit, kept in step by employee_portal.cash_ledger
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    category = db.Column(db.String(100), nullable=False) # '' when the transaction has no category
+    credits = db.Column(db.Float, nullable=False, default=0.0)
+    debits = db.Column(db.Float, nullable=False, default=0.0)
+    credit_count = db.Column(db.Integer, nullable=False, default=0)
+    debit_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint('day', 'category', name='_cash_daily_total_uc'),)
+
+    def __repr__(self):
+        return f'<CashDailyTotal {self.day} {self.category}: +{self.credits} -{self.debits}>'
+
 class ShiftSchedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employee_profile.id'), nullable=False)
@@ -182,14 +230,55 @@ class BillEstimate(db.Model):
     estimate_number = db.Column(db.String(50), unique=True) # E.g., EST-2025-001
     date = db.Column(db.Date, nullable=False)
     total_amount = db.Column(db.Float, nullable=False)
-    items_json = db.Column(db.Text) # JSON string of items
     pdf_file = db.Column(db.String(255)) # Path to generated PDF
     created_by = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    line_items = db.relationship('LineItem', backref='bill_estimate', order_by='LineItem.position', cascade="all, delete-orphan")
+
+    @property
+    def items(self):
+        """Line items as the dicts the estimate form uses: description, qty, price, total."""
+        from employee_portal import line_items
+        return line_items.as_dicts(self.line_items, 'description')
+
+    @property
+    def items_json(self):
+        from employee_portal import line_items
+        return line_items.to_json(self.line_items, 'description')
+
+    @items_json.setter
+    def items_json(self, raw):
+        from employee_portal import line_items
+        self.line_items = line_items.from_json(raw)
+
     def __repr__(self):
         return f'<BillEstimate {self.estimate_number}>'
 
+class LineItem(db.Model):
+    # One line of a purchase order or a bill estimate. vendor_id and date are
+    # copied from the parent by employee_portal.line_items so spend can be
+    # aggregated per vendor and item without joining or decoding anything.
+    id = db.Column(db.Integer, primary_key=True)
+    purchase_order_id = db.Column(db.Integer, db.ForeignKey('purchase_order.id'), nullable=True, index=True)
+    bill_estimate_id = db.Column(db.Integer, db.ForeignKey('bill_estimate.id'), nullable=True, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    item = db.Column(db.String(200), nullable=False, default='')
+    item_key = db.Column(db.String(200), nullable=False, default='') # item lower-cased with spaces collapsed, for grouping
+    quantity = db.Column(db.Float)
+    unit_price = db.Column(db.Float)
+    amount = db.Column(db.Float)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=True)
+    date = db.Column(db.Date)
+
+    __table_args__ = (
+        db.Index('ix_line_item_vendor_item_date', 'vendor_id', 'item_key', 'date'),
+        db.Index('ix_line_item_item_date', 'item_key', 'date'),
+    )
+
+    def __repr__(self):
+        return f'<LineItem {self.item} x {self.quantity}>'
+
 class Invoice(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(100), unique=True, nullable=False)
@@ -202,6 +291,12 @@ class Invoice(db.Model):
     file_path = db.Column(db.String(255)) # Path to uploaded invoice file
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_invoice_date_id', 'date', 'id'),
+        db.Index('ix_invoice_status_date_id', 'status', 'date', 'id'),
+        db.Index('ix_invoice_vendor_date_id', 'vendor_id', 'date', 'id'),
+    )
+
     def __repr__(self):
         return f'<Invoice {self.invoice_number}>'
 
@@ -347,6 +442,9 @@ class Attendance(db.Model):
     verification_method = db.Column(db.String(20), default='Manual') # Manual, Biometric
     verification_image = db.Column(db.String(100)) # Path to capture image
 
+    # Month-range scans for payroll day counts
+    __table_args__ = (db.Index('ix_attendance_check_in_employee', 'check_in', 'employee_id'),)
+
     def __repr__(self):
         return f'<Attendance {self.employee_id}>'
 
@@ -361,9 +459,67 @@ class Leave(db.Model):
     approved_by = db.Column(db.String(64))
     rejection_reason = db.Column(db.String(200))
 
+    days = db.relationship('LeaveDay', backref='leave', lazy='dynamic', cascade="all, delete-orphan")
+
     def __repr__(self):
         return f'<Leave {self.employee_id} from {self.start_date} to {self.end_date}>'
 
+class LeaveDay(db.Model):
+    # One row per calendar day covered by a Leave, kept in sync by employee_portal.leave_calendar
+    id = db.Column(db.Integer, primary_key=True)
+    leave_id = db.Column(db.Integer, db.ForeignKey('leave.id'), nullable=False, index=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee_profile.id'), nullable=False)
+    employee = db.relationship('EmployeeProfile')
+    date = db.Column(db.Date, nullable=False)
+    leave_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_leave_day_date_status', 'date', 'status'),
+        db.Index('ix_leave_day_employee_date', 'employee_id', 'date'),
+    )
+
+    def __repr__(self):
+        return f'<LeaveDay {self.employee_id} on {self.date} ({self.status})>'
+
+class LeaveLedgerEntry(db.Model):
+    # Append-only: corrections are posted as new entries, never as edits
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee_profile.id'), nullable=False)
+    employee = db.relationship('EmployeeProfile', backref=db.backref('leave_ledger', lazy='dynamic', cascade="all, delete-orphan"))
+    leave_type = db.Column(db.String(50), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    entry_type = db.Column(db.String(20), nullable=False) # Accrual, Debit, Reversal, CarryForward
+    days = db.Column(db.Float, nullable=False) # Positive adds to the balance, negative consumes it
+    leave_id = db.Column(db.Integer, db.ForeignKey('leave.id'), nullable=True, index=True)
+    leave = db.relationship('Leave', backref=db.backref('ledger_entries', lazy='dynamic'))
+    note = db.Column(db.String(200))
+    created_by = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_leave_ledger_employee_type_year', 'employee_id', 'leave_type', 'year'),)
+
+    def __repr__(self):
+        return f'<LeaveLedgerEntry {self.entry_type} {self.days} for {self.employee_id}>'
+
+class LeaveBalance(db.Model):
+    # Running totals of LeaveLedgerEntry, updated in the same transaction as each entry
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee_profile.id'), nullable=False)
+    employee = db.relationship('EmployeeProfile', backref=db.backref('leave_balances', lazy='dynamic', cascade="all, delete-orphan"))
+    leave_type = db.Column(db.String(50), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    accrued = db.Column(db.Float, default=0.0)
+    carried_forward = db.Column(db.Float, default=0.0)
+    used = db.Column(db.Float, default=0.0)
+    balance = db.Column(db.Float, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('employee_id', 'leave_type', 'year', name='_leave_balance_uc'),)
+
+    def __repr__(self):
+        return f'<LeaveBalance {self.employee_id} {self.leave_type} {self.year}: {self.balance}>'
+
 class Payroll(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employee_profile.id'), nullable=False)
@@ -508,6 +664,9 @@ class EmployeeTask(db.Model):
     completed_at = db.Column(db.DateTime, nullable=True)
     completed_by = db.Column(db.String(100), nullable=True)
 
+    # Assignment diffs look up instances by task and employee
+    __table_args__ = (db.Index('ix_employee_task_task_employee', 'task_id', 'employee_id'),)
+
     def __repr__(self):
         return f'<EmployeeTask {self.task_id} for {self.employee_id}>'
 
@@ -552,6 +711,30 @@ class ExpenseClaim(db.Model):
     def __repr__(self):
         return f'<ExpenseClaim {self.title} for {self.employee_id}>'
 
+class ApprovalItem(db.Model):
+    # One row per leave / expense claim / appraisal awaiting or past a decision, kept in sync by employee_portal.approvals
+    id = db.Column(db.Integer, primary_key=True)
+    item_type = db.Column(db.String(20), nullable=False) # Leave, ExpenseClaim, Appraisal
+    item_id = db.Column(db.Integer, nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee_profile.id'), nullable=False)
+    employee = db.relationship('EmployeeProfile', foreign_keys=[employee_id], backref=db.backref('approval_items', lazy='dynamic', cascade="all, delete-orphan"))
+    approver_profile_id = db.Column(db.Integer, db.ForeignKey('employee_profile.id'), nullable=True) # reports_to_id at submission; NULL means admins only
+    approver = db.relationship('EmployeeProfile', foreign_keys=[approver_profile_id])
+    status = db.Column(db.String(20), nullable=False, default='Pending') # Pending, Approved, Rejected
+    summary = db.Column(db.String(200))
+    submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    decided_by = db.Column(db.String(100))
+    decided_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint('item_type', 'item_id', name='_approval_item_uc'),
+        db.Index('ix_approval_item_approver_status', 'approver_profile_id', 'status'),
+        db.Index('ix_approval_item_status_submitted', 'status', 'submitted_at'),
+    )
+
+    def __repr__(self):
+        return f'<ApprovalItem {self.item_type} {self.item_id} {self.status}>'
+
 class Holiday(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -0,0 +1,136 @@
+import calendar
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from flask import current_app
+from employee_portal import db
+from employee_portal.models import EmployeeProfile, Attendance, LeaveDay, Holiday, ShiftSchedule, SalaryStructure
+
+
+def month_bounds(year, month):
+    """First and last date of a calendar month."""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _offsets(values, start):
+    """Day offsets of a column of dates/datetimes from ``start`` (time of day is dropped)."""
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+    stamps = pd.to_datetime(pd.Series(values)).dt.normalize()
+    return (stamps - pd.Timestamp(start)).dt.days.to_numpy()
+
+
+def _mark(matrix, rows, cols):
+    """Set matrix[rows, cols] for the pairs that fall inside the matrix."""
+    keep = (rows >= 0) & (cols >= 0) & (cols < matrix.shape[1])
+    matrix[rows[keep], cols[keep]] = True
+
+
+def _restrict(query, column, employee_ids):
+    if employee_ids is not None:
+        query = query.filter(column.in_(employee_ids))
+    return query
+
+
+def month_day_counts(year, month, employee_ids=None):
+    """Attendance-driven day counts and LOP for every employee in a month.
+
+    Loads attendance, approved leave days, holidays, shift rosters and salary
+    structures with one query each and evaluates an employee x day boolean
+    matrix, so the cost does not grow with per-employee queries.
+
+    A day is a working day if the employee is rostered on it, or, for
+    employees with no roster that month, if it is neither a holiday nor a
+    configured weekly off. Days outside the employment window (before
+    joining, after the resignation date) are neither paid nor LOP. A working
+    day with no check-in and no approved leave is a LOP day, but only once it
+    has passed: days after today are never LOP, so a month still in progress
+    (or one that has not started) only loses pay for the days already gone.
+
+    Returns a DataFrame indexed by employee_id with the columns
+    days_in_month, employed_days, working_days, worked_days, leave_days,
+    lop_days, paid_days, factor (employed share of the month), monthly_gross
+    and lop (the LOP amount, pro-rated on monthly_gross / days_in_month).
+    """
+    start, end = month_bounds(year, month)
+    n_days = end.day
+    if employee_ids is not None:
+        employee_ids = list(employee_ids)
+
+    profiles = _restrict(db.session.query(
+        EmployeeProfile.id, EmployeeProfile.date_of_joining, EmployeeProfile.is_resigned, EmployeeProfile.resigned_date
+    ), EmployeeProfile.id, employee_ids).order_by(EmployeeProfile.id).all()
+    index = pd.Index([p.id for p in profiles], name='employee_id')
+    n_emp = len(index)
+    days = np.arange(n_days)
+
+    # Employment window as [first, last] day offsets within the month
+    first = np.zeros(n_emp, dtype=np.int64)
+    last = np.full(n_emp, n_days - 1, dtype=np.int64)
+    joined = [(i, p.date_of_joining) for i, p in enumerate(profiles) if p.date_of_joining]
+    if joined:
+        first[[i for i, _ in joined]] = _offsets([d for _, d in joined], start)
+    left = [(i, p.resigned_date) for i, p in enumerate(profiles) if p.is_resigned and p.resigned_date]
+    if left:
+        last[[i for i, _ in left]] = _offsets([d for _, d in left], start)
+    employed = (days >= first[:, None]) & (days <= last[:, None])
+
+    # Calendar: holidays and weekly offs apply to employees without a roster
+    holidays = np.zeros(n_days, dtype=bool)
+    holiday_dates = [d for d, in db.session.query(Holiday.date).filter(Holiday.date >= start, Holiday.date <= end).all()]
+    holidays[_offsets(holiday_dates, start)] = True
+    weekly_offs = np.isin(pd.date_range(start, end).weekday, list(current_app.config.get('PAYROLL_WEEKLY_OFFS', (6,))))
+    calendar_working = ~(holidays | weekly_offs)
+
+    rostered = np.zeros((n_emp, n_days), dtype=bool)
+    shifts = _restrict(db.session.query(ShiftSchedule.employee_id, ShiftSchedule.date).filter(
+        ShiftSchedule.date >= start, ShiftSchedule.date <= end
+    ), ShiftSchedule.employee_id, employee_ids).all()
+    if shifts:
+        _mark(rostered, index.get_indexer([s[0] for s in shifts]), _offsets([s[1] for s in shifts], start))
+    has_roster = rostered.any(axis=1)
+    working = np.where(has_roster[:, None], rostered, calendar_working[None, :]) & employed
+
+    present = np.zeros((n_emp, n_days), dtype=bool)
+    check_ins = _restrict(db.session.query(Attendance.employee_id, Attendance.check_in).filter(
+        Attendance.check_in >= datetime.combine(start, datetime.min.time()),
+        Attendance.check_in < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    ), Attendance.employee_id, employee_ids).all()
+    if check_ins:
+        _mark(present, index.get_indexer([a[0] for a in check_ins]), _offsets([a[1] for a in check_ins], start))
+    present &= employed
+
+    on_leave = np.zeros((n_emp, n_days), dtype=bool)
+    leave_rows = _restrict(db.session.query(LeaveDay.employee_id, LeaveDay.date).filter(
+        LeaveDay.date >= start, LeaveDay.date <= end, LeaveDay.status == 'Approved'
+    ), LeaveDay.employee_id, employee_ids).all()
+    if leave_rows:
+        _mark(on_leave, index.get_indexer([l[0] for l in leave_rows]), _offsets([l[1] for l in leave_rows], start))
+    on_leave &= working
+
+    # Days that have not happened yet cannot have been missed
+    elapsed = days <= (date.today() - start).days
+    lop_days = (working & elapsed[None, :] & ~present & ~on_leave).sum(axis=1)
+    employed_days = employed.sum(axis=1)
+
+    structures = _restrict(db.session.query(
+        SalaryStructure.employee_id,
+        SalaryStructure.basic + SalaryStructure.hra + SalaryStructure.conveyance +
+        SalaryStructure.medical + SalaryStructure.special_allowance
+    ), SalaryStructure.employee_id, employee_ids).all()
+    monthly_gross = pd.Series(
+        [gross or 0.0 for _, gross in structures], index=[emp_id for emp_id, _ in structures], dtype=float
+    ).reindex(index, fill_value=0.0).to_numpy()
+
+    return pd.DataFrame({
+        'days_in_month': n_days,
+        'employed_days': employed_days,
+        'working_days': working.sum(axis=1),
+        'worked_days': present.sum(axis=1),
+        'leave_days': on_leave.sum(axis=1),
+        'lop_days': lop_days,
+        'paid_days': employed_days - lop_days,
+        'factor': employed_days / n_days,
+        'monthly_gross': monthly_gross,
+        'lop': np.round(monthly_gross / n_days * lop_days, 2),
+    }, index=index)
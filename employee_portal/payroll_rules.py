@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from flask import current_app
+from employee_portal import db
+from employee_portal.models import EmployeeProfile, SalaryStructure
+
+COMPONENTS = ['basic', 'hra', 'conveyance', 'medical', 'special_allowance']
+
+# Monthly professional tax slabs: (gross from, tax) pairs in ascending order.
+# 'Default' matches the flat rule the salary structure form has always used.
+PT_SLABS = {
+    'Default': [(0, 0), (15000, 200)],
+    'Karnataka': [(0, 0), (25000, 200)],
+    'Maharashtra': [(0, 0), (7501, 175), (10001, 200)],
+    'Telangana': [(0, 0), (15001, 150), (20001, 200)],
+    'West Bengal': [(0, 0), (10001, 110), (15001, 130), (25001, 150), (40001, 200)],
+}
+
+DEFAULT_RULES = {
+    'pf_rate': 0.12,
+    'pf_wage_ceiling': 15000,       # None to contribute on the full basic
+    'esi_rate': 0.0075,
+    'esi_wage_limit': 21000,        # eligible while monthly gross is at or below this
+    'pt_state': 'Default',
+    'tds_standard_deduction': 75000,
+    # New regime annual slabs: (taxable income from, marginal rate)
+    'tds_slabs': [(0, 0.0), (400000, 0.05), (800000, 0.10), (1200000, 0.15),
+                  (1600000, 0.20), (2000000, 0.25), (2400000, 0.30)],
+    'tds_rebate_limit': 1200000,    # section 87A: no tax up to this taxable income
+    'tds_cess': 0.04,
+}
+
+
+def get_rules(**overrides):
+    """Default statutory rules, overlaid with PAYROLL_RULES from config and any overrides."""
+    rules = dict(DEFAULT_RULES)
+    rules.update(current_app.config.get('PAYROLL_RULES', {}))
+    rules.update(overrides)
+    return rules
+
+
+def load_structures(employee_ids=None):
+    """Salary structures as a DataFrame indexed by employee_id, in one query."""
+    query = db.session.query(
+        SalaryStructure.employee_id, EmployeeProfile.department_id, SalaryStructure.monthly_ctc,
+        *[getattr(SalaryStructure, c) for c in COMPONENTS]
+    ).join(EmployeeProfile, EmployeeProfile.id == SalaryStructure.employee_id)
+    if employee_ids is not None:
+        query = query.filter(SalaryStructure.employee_id.in_(list(employee_ids)))
+    frame = pd.DataFrame(query.all(), columns=['employee_id', 'department_id', 'monthly_ctc'] + COMPONENTS)
+    frame[['monthly_ctc'] + COMPONENTS] = frame[['monthly_ctc'] + COMPONENTS].fillna(0.0).astype(float)
+    return frame.set_index('employee_id')
+
+
+def apply_hike(frame, percent, department_id=None):
+    """Return a copy of ``frame`` with CTC and components raised by ``percent``.
+
+    Limited to one department when ``department_id`` is given. Nothing is written.
+    """
+    frame = frame.copy()
+    mask = np.ones(len(frame), dtype=bool) if department_id is None else (frame['department_id'] == department_id).to_numpy()
+    columns = ['monthly_ctc'] + COMPONENTS
+    values = frame[columns].to_numpy(copy=True)
+    values[mask] *= 1 + percent / 100.0
+    frame[columns] = values
+    return frame
+
+
+def _slab_tax(income, slabs):
+    """Progressive tax on an array of incomes for (from, rate) slabs."""
+    lowers = np.array([lower for lower, _ in slabs], dtype=float)
+    rates = np.array([rate for _, rate in slabs], dtype=float)
+    uppers = np.append(lowers[1:], np.inf)
+    taxed = np.clip(income[:, None], lowers, uppers) - lowers
+    return taxed @ rates
+
+
+def annual_tds(annual_gross, rules):
+    """Projected annual income tax (new regime) for an array of annual gross salaries."""
+    taxable = np.maximum(annual_gross - rules['tds_standard_deduction'], 0.0)
+    tax = _slab_tax(taxable, rules['tds_slabs'])
+    limit = rules['tds_rebate_limit']
+    # 87A rebate, with marginal relief just above the limit
+    tax = np.where(taxable <= limit, 0.0, np.minimum(tax, taxable - limit))
+    return tax * (1 + rules['tds_cess'])
+
+
+def professional_tax(gross, state):
+    slabs = current_app.config.get('PAYROLL_PT_SLABS', PT_SLABS).get(state) or PT_SLABS['Default']
+    lowers = np.array([lower for lower, _ in slabs], dtype=float)
+    amounts = np.array([amount for _, amount in slabs], dtype=float)
+    return amounts[np.searchsorted(lowers, gross, side='right') - 1]
+
+
+def compute(frame, rules=None, earned=None):
+    """Statutory deductions and TDS for every row of a structures frame.
+
+    ``earned`` is an optional per-row fraction of the month actually paid (for
+    joiners, leavers and LOP); PF, ESI and PT are charged on earned wages while
+    ESI eligibility and the TDS projection use the full monthly structure.
+    Pure array arithmetic: the database is not touched.
+    """
+    rules = rules or get_rules()
+    basic = frame['basic'].to_numpy()
+    gross = frame[COMPONENTS].to_numpy().sum(axis=1)
+    scale = np.ones(len(frame)) if earned is None else np.asarray(earned, dtype=float)
+
+    pf_wage = basic * scale
+    if rules['pf_wage_ceiling']:
+        pf_wage = np.minimum(pf_wage, rules['pf_wage_ceiling'])
+    pf = np.round(pf_wage * rules['pf_rate'])
+
+    esi_eligible = gross <= rules['esi_wage_limit']
+    esi = np.where(esi_eligible, np.ceil(gross * scale * rules['esi_rate']), 0.0)
+
+    pt = professional_tax(gross * scale, rules['pt_state'])
+    tds = np.round(annual_tds(gross * 12, rules) / 12)
+
+    deductions = pf + esi + pt + tds
+    return pd.DataFrame({
+        'gross': gross,
+        'pf': pf,
+        'esi_eligible': esi_eligible,
+        'esi': esi,
+        'professional_tax': pt,
+        'tds': tds,
+        'total_deductions': deductions,
+        'net': gross * scale - deductions,
+    }, index=frame.index)
+
+
+def what_if(percent, department_id=None, frame=None, rules=None):
+    """Org-wide totals before and after a hike, computed entirely in memory."""
+    frame = load_structures() if frame is None else frame
+    rules = rules or get_rules()
+    before = compute(frame, rules)
+    after = compute(apply_hike(frame, percent, department_id), rules)
+    columns = ['gross', 'pf', 'esi', 'professional_tax', 'tds', 'net']
+    return pd.DataFrame({'before': before[columns].sum(), 'after': after[columns].sum()}).assign(
+        change=lambda t: t['after'] - t['before']
+    )
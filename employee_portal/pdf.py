@@ -428,89 +428,121 @@ def generate_offer_letter_pdf(employee, salary_structure):
     pdf.output(output_path)
     return pdf_file
 
-def generate_transactions_pdf(transactions, title, total_amount):
-    # Orientation set to Landscape
-    pdf = FPDF(orientation='L', unit='mm', format='A4')
-    pdf.set_auto_page_break(auto=True, margin=15)
+LOGO_PATH = os.path.join(os.path.dirname(__file__), 'static', 'img', 'logo.PNG')
+_logo_path = None
+
+
+def _place_logo(pdf, x, y, w):
+    """Draw the company logo if it is installed; the lookup is done once per process."""
+    global _logo_path
+    if _logo_path is None:
+        _logo_path = LOGO_PATH if os.path.exists(LOGO_PATH) else ''
+    if _logo_path:
+        pdf.image(_logo_path, x=x, y=y, w=w)
+
+
+def _latin1(value):
+    # The core PDF fonts only cover Latin-1
+    return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+
+class TransactionReportPDF(FPDF):
+    # (heading, width, alignment) per column; landscape A4 leaves 277mm
+    COLUMNS = [('Date', 25, 'C'), ('Category', 30, 'C'), ('Paid By', 35, 'C'), ('Description', 67, 'L'),
+               ('Reference', 35, 'C'), ('Mode', 30, 'C'), ('Amount (INR)', 35, 'R')]
+
+    def __init__(self, title):
+        super().__init__(orientation='L', unit='mm', format='A4')
+        self.report_title = _latin1(title)
+        self.generated = datetime.now().strftime('%d %b %Y %H:%M')
+        self.in_table = False
+        self.set_auto_page_break(auto=True, margin=15)
+        self.alias_nb_pages()
+
+    def header(self):
+        if self.page_no() == 1:
+            _place_logo(self, 10, 10, 30)
+            self.set_font("Arial", 'B', 16)
+            self.cell(0, 10, txt="Gentize Innovations Private Limited", ln=True, align='C')
+            self.set_font("Arial", 'B', 12)
+            self.cell(0, 8, txt=self.report_title, ln=True, align='C')
+            self.ln(6)
+        else:
+            self.set_font("Arial", 'I', 8)
+            self.cell(0, 6, txt=self.report_title, ln=True, align='R')
+        if self.in_table:
+            self.table_header()
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font("Arial", 'I', 8)
+        self.cell(0, 5, txt=f"Generated on {self.generated}", align='L')
+        self.cell(0, 5, txt=f"Page {self.page_no()}/{{nb}}", align='R')
+
+    def table_header(self):
+        self.set_fill_color(240, 240, 240)
+        self.set_font("Arial", 'B', 10)
+        for heading, width, _ in self.COLUMNS:
+            self.cell(width, 10, heading, border=1, fill=True, align='C')
+        self.ln()
+        self.set_font("Arial", '', 9)
+
+    def row(self, day, category, paid_by, description, reference, mode, amount):
+        description = description or ''
+        if len(description) >= 30:
+            description = description[:27] + "..."
+        values = (day.strftime('%d-%b-%Y'), category or '-', paid_by or '-', description, reference or '-',
+                  mode or '-', f"{amount:,.2f}")
+        for (_, width, align), value in zip(self.COLUMNS, values):
+            self.cell(width, 8, _latin1(value), border=1, align=align)
+        self.ln()
+
+
+def render_transactions_pdf(rows, title, subtotals):
+    """Transaction report as PDF bytes.
+
+    ``rows`` is an iterable of (date, category, paid_by, description,
+    reference, mode, amount) tuples and is consumed once, so it can stream
+    straight from the database. ``subtotals`` is [(category, count, amount)]
+    and gives the summary and the grand total.
+    """
+    pdf = TransactionReportPDF(title)
+    pdf.in_table = True
     pdf.add_page()
-    
-    # Header - Company Name
-    logo_path = os.path.join(os.path.dirname(__file__), 'static', 'img', 'logo.PNG')
-    if os.path.exists(logo_path):
-        pdf.image(logo_path, x=10, y=10, w=30)
-        
-    pdf.set_font("Arial", 'B', 16)
-    # Move to the right of the logo or center? The logo is at x=10.
-    # Let's Center the company name but account for logo? Or just Center as before.
-    # If logo is there, maybe move Y down or put logo on side.
-    # Existing code: pdf.cell(0, 10, txt="Gentize Innovations Private Limited", ln=True, align='C')
-    # I'll keep it centered but maybe ensure it doesn't overlap if logo is big. 30mm width is small.
-    pdf.cell(0, 10, txt="Gentize Innovations Private Limited", ln=True, align='C')
-    
-    # Report Title
-    # pdf.set_font("Arial", 'B', 14)
-    # pdf.cell(0, 10, txt=title, ln=True, align='C')
-    pdf.ln(10)
-    
-    # Table Header
+    for row in rows:
+        pdf.row(*row)
+    pdf.in_table = False
+
+    label_width = sum(width for _, width, _ in pdf.COLUMNS[:-1])
+    amount_width = pdf.COLUMNS[-1][1]
+    total = sum(amount for _, _, amount in subtotals)
+    pdf.set_font("Arial", 'B', 10)
+    pdf.set_fill_color(245, 245, 245)
+    pdf.cell(label_width, 10, "TOTAL", border=1, fill=True, align='R')
+    pdf.cell(amount_width, 10, f"{total:,.2f}", border=1, fill=True, ln=True, align='R')
+
+    # Category summary
+    if pdf.get_y() + 20 + 8 * len(subtotals) > pdf.page_break_trigger:
+        pdf.add_page()
+    pdf.ln(8)
+    pdf.set_font("Arial", 'B', 11)
+    pdf.cell(0, 8, "Summary by Category", ln=True)
     pdf.set_fill_color(240, 240, 240)
     pdf.set_font("Arial", 'B', 10)
-    
-    # Columns: Date (25), Category (30), Paid By (35), Description (67), Reference (35), Mode (30), Amount (35)
-    
-    col_date = 25
-    col_cat = 30
-    col_paid = 35
-    col_desc = 67
-    col_ref = 35
-    col_mode = 30
-    col_amt = 35
-    
-    pdf.cell(col_date, 10, "Date", border=1, fill=True, align='C')
-    pdf.cell(col_cat, 10, "Category", border=1, fill=True, align='C')
-    pdf.cell(col_paid, 10, "Paid By", border=1, fill=True, align='C')
-    pdf.cell(col_desc, 10, "Description", border=1, fill=True, align='C')
-    pdf.cell(col_ref, 10, "Reference", border=1, fill=True, align='C')
-    pdf.cell(col_mode, 10, "Mode", border=1, fill=True, align='C')
-    pdf.cell(col_amt, 10, "Amount (INR)", border=1, ln=True, fill=True, align='C')
-    
-    # Table Content
+    pdf.cell(90, 8, "Category", border=1, fill=True)
+    pdf.cell(30, 8, "Transactions", border=1, fill=True, align='C')
+    pdf.cell(amount_width, 8, "Amount (INR)", border=1, fill=True, ln=True, align='R')
     pdf.set_font("Arial", '', 9)
-    
-    for t in transactions:
-        date_str = t.date.strftime('%d-%b-%Y')
-        desc = t.description if len(t.description) < 30 else t.description[:27] + "..."
-        ref = t.reference_number or '-'
-        # For Credit transactions, 'paid_by' might not exist or be relevant, handle safely
-        paid_by = getattr(t, 'paid_by', '-') or '-'
-        
-        pdf.cell(col_date, 8, date_str, border=1, align='C')
-        pdf.cell(col_cat, 8, t.category, border=1, align='C')
-        pdf.cell(col_paid, 8, paid_by, border=1, align='C')
-        pdf.cell(col_desc, 8, desc, border=1, align='L')
-        pdf.cell(col_ref, 8, ref, border=1, align='C')
-        pdf.cell(col_mode, 8, t.payment_mode, border=1, align='C')
-        pdf.cell(col_amt, 8, f"{t.amount:,.2f}", border=1, ln=True, align='R')
-        
-    # Total Row
+    for category, count, amount in subtotals:
+        pdf.cell(90, 8, _latin1(category), border=1)
+        pdf.cell(30, 8, str(count), border=1, align='C')
+        pdf.cell(amount_width, 8, f"{amount:,.2f}", border=1, ln=True, align='R')
     pdf.set_font("Arial", 'B', 10)
-    pdf.set_fill_color(245, 245, 245)
-    pdf.cell(col_date + col_cat + col_paid + col_desc + col_ref + col_mode, 10, "TOTAL", border=1, fill=True, align='R')
-    pdf.cell(col_amt, 10, f"{total_amount:,.2f}", border=1, fill=True, ln=True, align='R')
-    
-    # Footer
-    pdf.ln(10)
-    pdf.set_font("Arial", 'I', 8)
-    from datetime import datetime
-    pdf.cell(0, 5, txt=f"Generated on {datetime.now().strftime('%d %b %Y %H:%M')}", ln=True, align='R')
+    pdf.cell(90, 8, "TOTAL", border=1, fill=True)
+    pdf.cell(30, 8, str(sum(count for _, count, _ in subtotals)), border=1, fill=True, align='C')
+    pdf.cell(amount_width, 8, f"{total:,.2f}", border=1, fill=True, ln=True, align='R')
 
-    filename = f"transaction_report_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-    instance_path = os.path.join(os.path.dirname(__file__), '..', 'instance')
-    if not os.path.exists(instance_path):
-        os.makedirs(instance_path)
-    output_path = os.path.join(instance_path, filename)
-    pdf.output(output_path)
-    return filename
+    return pdf.output(dest='S').encode('latin-1')
 
 def generate_bill_estimate_pdf(data):
     pdf = FPDF(orientation='P', unit='mm', format='A4')
@@ -0,0 +1,256 @@
+import atexit
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from functools import lru_cache
+from flask import current_app, g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Bind placeholders in any of the DBAPI paramstyles the app runs on
+_PARAM = r'(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)'
+_PARAM_LIST = re.compile(rf'\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)')
+_REPEATED_LIST = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![$\w])\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+logger = logging.getLogger(__name__)
+
+_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+_SKIP = {os.path.abspath(__file__), os.path.join(_PACKAGE, 'replicas.py')}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS endpoints (
+    endpoint TEXT PRIMARY KEY, requests INTEGER, total_ms REAL, max_ms REAL,
+    db_ms REAL, queries INTEGER, duplicates INTEGER, n_plus_one INTEGER
+);
+CREATE TABLE IF NOT EXISTS statements (
+    endpoint TEXT, shape TEXT, executions INTEGER, total_ms REAL, max_ms REAL,
+    n_plus_one INTEGER, location TEXT, PRIMARY KEY (endpoint, shape)
+);
+"""
+_MERGE_ENDPOINT = """
+INSERT INTO endpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (endpoint) DO UPDATE SET
+    requests = requests + excluded.requests, total_ms = total_ms + excluded.total_ms,
+    max_ms = max(max_ms, excluded.max_ms), db_ms = db_ms + excluded.db_ms, queries = queries + excluded.queries,
+    duplicates = duplicates + excluded.duplicates, n_plus_one = n_plus_one + excluded.n_plus_one
+"""
+_MERGE_STATEMENT = """
+INSERT INTO statements VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (endpoint, shape) DO UPDATE SET
+    executions = executions + excluded.executions, total_ms = total_ms + excluded.total_ms,
+    max_ms = max(max_ms, excluded.max_ms), n_plus_one = n_plus_one + excluded.n_plus_one,
+    location = COALESCE(excluded.location, location)
+"""
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(sql):
+    """``sql`` with literals and IN/VALUES lists collapsed, so repeats of one query compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PARAM_LIST.sub('(...)', sql)
+    sql = _REPEATED_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _caller():
+    """Where in the app the current statement was issued from, e.g. ``admin/routes.py:120 in org_chart_api``."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_PACKAGE) and filename not in _SKIP:
+            location = os.path.relpath(filename, _PACKAGE)
+            # Compiled templates keep their source name but not its line numbers
+            if filename.endswith('.html'):
+                return location
+            return f'{location}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class PerfStore:
+    """Per-endpoint and per-statement totals, shared by all workers through a SQLite file.
+
+    Each worker adds up its requests in memory and merges them into the
+    file at most every ``flush_interval`` seconds (and on exit), so the
+    page sees every worker's traffic without a write per request.
+    """
+
+    def __init__(self, path, flush_interval):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._statements = {}
+        self._flushed_at = time.monotonic()
+        self._ready = False
+
+    def _connect(self):
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            connection.executescript(_SCHEMA)
+            self._ready = True
+        return connection
+
+    def add(self, endpoint, total_ms, db_ms, queries, duplicates, statements):
+        """Count one request; ``statements`` is ``[(shape, executions, total_ms, max_ms, n_plus_one, location)]``."""
+        with self._lock:
+            e = self._endpoints.setdefault(endpoint, [0, 0.0, 0.0, 0.0, 0, 0, 0])
+            e[0] += 1
+            e[1] += total_ms
+            e[2] = max(e[2], total_ms)
+            e[3] += db_ms
+            e[4] += queries
+            e[5] += duplicates
+            e[6] += any(flagged for _, _, _, _, flagged, _ in statements)
+            for shape, executions, shape_ms, max_ms, flagged, location in statements:
+                s = self._statements.setdefault((endpoint, shape), [0, 0.0, 0.0, 0, None])
+                s[0] += executions
+                s[1] += shape_ms
+                s[2] = max(s[2], max_ms)
+                s[3] += flagged
+                s[4] = location or s[4]
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            endpoints, self._endpoints = self._endpoints, {}
+            statements, self._statements = self._statements, {}
+            self._flushed_at = time.monotonic()
+        if not endpoints and not statements:
+            return
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(_MERGE_ENDPOINT, [(k, *v) for k, v in endpoints.items()])
+                connection.executemany(_MERGE_STATEMENT, [(*k, *v) for k, v in statements.items()])
+        except (OSError, sqlite3.Error) as e:
+            # Losing a few seconds of timings is better than failing the request
+            logger.warning('Performance store write failed: %s', e)
+
+    def _query(self, sql, *params):
+        self.flush()
+        with closing(self._connect()) as connection, connection:
+            connection.row_factory = sqlite3.Row
+            return [dict(row) for row in connection.execute(sql, params)]
+
+    def slowest_endpoints(self, order='total', limit=25):
+        """Endpoints by total time spent in them, or by average time per request when ``order='avg'``."""
+        key = 'avg_ms' if order == 'avg' else 'total_ms'
+        return self._query(
+            f"SELECT endpoint, requests, total_ms, total_ms / requests AS avg_ms, max_ms, db_ms / requests AS avg_db_ms, "
+            f"CAST(queries AS REAL) / requests AS avg_queries, CAST(duplicates AS REAL) / requests AS avg_duplicates, "
+            f"n_plus_one FROM endpoints ORDER BY {key} DESC LIMIT ?", limit)
+
+    def slowest_statements(self, limit=25):
+        return self._query(
+            "SELECT endpoint, shape, executions, total_ms, total_ms / executions AS avg_ms, max_ms, n_plus_one, location "
+            "FROM statements ORDER BY total_ms DESC LIMIT ?", limit)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints, self._statements = {}, {}
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM endpoints')
+            connection.execute('DELETE FROM statements')
+
+
+def store():
+    return current_app.extensions.get('perf')
+
+
+def _before_request():
+    g._perf = {'started': time.perf_counter(), 'queries': 0, 'db': 0.0, 'shapes': {},
+               'threshold': current_app.config.get('PERF_N_PLUS_ONE_THRESHOLD', 5)}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and '_perf' in g:
+        conn.info.setdefault('perf_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('perf_started')
+    if not started or not has_request_context() or '_perf' not in g:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    state = g._perf
+    state['queries'] += 1
+    state['db'] += elapsed
+    shape = statement_shape(statement)
+    entry = state['shapes'].get(shape)
+    if entry is None:
+        entry = state['shapes'][shape] = [0, 0.0, 0.0, None]
+    entry[0] += 1
+    entry[1] += elapsed
+    entry[2] = max(entry[2], elapsed)
+    if entry[0] == state['threshold']:
+        entry[3] = _caller()
+
+
+def _handle_error(context):
+    # The statement failed, so no after_cursor_execute will pop its start time
+    started = context.connection.info.get('perf_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def _after_request(response):
+    state = g.pop('_perf', None)
+    if state is None:
+        return response
+    total_ms = (time.perf_counter() - state['started']) * 1000
+    db_ms = state['db'] * 1000
+    # Query counts and DB time are internal detail, so only admins get them
+    if (current_app.config.get('PERF_SERVER_TIMING', True) and current_user.is_authenticated
+            and current_user.role == 'admin'):
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{state["queries"]} queries"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+    endpoint = request.endpoint
+    perf_store = store()
+    if endpoint is None or endpoint == 'static' or perf_store is None:
+        return response
+    threshold = state['threshold']
+    statements = []
+    for shape, (executions, seconds, longest, location) in state['shapes'].items():
+        flagged = executions >= threshold
+        if flagged:
+            reported = current_app.extensions['perf_reported']
+            if (endpoint, shape) not in reported:
+                reported.add((endpoint, shape))
+                current_app.logger.warning(
+                    f'Possible N+1 in {endpoint}: {executions} x {shape[:200]} (from {location or "unknown"})')
+        statements.append((shape, executions, seconds * 1000, longest * 1000, int(flagged), location))
+    duplicates = sum(executions - 1 for executions, _, _, _ in state['shapes'].values())
+    perf_store.add(endpoint, total_ms, db_ms, state['queries'], duplicates, statements)
+    return response
+
+
+def init_app(app):
+    if not app.config.get('PERF_INSTRUMENTATION'):
+        return
+    path = app.config.get('PERF_STORE_PATH') or os.path.join(app.instance_path, 'perf.sqlite3')
+    perf_store = PerfStore(path, app.config.get('PERF_FLUSH_SECONDS', 10))
+    app.extensions['perf'] = perf_store
+    app.extensions['perf_reported'] = set()
+    atexit.register(perf_store.flush)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    # On the Engine class, so the primary, the replicas and engines created later are all covered
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
@@ -0,0 +1,41 @@
+import os
+import weakref
+from importlib import import_module
+from employee_portal import db
+
+# Loaded by the views that need them on first use; warm() imports them up front
+HEAVY_MODULES = (
+    'employee_portal.excel',         # pandas, openpyxl
+    'employee_portal.pdf',           # fpdf, pypdf
+    'employee_portal.payroll_days',  # numpy, pandas
+    'employee_portal.payroll_rules',
+    'employee_portal.faces',         # numpy, Pillow
+    'PIL.Image',
+    'PIL.features',
+)
+
+_engines = weakref.WeakSet()
+
+
+def warm():
+    """Import HEAVY_MODULES now, so a preloading server's workers share them copy-on-write."""
+    for name in HEAVY_MODULES:
+        import_module(name)
+
+
+def _after_fork():
+    # Pooled connections opened before the fork belong to the parent; the child opens its own
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def init_app(app):
+    with app.app_context():
+        _engines.update(db.engines.values())
+    _engines.update(replica.engine for replica in app.extensions.get('replicas', []))
+    if app.config.get('PRELOAD_HEAVY_MODULES'):
+        warm()
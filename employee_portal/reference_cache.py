@@ -0,0 +1,172 @@
+import os
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from employee_portal import db
+from employee_portal.models import User, Role, Designation, Department, EmployeeProfile, Vendor, AuthorizedSignature, JobOpening
+
+
+def _roles():
+    return db.session.query(Role.id, Role.name).order_by(Role.id).all()
+
+
+def _designations():
+    return db.session.query(Designation.id, Designation.title).order_by(Designation.id).all()
+
+
+def _departments():
+    return db.session.query(Department.id, Department.name).order_by(Department.id).all()
+
+
+def _employees():
+    rows = db.session.query(EmployeeProfile.id, EmployeeProfile.first_name, EmployeeProfile.last_name).filter(
+        EmployeeProfile.is_resigned == False
+    ).order_by(EmployeeProfile.first_name).all()
+    return [(emp_id, f"{first} {last}") for emp_id, first, last in rows]
+
+
+def _employees_with_id():
+    rows = db.session.query(EmployeeProfile.id, EmployeeProfile.first_name, EmployeeProfile.last_name, User.employeeid).outerjoin(
+        User, User.id == EmployeeProfile.user_id
+    ).filter(EmployeeProfile.is_resigned == False).order_by(EmployeeProfile.first_name).all()
+    return [(emp_id, f"{first} {last} ({employeeid})") for emp_id, first, last, employeeid in rows]
+
+
+def _role_members(role_id):
+    rows = db.session.query(EmployeeProfile.id, EmployeeProfile.first_name, EmployeeProfile.last_name).join(
+        User, User.id == EmployeeProfile.user_id
+    ).filter(User.role_id == role_id, EmployeeProfile.is_resigned == False).order_by(EmployeeProfile.id).all()
+    return [(emp_id, f"{first} {last}") for emp_id, first, last in rows]
+
+
+def _users():
+    rows = db.session.query(User.id, User.employeeid, User.email).order_by(User.id).all()
+    return [(user_id, f"{employeeid} ({email})") for user_id, employeeid, email in rows]
+
+
+def _vendors():
+    return db.session.query(Vendor.id, Vendor.name).order_by(Vendor.id).all()
+
+
+def _signatures():
+    return db.session.query(AuthorizedSignature.id, AuthorizedSignature.name).order_by(AuthorizedSignature.id).all()
+
+
+def _open_jobs():
+    return db.session.query(JobOpening.id, JobOpening.title).filter(JobOpening.status == 'Open').order_by(JobOpening.id).all()
+
+
+_PROFILE_NAME = ('first_name', 'last_name', 'is_resigned')
+
+# entity -> (loader, {table: columns whose changes invalidate it}).
+# Inserts and deletes on a watched table always invalidate.
+ENTITIES = {
+    'roles': (_roles, {'role': ('name',)}),
+    'designations': (_designations, {'designation': ('title',)}),
+    'departments': (_departments, {'department': ('name',)}),
+    'employees': (_employees, {'employee_profile': _PROFILE_NAME}),
+    'employees_with_id': (_employees_with_id, {'employee_profile': _PROFILE_NAME + ('user_id',), 'user': ('employeeid',)}),
+    'role_members': (_role_members, {'employee_profile': _PROFILE_NAME + ('user_id',), 'user': ('role_id',)}),
+    'users': (_users, {'user': ('employeeid', 'email')}),
+    'vendors': (_vendors, {'vendor': ('name',)}),
+    'signatures': (_signatures, {'authorized_signature': ('name',)}),
+    'open_jobs': (_open_jobs, {'job_opening': ('title', 'status')}),
+}
+
+
+def _state():
+    return current_app.extensions['reference_cache']
+
+
+def _stamp_path(entity):
+    return os.path.join(current_app.instance_path, 'reference_cache', entity)
+
+
+def version(entity):
+    """Current version of an entity's choices.
+
+    Combines a per-process counter (bumped on commit) with the mtime of a
+    stamp file under the instance folder, so commits made by other worker
+    processes invalidate this process's copy too.
+    """
+    try:
+        shared = os.stat(_stamp_path(entity)).st_mtime_ns
+    except OSError:
+        shared = 0
+    return _state()['versions'].get(entity, 0), shared
+
+
+def choices(entity, *args):
+    """Return the cached ``[(id, label), ...]`` list for an entity, loading it if stale."""
+    state = _state()
+    key = (entity, args)
+    current = version(entity)
+    cached = state['entries'].get(key)
+    if cached and cached[0] == current:
+        return cached[1]
+    loader, _ = ENTITIES[entity]
+    rows = [(pk, label) for pk, label in loader(*args)]
+    state['entries'][key] = (current, rows)
+    return rows
+
+
+def invalidate(*entities):
+    """Bump the version of the given entities (all of them when none are given)."""
+    state = _state()
+    for entity in entities or ENTITIES:
+        state['versions'][entity] = state['versions'].get(entity, 0) + 1
+        path = _stamp_path(entity)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as stamp:
+                stamp.write(str(time.time_ns()))
+        except OSError:
+            pass
+
+
+def _touched(session):
+    return session.info.setdefault('reference_cache_touched', set())
+
+
+def _after_flush(session, flush_context):
+    touched = _touched(session)
+    for obj in session.new | session.deleted:
+        touched.add((obj.__table__.name, None))
+    for obj in session.dirty:
+        state = inspect(obj)
+        for attr in state.mapper.column_attrs:
+            if state.attrs[attr.key].history.has_changes():
+                touched.add((obj.__table__.name, attr.key))
+
+
+def _do_orm_execute(execute_state):
+    # Bulk insert/update/delete statements bypass the flush
+    if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+        table = getattr(execute_state.statement, 'table', None)
+        if table is not None:
+            _touched(execute_state.session).add((table.name, None))
+
+
+def _after_commit(session):
+    touched = session.info.pop('reference_cache_touched', None)
+    if not touched or not has_app_context() or 'reference_cache' not in current_app.extensions:
+        return
+    stale = [
+        entity for entity, (_, watch) in ENTITIES.items()
+        if any(table in watch and (column is None or column in watch[table]) for table, column in touched)
+    ]
+    if stale:
+        invalidate(*stale)
+
+
+def _after_rollback(session):
+    session.info.pop('reference_cache_touched', None)
+
+
+def init_app(app):
+    app.extensions['reference_cache'] = {'entries': {}, 'versions': {}}
+    if not event.contains(db.session, 'after_commit', _after_commit):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'do_orm_execute', _do_orm_execute)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
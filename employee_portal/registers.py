@@ -0,0 +1,178 @@
+from datetime import datetime
+from sqlalchemy.orm import joinedload
+from employee_portal import db
+from employee_portal.models import Credit, Debit, Invoice, PurchaseOrder, Vendor, CashDailyTotal
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Per register: the model, its amount column, equality filters by query-string
+# name (each backed by a (column, date, id) index), and relationships the
+# listing renders.
+REGISTERS = {
+    'debits': {'model': Debit, 'amount': Debit.amount,
+               'filters': {'category': Debit.category, 'paid_by': Debit.paid_by}, 'load': ()},
+    'credits': {'model': Credit, 'amount': Credit.amount,
+                'filters': {'category': Credit.category}, 'load': ()},
+    'invoices': {'model': Invoice, 'amount': Invoice.amount,
+                 'filters': {'status': Invoice.status, 'vendor_id': Invoice.vendor_id}, 'load': ('vendor',)},
+    'purchase_orders': {'model': PurchaseOrder, 'amount': PurchaseOrder.total_amount,
+                        'filters': {'status': PurchaseOrder.status, 'vendor_id': PurchaseOrder.vendor_id},
+                        'load': ('vendor',)},
+}
+
+
+class Page:
+    """One keyset page of a register plus the totals of the whole filtered set."""
+
+    def __init__(self, items, next_cursor, prev_cursor, count, total, filters):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.count = count
+        self.total = total
+        self.filters = filters
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def encode_cursor(row):
+    return f'{row.date.isoformat()}.{row.id}'
+
+
+def decode_cursor(value):
+    """(date, id) from a cursor token, or None if it is malformed."""
+    try:
+        day, row_id = value.split('.', 1)
+        return datetime.strptime(day, '%Y-%m-%d').date(), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except ValueError:
+        return None
+
+
+def parse_filters(name, args):
+    """The filters of a register that are present and valid in a request's query string."""
+    register = REGISTERS[name]
+    filters = {}
+    for key, column in register['filters'].items():
+        value = args.get(key)
+        if value:
+            filters[key] = int(value) if key.endswith('_id') and value.isdigit() else value
+    for key, parse in (('amount_min', _float), ('amount_max', _float), ('date_from', _date), ('date_to', _date)):
+        value = parse(args.get(key))
+        if value is not None:
+            filters[key] = value
+    # The old exact-amount search becomes a one-paisa window
+    amount = _float(args.get('amount'))
+    if amount is not None:
+        filters.setdefault('amount_min', round(amount - 0.005, 3))
+        filters.setdefault('amount_max', round(amount + 0.005, 3))
+    return filters
+
+
+def filtered_query(name, filters):
+    register = REGISTERS[name]
+    model, amount = register['model'], register['amount']
+    query = model.query
+    for key, column in register['filters'].items():
+        if key in filters:
+            query = query.filter(column == filters[key])
+    if 'amount_min' in filters:
+        query = query.filter(amount >= filters['amount_min'])
+    if 'amount_max' in filters:
+        query = query.filter(amount <= filters['amount_max'])
+    if 'date_from' in filters:
+        query = query.filter(model.date >= filters['date_from'])
+    if 'date_to' in filters:
+        query = query.filter(model.date <= filters['date_to'])
+    return query
+
+
+# Filters the daily cash rollup can answer on its own
+ROLLUP_FILTERS = {'category', 'date_from', 'date_to'}
+
+
+def _rollup_totals(name, filters):
+    amount, count = (CashDailyTotal.credits, CashDailyTotal.credit_count) if name == 'credits' else \
+        (CashDailyTotal.debits, CashDailyTotal.debit_count)
+    query = db.session.query(db.func.coalesce(db.func.sum(count), 0), db.func.coalesce(db.func.sum(amount), 0.0))
+    if 'category' in filters:
+        query = query.filter(CashDailyTotal.category == filters['category'])
+    if 'date_from' in filters:
+        query = query.filter(CashDailyTotal.day >= filters['date_from'])
+    if 'date_to' in filters:
+        query = query.filter(CashDailyTotal.day <= filters['date_to'])
+    return query.one()
+
+
+def totals(name, filters):
+    """Row count and amount total of the filtered set, in one aggregate query.
+
+    Debits and credits filtered only by category and dates are summed from
+    the per-day cash rollup instead of the transactions.
+    """
+    if name in ('debits', 'credits') and set(filters) <= ROLLUP_FILTERS:
+        count, total = _rollup_totals(name, filters)
+        return int(count), round(total, 2)
+    amount = REGISTERS[name]['amount']
+    count, total = filtered_query(name, filters).with_entities(
+        db.func.count(), db.func.coalesce(db.func.sum(amount), 0.0)
+    ).one()
+    return count, round(total, 2)
+
+
+def fetch(name, args, page_size=PAGE_SIZE):
+    """A page of a register, newest first, for the filters and cursor in ``args``.
+
+    Pages are addressed by keyset on (date, id): ``after`` continues past a
+    row toward older entries and ``before`` goes back toward newer ones, so
+    every page costs the same however deep it is.
+    """
+    register = REGISTERS[name]
+    model = register['model']
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    filters = parse_filters(name, args)
+    query = filtered_query(name, filters).options(*[joinedload(getattr(model, rel)) for rel in register['load']])
+    key = db.tuple_(model.date, model.id)
+
+    after, before = decode_cursor(args.get('after')), decode_cursor(args.get('before'))
+    if before:
+        rows = query.filter(key > db.tuple_(*before)).order_by(model.date.asc(), model.id.asc()).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        prev_cursor = encode_cursor(rows[0]) if rows and has_more else None
+    else:
+        if after:
+            query = query.filter(key < db.tuple_(*after))
+        rows = query.order_by(model.date.desc(), model.id.desc()).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+        prev_cursor = encode_cursor(rows[0]) if rows and after else None
+
+    count, total = totals(name, filters)
+    return Page(rows, next_cursor, prev_cursor, count, total, filters)
+
+
+def choices(column):
+    """Distinct non-empty values of an indexed column, for filter dropdowns."""
+    return [value for value, in db.session.query(column).filter(column.isnot(None), column != '').distinct().order_by(column).all()]
+
+
+def vendor_choices():
+    return db.session.query(Vendor.id, Vendor.name).order_by(Vendor.name).all()
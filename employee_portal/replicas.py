@@ -0,0 +1,168 @@
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError, InterfaceError
+
+_LAG_SQL = sa.text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+_REPLAYED_SQL = sa.text("SELECT pg_is_in_recovery() AND pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)")
+
+
+class Replica:
+    """A read replica engine and what was last learned about its health."""
+
+    def __init__(self, engine, max_lag, check_interval, retry_after):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self.lag = 0.0
+        self.checked_at = 0.0
+        self.down_until = 0.0
+
+    def mark_down(self, error):
+        current_app.logger.warning(f'Read replica {self.engine.url!r} unavailable, using the primary: {error}')
+        self.down_until = time.monotonic() + self.retry_after
+
+    def usable(self):
+        now = time.monotonic()
+        if now < self.down_until:
+            return False
+        if self.engine.dialect.name == 'postgresql' and now - self.checked_at >= self.check_interval:
+            try:
+                with self.engine.connect() as connection:
+                    self.lag = float(connection.execute(_LAG_SQL).scalar())
+                self.checked_at = now
+            except sa.exc.DBAPIError as e:
+                self.mark_down(e)
+                return False
+        return self.lag <= self.max_lag
+
+    def has_replayed(self, lsn):
+        """Whether this replica has applied the primary's WAL up to ``lsn``."""
+        if lsn is None or self.engine.dialect.name != 'postgresql':
+            return False
+        try:
+            with self.engine.connect() as connection:
+                return bool(connection.execute(_REPLAYED_SQL, {'lsn': lsn}).scalar())
+        except sa.exc.DBAPIError as e:
+            self.mark_down(e)
+            return False
+
+
+def _marked():
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'read_replica', False) and bool(current_app.extensions.get('replicas'))
+
+
+def _replica_for():
+    """The replica engine for this request's reads, or None to stay on the primary.
+
+    Requests that have written only read from a replica that has replayed
+    their last commit, and never while their own writes are uncommitted.
+    """
+    if not g.get('_read_replica') or g.get('_replica_dirty'):
+        return None
+    replica = g.get('_replica')
+    if replica is None:
+        healthy = [r for r in current_app.extensions['replicas'] if r.usable()]
+        replica = g._replica = random.choice(healthy) if healthy else False
+    if not replica:
+        return None
+    lsn = g.get('_replica_lsn')
+    if g.get('_replica_wrote') and (lsn is None or g.get('_replica_synced') != lsn):
+        if not replica.has_replayed(lsn):
+            g._replica = False
+            return None
+        g._replica_synced = lsn
+    return replica.engine
+
+
+class RoutingSession(Session):
+    """Sends reads in routes marked with :func:`read_replica` to a configured replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context() or engine is not self._db.engines.get(None):
+            return engine
+        if self._flushing or getattr(clause, 'is_dml', False):
+            if not g.get('_replica_untracked'):
+                g._replica_dirty = g._replica_wrote = True
+                g.pop('_replica_lsn', None)
+            return engine
+        return _replica_for() or engine
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if not has_request_context() or not g.get('_replica_dirty'):
+        return
+    g._replica_dirty = False
+    engine = session._db.engines.get(None)
+    if _marked() and engine.dialect.name == 'postgresql':
+        # Where the primary's WAL stood just after this request's commit
+        with engine.connect() as connection:
+            g._replica_lsn = connection.exec_driver_sql('SELECT pg_current_wal_lsn()').scalar()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    if has_request_context():
+        g._replica_dirty = False
+
+
+@contextmanager
+def untracked_writes():
+    """Write to the primary without the request then reading its own writes from there.
+
+    For bookkeeping the request never reads back, like the ``last_seen``
+    heartbeat; commit inside the block.
+    """
+    g._replica_untracked = True
+    try:
+        yield
+    finally:
+        g._replica_untracked = False
+
+
+def read_replica(f):
+    """Serve a read-only view from a read replica when one is configured.
+
+    If the replica fails mid-request it is set aside for a while and the
+    view runs again on the primary, so only mark views without side effects.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_app.extensions.get('replicas'):
+            return f(*args, **kwargs)
+        g._read_replica = True
+        try:
+            return f(*args, **kwargs)
+        except (OperationalError, InterfaceError) as e:
+            replica = g.get('_replica')
+            if not replica:
+                raise
+            replica.mark_down(e)
+            db = current_app.extensions['sqlalchemy']
+            db.session.rollback()
+            g._read_replica = False
+            return f(*args, **kwargs)
+    decorated_function.read_replica = True
+    return decorated_function
+
+
+def init_app(app):
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_pre_ping', True)
+    app.extensions['replicas'] = [
+        Replica(sa.create_engine(url, **options), app.config.get('REPLICA_MAX_LAG_SECONDS', 30),
+                app.config.get('REPLICA_LAG_CHECK_SECONDS', 5), app.config.get('REPLICA_RETRY_SECONDS', 30))
+        for url in app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    ]
@@ -0,0 +1,84 @@
+import re
+from datetime import date, datetime, timedelta
+from employee_portal import db
+from employee_portal.models import Credit, Debit
+
+# Rows fetched per round trip while streaming a report
+STREAM_BATCH = 1000
+
+# First month of the financial year (April, as in India)
+FY_START_MONTH = 4
+
+
+def _month_start(year, month):
+    return date(year + (month - 1) // 12, (month - 1) % 12 + 1, 1)
+
+
+def parse_period(args):
+    """(start, end exclusive, label) for a report period from a request's arguments.
+
+    Accepts ``month=YYYY-MM``, ``quarter=YYYY-Qn`` (calendar quarters),
+    ``fy=YYYY`` (the financial year starting in April of that year) or
+    ``start``/``end`` dates (inclusive). Raises ValueError when none is valid.
+    """
+    if args.get('month'):
+        year, month = map(int, args['month'].split('-'))
+        start = date(year, month, 1)
+        return start, _month_start(year, month + 1), start.strftime('%B %Y')
+    if args.get('quarter'):
+        match = re.fullmatch(r'(\d{4})-?Q([1-4])', args['quarter'].strip(), re.I)
+        if not match:
+            raise ValueError('Quarter must look like 2026-Q1')
+        year, quarter = int(match.group(1)), int(match.group(2))
+        start = date(year, 3 * quarter - 2, 1)
+        return start, _month_start(year, 3 * quarter + 1), f'Q{quarter} {year}'
+    if args.get('fy'):
+        year = int(args['fy'][:4])
+        return date(year, FY_START_MONTH, 1), date(year + 1, FY_START_MONTH, 1), f'FY {year}-{str(year + 1)[-2:]}'
+    if args.get('start') and args.get('end'):
+        start = datetime.strptime(args['start'], '%Y-%m-%d').date()
+        end = datetime.strptime(args['end'], '%Y-%m-%d').date()
+        if end < start:
+            raise ValueError('End date is before start date')
+        return start, end + timedelta(days=1), f"{start.strftime('%d %b %Y')} - {end.strftime('%d %b %Y')}"
+    raise ValueError('No report period given')
+
+
+def _columns(model):
+    paid_by = model.paid_by if model is Debit else db.literal(None)
+    return (model.date, model.category, paid_by, model.description, model.reference_number,
+            model.payment_mode, model.amount)
+
+
+def stream_rows(model, start, end):
+    """Report rows as plain tuples in date order, fetched ``STREAM_BATCH`` at a time.
+
+    Only the printed columns are selected and no ORM objects are built, so
+    memory stays flat however long the period is.
+    """
+    query = db.session.query(*_columns(model)).filter(
+        model.date >= start, model.date < end
+    ).order_by(model.date.asc(), model.id.asc()).execution_options(yield_per=STREAM_BATCH)
+    yield from query
+
+
+def category_subtotals(model, start, end):
+    """[(category, count, amount)] for the period, computed in SQL, largest first."""
+    amount = db.func.sum(model.amount)
+    rows = db.session.query(model.category, db.func.count(model.id), amount).filter(
+        model.date >= start, model.date < end
+    ).group_by(model.category).order_by(amount.desc()).all()
+    return [(category or 'Uncategorized', count, total or 0.0) for category, count, total in rows]
+
+
+def transaction_report(kind, start, end, label):
+    """Render the debit or credit report for a period. Returns (pdf bytes, filename), or None if empty."""
+    from employee_portal.pdf import render_transactions_pdf
+    model = Debit if kind == 'debit' else Credit
+    subtotals = category_subtotals(model, start, end)
+    if not subtotals:
+        return None
+    title = f"{'Debit' if model is Debit else 'Credit'} Transactions - {label}"
+    data = render_transactions_pdf(stream_rows(model, start, end), title, subtotals)
+    filename = f"{model.__name__}_Transactions_{re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')}.pdf"
+    return data, filename
@@ -0,0 +1,135 @@
+import atexit
+import os
+import threading
+import time
+from sqlalchemy import event
+from employee_portal import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: the queue only serializes threads of one process
+    fcntl = None
+
+# Statements that never take SQLite's write lock
+_READS = ('SELECT', 'PRAGMA', 'EXPLAIN')
+
+
+class WriteQueue:
+    """Lets one connection at a time hold SQLite's write lock.
+
+    A thread lock queues writers inside a worker and an flock on a lock file
+    beside the database queues them across gunicorn workers, so writers wait
+    their turn instead of sleeping in SQLite's busy handler. Readers never
+    touch it; under WAL they run alongside the writer.
+    """
+
+    def __init__(self, path, timeout):
+        self.path = path + '-writelock'
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def _file(self):
+        # Reopened after a fork, otherwise preloaded workers would share one lock
+        if self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o660)
+            self._pid = os.getpid()
+        return self._fd
+
+    def acquire(self):
+        # On timeout (e.g. one thread writing through two connections, or a connection in another
+        # worker that is never returned to its pool) fall back to busy_timeout
+        deadline = time.monotonic() + self.timeout
+        if not self._lock.acquire(timeout=self.timeout):
+            return False
+        if fcntl is None:
+            return True
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(self._file(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.05)
+            except OSError:
+                break
+        self._lock.release()
+        return False
+
+    def release(self):
+        if fcntl is not None:
+            fcntl.flock(self._file(), fcntl.LOCK_UN)
+        self._lock.release()
+
+
+def _database_path(engine):
+    path = engine.url.database
+    return None if not path or path == ':memory:' or path.startswith('file:') else path
+
+
+def _set_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        # If WAL was asked for but not granted (e.g. on a network share), drop the WAL-only settings
+        if 'journal_mode' in pragmas and cursor.execute('PRAGMA journal_mode').fetchone()[0].lower() != 'wal':
+            cursor.execute('PRAGMA synchronous=FULL')
+            cursor.execute('PRAGMA mmap_size=0')
+        cursor.close()
+    return on_connect
+
+
+def _queue_writes(queue):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get('write_queued') is None and not statement.lstrip()[:7].upper().startswith(_READS):
+            conn.info['write_queued'] = queue.acquire()
+
+    def on_checkin(dbapi_connection, connection_record):
+        # A connection goes back to the pool only after its commit or rollback
+        if connection_record.info.pop('write_queued', None):
+            queue.release()
+    return before_cursor_execute, on_checkin
+
+
+def optimize(engine):
+    """Run PRAGMA optimize so the query planner's statistics keep up with the data."""
+    try:
+        with engine.connect() as connection:
+            connection.exec_driver_sql('PRAGMA optimize')
+    except Exception:
+        pass
+
+
+def checkpoint():
+    """Fold the WAL into the main database file, e.g. before copying app.db as a backup."""
+    if db.engine.dialect.name == 'sqlite':
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+def init_app(app):
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or getattr(engine, '_sqlite_tuned', False):
+        return
+    engine._sqlite_tuned = True
+
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if pragmas:
+        event.listen(engine, 'connect', _set_pragmas(pragmas))
+
+    path = _database_path(engine)
+    if app.config.get('SQLITE_WRITE_QUEUE') and path:
+        timeout = int(pragmas.get('busy_timeout', 5000)) / 1000
+        before_cursor_execute, on_checkin = _queue_writes(WriteQueue(path, timeout))
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine, 'checkin', on_checkin)
+
+    if app.config.get('SQLITE_OPTIMIZE_ON_EXIT') and path:
+        atexit.register(optimize, engine)
@@ -0,0 +1,96 @@
+from employee_portal import db
+from employee_portal.models import User, EmployeeProfile, Task, EmployeeTask
+
+
+def role_member_ids(role_id):
+    """Return the ids of all active (non-resigned) employees holding a role."""
+    if not role_id:
+        return set()
+    rows = db.session.query(EmployeeProfile.id).join(User).filter(
+        User.role_id == role_id,
+        EmployeeProfile.is_resigned == False
+    ).all()
+    return {emp_id for emp_id, in rows}
+
+
+def target_employee_ids(role_id=None, employee_id=None):
+    """Resolve who a master task should be instantiated for.
+
+    A direct employee assignment wins over the role; otherwise every active
+    member of the role gets an instance.
+    """
+    if employee_id:
+        return {employee_id}
+    return role_member_ids(role_id)
+
+
+def existing_pairs(employee_ids=None, task_ids=None):
+    """Return the set of (employee_id, task_id) pairs already present."""
+    query = db.session.query(EmployeeTask.employee_id, EmployeeTask.task_id)
+    if employee_ids is not None:
+        if not employee_ids:
+            return set()
+        query = query.filter(EmployeeTask.employee_id.in_(list(employee_ids)))
+    if task_ids is not None:
+        if not task_ids:
+            return set()
+        query = query.filter(EmployeeTask.task_id.in_(list(task_ids)))
+    return set(query.all())
+
+
+def assign_pairs(pairs):
+    """Bulk-insert the (employee_id, task_id) pairs that do not exist yet.
+
+    The caller owns the transaction; nothing is committed here.
+    Returns the number of rows inserted.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+
+    employee_ids = {emp_id for emp_id, _ in pairs}
+    task_ids = {task_id for _, task_id in pairs}
+    missing = pairs - existing_pairs(employee_ids, task_ids)
+    if not missing:
+        return 0
+
+    db.session.execute(
+        db.insert(EmployeeTask),
+        [{'employee_id': emp_id, 'task_id': task_id} for emp_id, task_id in sorted(missing)]
+    )
+    return len(missing)
+
+
+def assign_task_type(employee_id, task_type):
+    """Give one employee every master task of a type (e.g. 'Onboarding')."""
+    task_ids = [task_id for task_id, in db.session.query(Task.id).filter_by(task_type=task_type).all()]
+    return assign_pairs((employee_id, task_id) for task_id in task_ids)
+
+
+def sync_task_assignees(task, employee_ids):
+    """Make the instances of a master task match exactly ``employee_ids``.
+
+    Only the difference is written: instances for employees that are no longer
+    targeted are deleted and missing ones are inserted. Instances that survive
+    keep their status and completion history.
+    Returns an ``(added, removed)`` tuple of counts.
+    """
+    employee_ids = set(employee_ids)
+    current = {emp_id for emp_id, in db.session.query(EmployeeTask.employee_id).filter_by(task_id=task.id).all()}
+
+    stale = current - employee_ids
+    removed = 0
+    if stale:
+        removed = EmployeeTask.query.filter(
+            EmployeeTask.task_id == task.id,
+            EmployeeTask.employee_id.in_(list(stale))
+        ).delete(synchronize_session=False)
+
+    missing = employee_ids - current
+    if missing:
+        db.session.execute(
+            db.insert(EmployeeTask),
+            [{'employee_id': emp_id, 'task_id': task.id} for emp_id in sorted(missing)]
+        )
+
+    return len(missing), removed
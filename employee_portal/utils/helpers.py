@@ -1,6 +1,5 @@
 import os
 import secrets
-from PIL import Image
 from flask import current_app
 
 from datetime import datetime, timedelta
@@ -17,17 +16,12 @@ def format_datetime_ist(utc_dt, fmt='%Y-%m-%d %H:%M:%S'):
     return ist_dt.strftime(fmt)
 
 def save_picture(form_picture):
-    random_hex = secrets.token_hex(8)
-    _, f_ext = os.path.splitext(form_picture.filename)
-    picture_fn = random_hex + f_ext
-    picture_path = os.path.join(current_app.root_path, 'static/img', picture_fn)
-
-    output_size = (125, 125)
-    i = Image.open(form_picture)
-    i.thumbnail(output_size)
-    i.save(picture_path)
+    """Store a profile picture; returns the key to keep in ``image_file``.
 
-    return picture_fn
+    Size variants are produced in the background by employee_portal.images.
+    """
+    from employee_portal.images import store_image
+    return store_image(form_picture)
 
 def save_file(form_file, folder='documents'):
     random_hex = secrets.token_hex(8)
@@ -39,6 +33,16 @@ def save_file(form_file, folder='documents'):
     form_file.save(file_path)
     return file_fn
 
+def prune_audit_logs(days):
+    """Delete audit log entries older than ``days`` days and commit. Returns how many were removed."""
+    from employee_portal import db
+    from employee_portal.models import AuditLog
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    removed = AuditLog.query.filter(AuditLog.timestamp < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
 def log_audit(action, resource_type, resource_id, details, user):
     """
     Logs a system action to the AuditLog table.
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+
+class _Client:
+    __slots__ = ("websocket", "queue", "task", "dropped", "consecutive_drops")
+
+    def __init__(self, websocket, queue_size):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task = None
+        self.dropped = 0
+        self.consecutive_drops = 0
+
+
+class ConnectionManager:
+    """Broadcast hub for the live-feed dashboards.
+
+    Every connection gets its own bounded queue and writer task, so one slow
+    socket never blocks the producer or the other clients. ``publish`` is
+    synchronous and non-blocking: it serializes an event once and offers the
+    same string to every queue. When a client's queue is full, its oldest
+    message is dropped and the writer sends a ``gap`` notice (how many events
+    were missed) before the next message, so the dashboard can refetch.
+    A client that keeps overflowing for ``evict_after`` publishes in a row
+    is disconnected.
+    """
+
+    def __init__(self, queue_size: int = 32, evict_after: int = 256):
+        self.queue_size = queue_size
+        self.evict_after = evict_after
+        self._clients = {}
+        self.stats = {"published": 0, "dropped": 0, "evicted": 0}
+
+    @property
+    def active(self) -> int:
+        return len(self._clients)
+
+    async def connect(self, websocket: "WebSocket"):
+        await websocket.accept()
+        client = _Client(websocket, self.queue_size)
+        client.task = asyncio.create_task(self._writer(client))
+        self._clients[websocket] = client
+
+    def disconnect(self, websocket: "WebSocket"):
+        client = self._clients.pop(websocket, None)
+        if client is not None and client.task is not None and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    def publish(self, event: dict) -> int:
+        """Fan an event out to every connected client; returns how many received it without a drop."""
+        message = json.dumps(event, separators=(",", ":"), default=str)
+        self.stats["published"] += 1
+        delivered = 0
+        for websocket, client in list(self._clients.items()):
+            queue = client.queue
+            if queue.full():
+                queue.get_nowait()
+                client.dropped += 1
+                client.consecutive_drops += 1
+                self.stats["dropped"] += 1
+                if client.consecutive_drops >= self.evict_after:
+                    self.stats["evicted"] += 1
+                    self.disconnect(websocket)
+                    asyncio.create_task(self._close(websocket))
+                    continue
+            else:
+                client.consecutive_drops = 0
+                delivered += 1
+            queue.put_nowait(message)
+        return delivered
+
+    def publish_punches(self, records) -> int:
+        """Publish newly stored punches as one event (one serialization per batch)."""
+        if not records or not self._clients:
+            return 0
+        return self.publish({
+            "type": "punches",
+            "items": [{
+                "device_sn": r.device_sn, "user_pin": r.user_pin, "punch_time": r.punch_time.isoformat(),
+                "status": r.status, "verify_mode": r.verify_mode,
+            } for r in records],
+        })
+
+    async def _writer(self, client: _Client):
+        websocket = client.websocket
+        try:
+            while True:
+                message = await client.queue.get()
+                if client.dropped:
+                    missed, client.dropped = client.dropped, 0
+                    await websocket.send_text(json.dumps({"type": "gap", "dropped": missed}, separators=(",", ":")))
+                await websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Closed or broken socket: stop feeding it
+            self.disconnect(websocket)
+
+    async def _close(self, websocket: "WebSocket"):
+        try:
+            await websocket.close(code=1013)  # try again later
+        except Exception:
+            pass
+
+
+manager = ConnectionManager()
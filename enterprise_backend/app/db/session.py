@@ -1,15 +1,88 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 import os
 
 # For development, we use SQLite. For production, switch to PostgreSQL.
 SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL") or "sqlite:///./enterprise_attendance.db"
+if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
+    SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+# Pool settings (ignored by SQLite's in-memory databases)
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+
+def async_url(url: str) -> str:
+    """The asyncio driver URL for a database URL (aiosqlite for SQLite, asyncpg for PostgreSQL)."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+def _pool_options():
+    if IS_SQLITE and ":memory:" in SQLALCHEMY_DATABASE_URL:
+        return {}
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets the dashboards read while punches are being written; busy_timeout
+    # makes concurrent writers wait for the lock instead of failing immediately
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **_pool_options()
 )
+if IS_SQLITE:
+    event.listen(engine, "connect", _sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_async_engine = None
+_async_sessionmaker = None
+
+
+def get_async_engine():
+    """The shared AsyncEngine, created on first use.
+
+    Needs ``sqlalchemy[asyncio]`` plus aiosqlite or asyncpg; scripts that only
+    use the synchronous engine don't pay for (or need) the async drivers.
+    """
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        _async_engine = create_async_engine(async_url(SQLALCHEMY_DATABASE_URL), **_pool_options())
+        if IS_SQLITE:
+            event.listen(_async_engine.sync_engine, "connect", _sqlite_pragmas)
+        _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    get_async_engine()
+    return _async_sessionmaker()
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -17,6 +90,42 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_status(target=None) -> dict:
+    """Pool occupancy of an engine (the async engine by default) for health checks."""
+    target = target or get_async_engine()
+    pool = target.sync_engine.pool if hasattr(target, "sync_engine") else target.pool
+    status = {"pool": type(pool).__name__}
+    if hasattr(pool, "size"):
+        size, checked_out, overflow = pool.size(), pool.checkedout(), max(pool.overflow(), 0)
+        capacity = size + MAX_OVERFLOW
+        status.update({
+            "size": size,
+            "max_overflow": MAX_OVERFLOW,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": overflow,
+            "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+        })
+    return status
+
+
 def init_db():
     from app.models.attendance import Base
     Base.metadata.create_all(bind=engine)
+
+
+async def init_async_db():
+    from app.models.attendance import Base
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def close_async_db():
+    if _async_engine is not None:
+        await _async_engine.dispose()
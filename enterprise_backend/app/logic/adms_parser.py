@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterable, Iterable, Optional
+
+
+@dataclass(slots=True, frozen=True)
+class AttLog:
+    """An ATTLOG punch: ``PIN<TAB>time<TAB>status<TAB>verify<TAB>workcode...``."""
+    device_sn: str
+    user_pin: str
+    punch_time: datetime
+    status: int = 0
+    verify_mode: int = 0
+    work_code: Optional[str] = None
+
+    def key(self):
+        return self.device_sn, self.user_pin, self.punch_time
+
+    def as_row(self) -> dict:
+        return {
+            "device_sn": self.device_sn, "user_pin": self.user_pin, "punch_time": self.punch_time,
+            "status": self.status, "verify_mode": self.verify_mode, "work_code": self.work_code,
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class OperLog:
+    """An OPERLOG operation: ``OPLOG code<TAB>admin<TAB>time<TAB>obj1..obj4``."""
+    device_sn: str
+    op_code: int
+    admin_pin: str
+    op_time: datetime
+    objects: tuple = ()
+
+
+@dataclass(slots=True, frozen=True)
+class UserInfo:
+    """A user record: ``USER PIN=..<TAB>Name=..<TAB>Pri=..<TAB>Card=..`` (OPERLOG or USERINFO tables)."""
+    device_sn: str
+    pin: str
+    name: str = ""
+    privilege: int = 0
+    card: Optional[str] = None
+
+
+def _int(value: bytes, default: int = 0) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _time(value: bytes) -> datetime:
+    # fromisoformat accepts the devices' "YYYY-MM-DD HH:MM:SS" and is much faster than strptime
+    return datetime.fromisoformat(value.strip().decode("ascii"))
+
+
+class AdmsParser:
+    """Incremental parser for ADMS push bodies.
+
+    Feed it the body chunk by chunk. It splits records on newlines and tabs
+    directly on bytes, carrying a partial last line over to the next chunk,
+    so at most one chunk plus one line is held at a time. ATTLOG bodies yield
+    AttLog. OPERLOG and USERINFO bodies yield OperLog and UserInfo and skip
+    fingerprint/face template lines. Malformed lines are counted in
+    ``skipped`` and dropped.
+    """
+
+    def __init__(self, table: str = "ATTLOG", device_sn: str = ""):
+        self.table = (table or "ATTLOG").upper()
+        self.device_sn = device_sn
+        self.skipped = 0
+        self._tail = b""
+        self._line = self._attlog if self.table == "ATTLOG" else self._tagged
+
+    def feed(self, chunk) -> list:
+        if not chunk:
+            return []
+        data = self._tail + bytes(chunk) if self._tail else bytes(chunk)
+        lines = data.split(b"\n")
+        self._tail = lines.pop()
+        return self._parse(lines)
+
+    def close(self) -> list:
+        tail, self._tail = self._tail, b""
+        return self._parse([tail]) if tail.strip() else []
+
+    def _parse(self, lines) -> list:
+        records = []
+        append = records.append
+        parse = self._line
+        for line in lines:
+            if not line or line.isspace():
+                continue
+            try:
+                record = parse(line.rstrip(b"\r"))
+            except (ValueError, IndexError):
+                record = None
+            if record is None:
+                self.skipped += 1
+            elif record is not False:
+                append(record)
+        return records
+
+    def _attlog(self, line: bytes):
+        fields = line.split(b"\t")
+        pin = fields[0].strip()
+        if not pin:
+            return None
+        n = len(fields)
+        return AttLog(
+            self.device_sn,
+            pin.decode("utf-8", "replace"),
+            _time(fields[1]),
+            _int(fields[2]) if n > 2 else 0,
+            _int(fields[3]) if n > 3 else 0,
+            (fields[4].strip().decode("utf-8", "replace") or None) if n > 4 else None,
+        )
+
+    def _tagged(self, line: bytes):
+        tag, _, rest = line.partition(b" ")
+        if tag == b"OPLOG":
+            fields = rest.split(b"\t")
+            return OperLog(
+                self.device_sn, _int(fields[0]), fields[1].strip().decode("utf-8", "replace"), _time(fields[2]),
+                tuple(f.strip().decode("utf-8", "replace") for f in fields[3:]),
+            )
+        if tag == b"USER":
+            values = dict(f.split(b"=", 1) for f in rest.split(b"\t") if b"=" in f)
+            pin = values.get(b"PIN", b"").strip()
+            if not pin:
+                return None
+            return UserInfo(
+                self.device_sn, pin.decode("utf-8", "replace"), values.get(b"Name", b"").strip().decode("utf-8", "replace"),
+                _int(values.get(b"Pri", b"0")), values.get(b"Card", b"").strip().decode("utf-8", "replace") or None,
+            )
+        # FP/FACE templates and other tags are not ingested
+        return False
+
+
+def iter_records(chunks: Iterable, table: str = "ATTLOG", device_sn: str = ""):
+    """Typed records from an iterable of body chunks."""
+    parser = AdmsParser(table, device_sn)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def iter_batches(stream: AsyncIterable, table: str = "ATTLOG", device_sn: str = "", size: int = 5000):
+    """Lists of up to ``size`` records from an async byte stream such as ``request.stream()``."""
+    parser = AdmsParser(table, device_sn)
+    batch = []
+    async for chunk in stream:
+        batch.extend(parser.feed(chunk))
+        while len(batch) >= size:
+            yield batch[:size]
+            batch = batch[size:]
+    batch.extend(parser.close())
+    if batch:
+        yield batch
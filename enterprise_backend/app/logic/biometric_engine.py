@@ -0,0 +1,54 @@
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session
+from app.models.attendance import PunchLog
+from app.logic.adms_parser import AttLog, iter_records
+
+PUNCH_KEY = ("device_sn", "user_pin", "punch_time")
+
+
+class BiometricEngine:
+    """Parsing and persistence of punches pushed by eSSL/ZKTeco devices over ADMS."""
+
+    @staticmethod
+    def parse_essl_message(data, device_sn: str = "", table: str = "ATTLOG") -> list:
+        """Parse a whole push body (str or bytes) into typed records; see adms_parser for streaming."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return list(iter_records([data], table, device_sn))
+
+    @staticmethod
+    def process_batch(db: Session, logs: list) -> list:
+        """Insert AttLog punches in one statement, skipping ones already stored.
+
+        Uses ON CONFLICT DO NOTHING ... RETURNING on SQLite and PostgreSQL;
+        other databases filter out existing keys with one lookup first. The
+        caller commits. Returns the records that were newly stored.
+        """
+        if not logs:
+            return []
+        by_key = {log.key(): log for log in logs}
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            stmt = upsert(PunchLog).on_conflict_do_nothing(index_elements=list(PUNCH_KEY)).returning(
+                PunchLog.device_sn, PunchLog.user_pin, PunchLog.punch_time
+            )
+            stored = db.execute(stmt, [log.as_row() for log in by_key.values()]).all()
+            return [by_key[tuple(row)] for row in stored]
+
+        existing = set(db.execute(
+            select(PunchLog.device_sn, PunchLog.user_pin, PunchLog.punch_time).where(
+                tuple_(PunchLog.device_sn, PunchLog.user_pin, PunchLog.punch_time).in_(list(by_key))
+            )
+        ).all())
+        fresh = [log for key, log in by_key.items() if key not in existing]
+        if fresh:
+            db.execute(insert(PunchLog), [log.as_row() for log in fresh])
+        return fresh
+
+    @staticmethod
+    def process_log(db: Session, log: AttLog) -> list:
+        return BiometricEngine.process_batch(db, [log])
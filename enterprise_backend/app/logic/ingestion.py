@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.logic.biometric_engine import BiometricEngine
+
+logger = logging.getLogger(__name__)
+
+
+async def write_batch(logs: list) -> list:
+    """Persist one micro-batch in its own async session and transaction; returns the newly stored punches."""
+    async with AsyncSessionLocal() as db:
+        stored = await db.run_sync(BiometricEngine.process_batch, logs)
+        await db.commit()
+    return stored
+
+
+def write_batch_sync(logs: list) -> list:
+    """Same as write_batch on the synchronous engine; the pipeline runs it in a worker thread."""
+    with SessionLocal() as db:
+        stored = BiometricEngine.process_batch(db, logs)
+        db.commit()
+    return stored
+
+
+@dataclass
+class _Submission:
+    logs: list
+    future: asyncio.Future = field(repr=False)
+
+
+class IngestionPipeline:
+    """In-process queue that turns many small device pushes into few bulk writes.
+
+    Each push is queued as one submission. A single consumer drains the queue
+    into micro-batches of up to ``max_batch`` punches, waiting at most
+    ``max_wait`` seconds for a batch to fill. It drops duplicates on
+    (device SN, user PIN, timestamp) and writes the batch without blocking
+    the event loop (async writers are awaited, sync ones run in a thread).
+    ``submit`` resolves only once the batch containing the push has been
+    committed, so the endpoint can ack the device after the data is durable.
+    Callbacks in ``on_stored`` then receive the newly stored punches (for
+    example the live-feed broadcast); they run on the event loop and must
+    not block.
+    The queue is bounded: when the database falls behind, pushes wait here
+    and devices keep their buffers instead of the process growing without limit.
+    """
+
+    def __init__(self, writer=write_batch, max_batch: int = 2000, max_wait: float = 0.05, max_pending: int = 10000):
+        self.writer = writer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._task = None
+        self.on_stored = []
+        self.stats = {"batches": 0, "received": 0, "duplicates": 0, "inserted": 0, "failed_batches": 0}
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush what is queued, then stop the consumer."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+    async def submit(self, logs: list) -> int:
+        """Queue a device's punches and wait until they are committed. Returns the count accepted."""
+        if not logs:
+            return 0
+        if self._task is None:
+            raise RuntimeError("Ingestion pipeline is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Submission(logs, future))
+        await future
+        return len(logs)
+
+    async def _collect(self, first):
+        batch, size = [first], len(first.logs)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            size += len(item.logs)
+        return batch, False
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch, stopping = await self._collect(first)
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        unique, seen = [], set()
+        for submission in batch:
+            for log in submission.logs:
+                key = log.key()
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(log)
+        received = sum(len(s.logs) for s in batch)
+
+        try:
+            if asyncio.iscoroutinefunction(self.writer):
+                stored = await self.writer(unique)
+            else:
+                stored = await asyncio.to_thread(self.writer, unique)
+        except Exception as exc:
+            # Nothing was acked; devices keep the punches and push them again
+            logger.exception("Punch batch of %d failed", len(unique))
+            self.stats["failed_batches"] += 1
+            for submission in batch:
+                if not submission.future.done():
+                    submission.future.set_exception(exc)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["received"] += received
+        self.stats["duplicates"] += received - len(stored)
+        self.stats["inserted"] += len(stored)
+        for submission in batch:
+            if not submission.future.done():
+                submission.future.set_result(None)
+        for callback in self.on_stored:
+            try:
+                callback(stored)
+            except Exception:
+                logger.exception("on_stored callback failed")
+
+
+pipeline = IngestionPipeline()
@@ -1,11 +1,16 @@
-from fastapi import FastAPI, Request, BackgroundTasks, Depends, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from app.logic.biometric_engine import BiometricEngine
-from app.db.session import get_db, init_db
+from fastapi.responses import PlainTextResponse, JSONResponse
+from sqlalchemy import text
+from app.logic import adms_parser
+from app.logic.ingestion import pipeline
+from app.db.session import init_async_db, close_async_db, AsyncSessionLocal, pool_status
 from app.api.websocket_manager import manager
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="GenHR Enterprise Attendance System")
 
 app.add_middleware(
@@ -17,13 +22,37 @@ app.add_middleware(
 )
 
 @app.on_event("startup")
-def startup_event():
-    init_db()
+async def startup_event():
+    await init_async_db()
+    # Processed punches go out to the live-feed dashboards as they are committed
+    pipeline.on_stored.append(manager.publish_punches)
+    await pipeline.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await pipeline.stop()
+    await close_async_db()
 
 @app.get("/")
 async def root():
     return {"status": "GenHR Enterprise API is Online", "version": "1.0.0"}
 
+@app.get("/health/db")
+async def db_health():
+    started = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+    except Exception as exc:
+        return JSONResponse({"status": "error", "detail": str(exc), "pool": pool_status()}, status_code=503)
+    return {
+        "status": "ok",
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": pool_status(),
+        "ingestion": {"pending": pipeline.pending, **pipeline.stats},
+        "live_feed_clients": manager.active,
+    }
+
 @app.websocket("/ws/live-feed")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
@@ -37,19 +66,20 @@ async def websocket_endpoint(websocket: WebSocket):
 
 @app.get("/iclock/cdata")
 async def adms_handshake(request: Request):
-    return "OK"
+    return PlainTextResponse("OK")
 
 @app.post("/iclock/cdata")
-async def receive_biometric_data(
-    request: Request, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    raw_data = await request.body()
-    data_str = raw_data.decode("utf-8")
-    
-    logs = BiometricEngine.parse_essl_message(data_str)
-    for log in logs:
-        background_tasks.add_task(BiometricEngine.process_log, db, log)
-    
-    return "OK"
+async def receive_biometric_data(request: Request, SN: str = "", table: str = "ATTLOG"):
+    # The body is parsed as it arrives, so catch-up uploads from offline devices are never held whole
+    accepted = 0
+    try:
+        async for records in adms_parser.iter_batches(request.stream(), table, device_sn=SN):
+            if table.upper() == "ATTLOG":
+                # Ack only once the punches are committed; on failure the device keeps them and retries
+                accepted += await pipeline.submit(records)
+            else:
+                accepted += len(records)
+    except Exception:
+        logger.exception("ADMS %s push from %s failed", table, SN)
+        return PlainTextResponse("ERROR", status_code=503)
+    return PlainTextResponse(f"OK: {accepted}")
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, UniqueConstraint, Index
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class PunchLog(Base):
+    """One attendance punch as pushed by an eSSL/ZKTeco device (ADMS ATTLOG line)."""
+    __tablename__ = "punch_logs"
+
+    id = Column(Integer, primary_key=True)
+    device_sn = Column(String(32), nullable=False)
+    user_pin = Column(String(32), nullable=False)
+    punch_time = Column(DateTime, nullable=False)
+    status = Column(Integer, default=0)        # 0 check-in, 1 check-out, 4/5 overtime in/out
+    verify_mode = Column(Integer, default=0)   # 1 fingerprint, 15 face, 4 card, ...
+    work_code = Column(String(16))
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed = Column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        # Devices resend buffered punches after a lost ack; the key makes redelivery idempotent
+        UniqueConstraint("device_sn", "user_pin", "punch_time", name="uq_punch_device_pin_time"),
+        Index("ix_punch_user_time", "user_pin", "punch_time"),
+    )
@@ -0,0 +1,92 @@
+"""ADMS parsing throughput: streaming bytes parser vs decoding the whole body.
+
+Run from enterprise_backend/:
+
+    python -m benchmarks.adms_parser
+
+Bodies are fed in 64 KiB chunks, like request.stream() delivers them.
+The baseline is the previous approach: decode the full body to str,
+splitlines, split on tabs and strptime every timestamp into a dict.
+Peak memory is measured with tracemalloc in a separate pass.
+"""
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app.logic.adms_parser import iter_records
+
+RECORDS = 200_000
+CHUNK = 64 * 1024
+
+
+def attlog_body(n):
+    rng = random.Random(1)
+    start = datetime(2026, 10, 1)
+    return "".join(
+        f"{rng.randint(1, 5000)}\t{start + timedelta(seconds=i * 3):%Y-%m-%d %H:%M:%S}\t{rng.choice((0, 1))}\t15\t0\t0\t0\n"
+        for i in range(n)
+    ).encode()
+
+
+def operlog_body(n):
+    lines = []
+    for i in range(n):
+        if i % 2:
+            lines.append(f"USER PIN={i}\tName=Employee {i}\tPri=0\tPasswd=\tCard={100000 + i}\tGrp=1\tTZ=0000000100000000\tVerify=0")
+        else:
+            lines.append(f"OPLOG 4\t0\t2026-10-01 09:{i % 60:02d}:00\t{i}\t0\t0\t0")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def legacy_parse(body):
+    logs = []
+    for line in body.decode("utf-8").splitlines():
+        fields = line.strip().split("\t")
+        if len(fields) < 2 or not fields[0]:
+            continue
+        try:
+            punch_time = datetime.strptime(fields[1].strip(), "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+        logs.append({"user_pin": fields[0], "punch_time": punch_time, "status": int(fields[2]), "verify_mode": int(fields[3])})
+    return len(logs)
+
+
+def chunks(body):
+    view = memoryview(body)
+    for start in range(0, len(body), CHUNK):
+        yield view[start:start + CHUNK]
+
+
+def streaming_parse(body, table="ATTLOG"):
+    # Consume records as the ingestion stage does, without keeping them all
+    count = 0
+    for _ in iter_records(chunks(body), table, "DEV0001"):
+        count += 1
+    return count
+
+
+def measure(label, fn, body, *args):
+    started = time.perf_counter()
+    count = fn(body, *args)
+    elapsed = time.perf_counter() - started
+    # Separate pass: tracemalloc slows allocation-heavy code down too much to time under it
+    tracemalloc.start()
+    fn(body, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<26}{count:>9,} records{count / elapsed:>14,.0f} rec/s   peak {peak / 1e6:>7.1f} MB")
+
+
+def main():
+    att = attlog_body(RECORDS)
+    opl = operlog_body(RECORDS // 4)
+    print(f"ATTLOG body {len(att) / 1e6:.1f} MB, OPERLOG/USERINFO body {len(opl) / 1e6:.1f} MB (chunk {CHUNK // 1024} KiB)")
+    measure("ATTLOG decode+strptime", legacy_parse, att)
+    measure("ATTLOG streaming", streaming_parse, att)
+    measure("OPERLOG streaming", streaming_parse, opl, "OPERLOG")
+
+
+if __name__ == "__main__":
+    main()
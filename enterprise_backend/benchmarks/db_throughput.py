@@ -0,0 +1,117 @@
+"""Sync vs async database sessions inside async request handlers.
+
+Run from enterprise_backend/:
+
+    python -m benchmarks.db_throughput
+
+Simulates ``CONCURRENCY`` in-flight requests on one event loop. Each request
+reads a page of recent punches and records a heartbeat. The old handlers
+opened a ``SessionLocal`` inside ``async def`` and blocked the loop for the
+whole query. The new ones use ``AsyncSessionLocal``. A ticker measures event
+loop lag, which is what the ADMS endpoint and the live-feed sockets feel
+while queries run. Needs aiosqlite and greenlet (``sqlalchemy[asyncio]``).
+Uses a throwaway SQLite file.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="db_bench_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+
+try:
+    import aiosqlite  # noqa: F401
+    import greenlet  # noqa: F401
+except ImportError as exc:
+    sys.exit(f"db_throughput needs the async drivers ({exc.name} is missing): pip install 'sqlalchemy[asyncio]' aiosqlite")
+
+from sqlalchemy import insert, select  # noqa: E402
+from app.db.session import SessionLocal, AsyncSessionLocal, init_db, close_async_db, pool_status  # noqa: E402
+from app.models.attendance import PunchLog  # noqa: E402
+
+ROWS = 200_000
+REQUESTS = 2000
+CONCURRENCY = 50
+PAGE = 200
+
+
+def seed():
+    init_db()
+    start = datetime(2026, 10, 1, 9, 0, 0)
+    rows = [{
+        "device_sn": f"DEV{i % 100:04d}", "user_pin": str(i % 500), "punch_time": start + timedelta(seconds=i),
+        "status": i % 2, "verify_mode": 15,
+    } for i in range(ROWS)]
+    with SessionLocal() as db:
+        db.execute(insert(PunchLog), rows)
+        db.commit()
+
+
+def page_query(n):
+    return select(PunchLog).where(PunchLog.user_pin == str(n % 500)).order_by(PunchLog.punch_time.desc()).limit(PAGE)
+
+
+async def sync_handler(n):
+    with SessionLocal() as db:
+        return len(db.scalars(page_query(n)).all())
+
+
+async def async_handler(n):
+    async with AsyncSessionLocal() as db:
+        return len((await db.scalars(page_query(n))).all())
+
+
+async def ticker(lags, stop, interval=0.005):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - expected, 0.0))
+
+
+async def run(handler):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies, lags, stop = [], [], asyncio.Event()
+    peak = {"utilization": 0.0}
+
+    async def request(n):
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(n)
+            latencies.append(time.perf_counter() - started)
+            if handler is async_handler:
+                peak["utilization"] = max(peak["utilization"], pool_status()["utilization"])
+
+    tick = asyncio.create_task(ticker(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(request(n) for n in range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    return elapsed, sorted(latencies), sorted(lags), peak["utilization"]
+
+
+def report(label, elapsed, latencies, lags, utilization=None):
+    line = (f"{label:<6} {REQUESTS / elapsed:8,.0f} req/s  latency p50={statistics.median(latencies) * 1000:6.1f}ms "
+            f"p99={latencies[int(len(latencies) * 0.99)] * 1000:6.1f}ms  "
+            f"loop lag max={lags[-1] * 1000 if lags else 0:6.1f}ms ticks={len(lags)}")
+    if utilization is not None:
+        line += f"  pool peak={utilization:.0%}"
+    print(line)
+
+
+async def main():
+    seed()
+    print(f"rows={ROWS} requests={REQUESTS} concurrency={CONCURRENCY} page={PAGE}")
+    report("sync", *(await run(sync_handler))[:3])
+    await async_handler(0)  # warm the pool
+    report("async", *(await run(async_handler)))
+    await close_async_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""ADMS ingestion load test: 100 devices pushing punches concurrently.
+
+Run from enterprise_backend/:
+
+    python -m benchmarks.ingest_load
+
+Each simulated device pushes its buffer in chunks, resending some lines as a
+device does after a lost ack. Every push goes through the same path as
+``POST /iclock/cdata`` (parse, then ``pipeline.submit`` which returns after
+commit). This is compared with the old shape of one insert and commit per
+punch. Uses a throwaway SQLite file.
+"""
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="ingest_bench_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+
+from sqlalchemy import func, select  # noqa: E402
+from app.db.session import SessionLocal, init_db  # noqa: E402
+from app.logic.biometric_engine import BiometricEngine  # noqa: E402
+from app.logic.ingestion import IngestionPipeline, write_batch, write_batch_sync  # noqa: E402
+from app.models.attendance import PunchLog  # noqa: E402
+
+DEVICES = 100
+PUSHES_PER_DEVICE = 20
+LINES_PER_PUSH = 50
+RESEND_RATE = 0.1
+BASELINE_PUNCHES = 2000
+
+
+def device_pushes(device_no, rng):
+    start = datetime(2026, 10, 1, 9, 0, 0)
+    sent = []
+    for push in range(PUSHES_PER_DEVICE):
+        lines = []
+        for i in range(LINES_PER_PUSH):
+            when = start + timedelta(seconds=(push * LINES_PER_PUSH + i) * 7)
+            lines.append(f"{rng.randint(1, 500)}\t{when:%Y-%m-%d %H:%M:%S}\t{rng.choice((0, 1))}\t15\t0")
+        resend = [line for line in sent if rng.random() < RESEND_RATE][:LINES_PER_PUSH // 5]
+        sent = lines
+        yield "\n".join(lines + resend)
+
+
+async def device(pipeline, device_no, latencies):
+    rng = random.Random(device_no)
+    sn = f"DEV{device_no:04d}"
+    for body in device_pushes(device_no, rng):
+        started = time.perf_counter()
+        logs = BiometricEngine.parse_essl_message(body, device_sn=sn)
+        await pipeline.submit(logs)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(rng.random() * 0.01)
+
+
+def pick_writer():
+    """The production async writer when its drivers are installed, else the threaded sync one."""
+    try:
+        import aiosqlite  # noqa: F401
+        import greenlet  # noqa: F401
+    except ImportError:
+        return write_batch_sync
+    return write_batch
+
+
+async def run_pipeline():
+    pipeline = IngestionPipeline(writer=pick_writer())
+    await pipeline.start()
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(device(pipeline, n, latencies) for n in range(DEVICES)))
+    elapsed = time.perf_counter() - started
+    await pipeline.stop()
+    return elapsed, latencies, pipeline.stats
+
+
+def run_baseline():
+    """One insert and commit per punch, as the per-line background tasks did."""
+    rng = random.Random(0)
+    body = "\n".join(next(device_pushes(9999, rng)) for _ in range(BASELINE_PUNCHES // LINES_PER_PUSH))
+    logs = BiometricEngine.parse_essl_message(body, device_sn="BASELINE")
+    started = time.perf_counter()
+    for log in logs:
+        with SessionLocal() as db:
+            BiometricEngine.process_log(db, log)
+            db.commit()
+    return len(logs), time.perf_counter() - started
+
+
+def main():
+    init_db()
+    elapsed, latencies, stats = asyncio.run(run_pipeline())
+    with SessionLocal() as db:
+        stored = db.scalar(select(func.count()).select_from(PunchLog))
+    latencies.sort()
+    pushes = len(latencies)
+    print(f"devices={DEVICES} pushes={pushes} punches received={stats['received']} writer={pick_writer().__name__}")
+    print(f"pipeline: {elapsed:.2f}s, {stats['received'] / elapsed:,.0f} punches/s, "
+          f"{stats['batches']} batches, {stats['duplicates']} duplicates dropped, {stored} rows stored")
+    print(f"ack latency p50={statistics.median(latencies) * 1000:.1f}ms "
+          f"p95={latencies[int(pushes * 0.95)] * 1000:.1f}ms p99={latencies[int(pushes * 0.99)] * 1000:.1f}ms")
+    assert stored == stats["inserted"], "row count does not match inserted punches"
+
+    n, baseline = run_baseline()
+    print(f"per-punch commits: {n} punches in {baseline:.2f}s, {n / baseline:,.0f} punches/s")
+
+
+if __name__ == "__main__":
+    main()
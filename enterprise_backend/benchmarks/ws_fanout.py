@@ -0,0 +1,101 @@
+"""Live-feed fan-out: 1,000 simulated WebSocket clients on the broadcast hub.
+
+Run from enterprise_backend/:
+
+    python -m benchmarks.ws_fanout
+
+Clients are in-process stand-ins for WebSocket connections. send_text
+yields to the loop like a real socket write. A share of them are slow
+and sleep on every message. The producer publishes punch batches at a
+fixed rate. The script reports:
+- how long each publish call blocks the producer,
+- publish-to-send latency for the fast clients,
+- what the slow clients dropped or were evicted for.
+"""
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.api.websocket_manager import ConnectionManager
+from app.logic.adms_parser import AttLog
+
+CLIENTS = 1000
+SLOW_SHARE = 0.05
+SLOW_DELAY = 0.05
+EVENTS = 200
+INTERVAL = 0.005
+PUNCHES_PER_EVENT = 20
+
+
+class SimulatedSocket:
+    def __init__(self, slow):
+        self.slow = slow
+        self.latencies = []
+        self.received = 0
+        self.gaps = 0
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        if self.slow:
+            await asyncio.sleep(SLOW_DELAY)
+        else:
+            await asyncio.sleep(0)
+        if message.startswith('{"type":"gap"'):
+            self.gaps += 1
+            return
+        self.received += 1
+        self.latencies.append(time.perf_counter() - PUBLISHED[message])
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+PUBLISHED = {}
+
+
+def punches(n, offset):
+    start = datetime(2026, 10, 1, 9)
+    return [AttLog("DEV0001", str(i), start + timedelta(seconds=offset * n + i), 0, 15) for i in range(n)]
+
+
+async def main():
+    hub = ConnectionManager(queue_size=32, evict_after=128)
+    sockets = [SimulatedSocket(slow=i < CLIENTS * SLOW_SHARE) for i in range(CLIENTS)]
+    for sock in sockets:
+        await hub.connect(sock)
+
+    publish_times = []
+    for n in range(EVENTS):
+        event = {"type": "punches", "seq": n, "items": [
+            {"user_pin": r.user_pin, "punch_time": r.punch_time.isoformat()} for r in punches(PUNCHES_PER_EVENT, n)
+        ]}
+        message = json.dumps(event, separators=(",", ":"))
+        started = time.perf_counter()
+        PUBLISHED[message] = started
+        hub.publish(event)
+        publish_times.append(time.perf_counter() - started)
+        await asyncio.sleep(INTERVAL)
+    await asyncio.sleep(0.2)
+
+    fast = [s for s in sockets if not s.slow]
+    slow = [s for s in sockets if s.slow]
+    latencies = sorted(l for s in fast for l in s.latencies)
+    publish_times.sort()
+    print(f"clients={CLIENTS} ({len(slow)} slow at {SLOW_DELAY * 1000:.0f} ms/message), events={EVENTS}")
+    print(f"publish (serialize once + enqueue to all): p50={statistics.median(publish_times) * 1000:.2f}ms "
+          f"max={publish_times[-1] * 1000:.2f}ms")
+    print(f"fast clients: {sum(s.received for s in fast) / len(fast):.0f}/{EVENTS} events each, "
+          f"latency p50={statistics.median(latencies) * 1000:.2f}ms p99={latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms")
+    print(f"slow clients: {sum(s.received for s in slow) / max(len(slow), 1):.0f}/{EVENTS} events each, "
+          f"{sum(s.gaps for s in slow)} gap notices, {hub.stats['dropped']} drops, {hub.stats['evicted']} evicted")
+    for sock in sockets:
+        hub.disconnect(sock)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""add line items
+
+Revision ID: a8d4e1b7c3f5
+Revises: f3a9d2c6b184
+Create Date: 2026-10-19 17:41:27.530186
+
+Moves purchase-order and estimate items out of the items_json text columns
+into line_item rows, then drops the columns. Downgrade writes them back.
+
+"""
+import json
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4e1b7c3f5'
+down_revision = 'f3a9d2c6b184'
+branch_labels = None
+depends_on = None
+
+line_item = sa.table(
+    'line_item',
+    sa.column('purchase_order_id', sa.Integer), sa.column('bill_estimate_id', sa.Integer),
+    sa.column('position', sa.Integer), sa.column('item', sa.String), sa.column('item_key', sa.String),
+    sa.column('quantity', sa.Float), sa.column('unit_price', sa.Float), sa.column('amount', sa.Float),
+    sa.column('vendor_id', sa.Integer), sa.column('date', sa.Date),
+)
+
+# (table, owner column on line_item, item name key in the JSON, has vendor_id)
+OWNERS = [
+    ('purchase_order', 'purchase_order_id', 'item', True),
+    ('bill_estimate', 'bill_estimate_id', 'description', False),
+]
+
+
+def _number(value):
+    try:
+        return float(str(value).replace(',', '')) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+
+def _lines(raw):
+    # Frozen copy of employee_portal.line_items.from_json, yielding dicts
+    if not raw:
+        return []
+    try:
+        entries = json.loads(raw)
+    except ValueError:
+        entries = None
+    if not isinstance(entries, list):
+        entries = [raw]
+    lines = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            name = entry.get('item') or entry.get('description') or entry.get('name')
+            quantity = _number(entry.get('qty', entry.get('quantity')))
+            unit_price = _number(entry.get('price', entry.get('rate')))
+            amount = _number(entry.get('total', entry.get('amount')))
+            if not name and quantity is None and unit_price is None:
+                continue
+        else:
+            name, quantity, unit_price, amount = entry, None, None, None
+        name = str(name or '').strip()[:200]
+        if amount is None and quantity is not None and unit_price is not None:
+            amount = round(quantity * unit_price, 2)
+        lines.append({'position': len(lines), 'item': name, 'item_key': ' '.join(name.lower().split()),
+                      'quantity': quantity, 'unit_price': unit_price, 'amount': amount})
+    return lines
+
+
+def _text(value):
+    if value is None:
+        return ''
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def upgrade():
+    op.create_table('line_item',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('purchase_order_id', sa.Integer(), nullable=True),
+    sa.Column('bill_estimate_id', sa.Integer(), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('item', sa.String(length=200), nullable=False),
+    sa.Column('item_key', sa.String(length=200), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=True),
+    sa.Column('unit_price', sa.Float(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('vendor_id', sa.Integer(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['bill_estimate_id'], ['bill_estimate.id'], ),
+    sa.ForeignKeyConstraint(['purchase_order_id'], ['purchase_order.id'], ),
+    sa.ForeignKeyConstraint(['vendor_id'], ['vendor.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('line_item', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_line_item_purchase_order_id'), ['purchase_order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_line_item_bill_estimate_id'), ['bill_estimate_id'], unique=False)
+        batch_op.create_index('ix_line_item_vendor_item_date', ['vendor_id', 'item_key', 'date'], unique=False)
+        batch_op.create_index('ix_line_item_item_date', ['item_key', 'date'], unique=False)
+
+    connection = op.get_bind()
+    for table, owner, _, has_vendor in OWNERS:
+        columns = 'id, date, items_json' + (', vendor_id' if has_vendor else '')
+        rows = []
+        for record in connection.execute(sa.text(f'SELECT {columns} FROM {table}')):
+            # Raw SQLite rows carry dates as text
+            day = date.fromisoformat(record.date[:10]) if isinstance(record.date, str) else record.date
+            for line in _lines(record.items_json):
+                line.update({'purchase_order_id': None, 'bill_estimate_id': None,
+                             'vendor_id': record.vendor_id if has_vendor else None, 'date': day})
+                line[owner] = record.id
+                rows.append(line)
+        if rows:
+            op.bulk_insert(line_item, rows)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('items_json')
+
+
+def downgrade():
+    connection = op.get_bind()
+    for table, owner, name_key, _ in OWNERS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('items_json', sa.Text(), nullable=True))
+        items = {}
+        for line in connection.execute(sa.text(
+            f'SELECT {owner} AS owner, item, quantity, unit_price, amount FROM line_item '
+            f'WHERE {owner} IS NOT NULL ORDER BY {owner}, position'
+        )):
+            items.setdefault(line.owner, []).append({
+                name_key: line.item, 'qty': _text(line.quantity), 'price': _text(line.unit_price),
+                'total': f'{line.amount:.2f}' if line.amount is not None else '',
+            })
+        for owner_id, entries in items.items():
+            connection.execute(sa.text(f'UPDATE {table} SET items_json = :items WHERE id = :id'),
+                               {'items': json.dumps(entries), 'id': owner_id})
+
+    with op.batch_alter_table('line_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_line_item_item_date')
+        batch_op.drop_index('ix_line_item_vendor_item_date')
+        batch_op.drop_index(batch_op.f('ix_line_item_bill_estimate_id'))
+        batch_op.drop_index(batch_op.f('ix_line_item_purchase_order_id'))
+    op.drop_table('line_item')
@@ -0,0 +1,41 @@
+"""add register indexes
+
+Revision ID: f3a9d2c6b184
+Revises: c4e81a7f2d90
+Create Date: 2026-10-19 16:20:11.402917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9d2c6b184'
+down_revision = 'c4e81a7f2d90'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'credit': [('ix_credit_date_id', ['date', 'id']), ('ix_credit_category_date_id', ['category', 'date', 'id'])],
+    'debit': [('ix_debit_date_id', ['date', 'id']), ('ix_debit_category_date_id', ['category', 'date', 'id']),
+              ('ix_debit_paid_by_date_id', ['paid_by', 'date', 'id'])],
+    'invoice': [('ix_invoice_date_id', ['date', 'id']), ('ix_invoice_status_date_id', ['status', 'date', 'id']),
+                ('ix_invoice_vendor_date_id', ['vendor_id', 'date', 'id'])],
+    'purchase_order': [('ix_purchase_order_date_id', ['date', 'id']),
+                       ('ix_purchase_order_status_date_id', ['status', 'date', 'id']),
+                       ('ix_purchase_order_vendor_date_id', ['vendor_id', 'date', 'id'])],
+}
+
+
+def upgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _ in reversed(indexes):
+                batch_op.drop_index(name)
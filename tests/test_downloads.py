@@ -0,0 +1,115 @@
+import os
+import re
+from urllib.parse import unquote
+
+import pytest
+from werkzeug.exceptions import NotFound
+
+from config import Config
+from employee_portal import create_app, downloads
+
+NGINX_CONF = os.path.join(os.path.dirname(__file__), '..', 'deployment', 'nginx.conf')
+DEPLOY_ROOT = '/var/www/GenHR/'
+
+
+class StubNginx:
+    """The X-Accel parts of deployment/nginx.conf, with the deploy root moved to ``root``.
+
+    ``headers`` are what nginx adds to proxied requests; ``serve`` resolves
+    a response's X-Accel-Redirect through the internal locations the way
+    nginx would, returning the file it would send (None when it would pass
+    the body through).
+    """
+
+    def __init__(self, root):
+        with open(NGINX_CONF) as f:
+            conf = f.read()
+        mapping = re.search(r'proxy_set_header X-Accel-Mapping "([^"]+)"', conf).group(1)
+        self.headers = {
+            'X-Sendfile-Type': re.search(r'proxy_set_header X-Sendfile-Type (\S+);', conf).group(1),
+            'X-Accel-Mapping': mapping.replace(DEPLOY_ROOT, root + '/'),
+        }
+        self.locations = {
+            location: alias.replace(DEPLOY_ROOT, root + '/')
+            for location, alias in re.findall(r'location (\S+) \{\s*internal;\s*alias (\S+);', conf)
+        }
+
+    def serve(self, response):
+        uri = response.headers.get('X-Accel-Redirect')
+        if uri is None:
+            return None
+        for location, alias in self.locations.items():
+            if uri.startswith(location):
+                return os.path.join(alias, unquote(uri[len(location):]))
+        raise AssertionError(f'{uri} is not an internal location')
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        SQLITE_OPTIMIZE_ON_EXIT = False
+        PERF_INSTRUMENTATION = False
+
+    app = create_app(TestConfig)
+    app.instance_path = str(tmp_path / 'instance')
+    return app
+
+
+@pytest.fixture
+def nginx(tmp_path):
+    return StubNginx(str(tmp_path))
+
+
+def _write(path, data=b'%PDF-1.4 payslip'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+@pytest.mark.parametrize('relative', ['instance/exports/payslip march 2026.pdf', 'instance/documents/ab/ab12#ü.pdf',
+                                      'employee_portal/static/documents/legacy receipt.pdf'])
+def test_behind_nginx_only_headers_are_sent_for_the_authorized_file(app, nginx, tmp_path, relative):
+    path = _write(str(tmp_path / relative))
+    with app.test_request_context(headers=nginx.headers):
+        response = downloads.send(path, download_name='Payslip März.pdf')
+
+        assert os.path.samefile(nginx.serve(response), path)
+        assert response.get_data() == b''
+        assert response.mimetype == 'application/pdf'
+        disposition = response.headers['Content-Disposition']
+        assert disposition.startswith('attachment;')
+        assert "filename*=UTF-8''Payslip%20M%C3%A4rz.pdf" in disposition
+        assert response.cache_control.private and not response.cache_control.public
+
+
+def test_without_nginx_flask_sends_the_file(app, tmp_path):
+    path = _write(str(tmp_path / 'instance' / 'exports' / 'backup.zip'), b'PK\x03\x04 backup')
+    with app.test_request_context():
+        response = downloads.send(path)
+        response.direct_passthrough = False
+
+        assert 'X-Accel-Redirect' not in response.headers
+        assert response.get_data() == b'PK\x03\x04 backup'
+        assert response.headers['Content-Disposition'] == 'attachment; filename=backup.zip'
+        assert response.cache_control.private
+        response.close()
+
+
+@pytest.mark.parametrize('relative', ['elsewhere/secret.pdf', 'instance/../elsewhere/secret.pdf'])
+def test_files_outside_every_mapping_are_not_redirected(app, nginx, tmp_path, relative):
+    _write(str(tmp_path / 'elsewhere' / 'secret.pdf'))
+    os.makedirs(tmp_path / 'instance', exist_ok=True)
+    with app.test_request_context(headers=nginx.headers):
+        response = downloads.send(str(tmp_path / relative))
+
+        assert nginx.serve(response) is None
+        assert 'X-Accel-Redirect' not in response.headers
+        response.close()
+
+
+def test_missing_file_is_not_found(app, nginx, tmp_path):
+    with app.test_request_context(headers=nginx.headers), pytest.raises(NotFound):
+        downloads.send(str(tmp_path / 'instance' / 'exports' / 'gone.pdf'))
@@ -0,0 +1,114 @@
+import csv
+import os
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from config import Config
+from employee_portal import create_app, db, faces
+from employee_portal.models import Attendance, EmployeeProfile, Role, User
+
+PHOTOS = os.path.join(os.path.dirname(__file__), 'data', 'faces')
+
+
+def _pairs():
+    with open(os.path.join(PHOTOS, 'pairs.csv'), newline='') as f:
+        return [(os.path.join(PHOTOS, row['photo_a']), os.path.join(PHOTOS, row['photo_b']), row['same'] == '1')
+                for row in csv.DictReader(f)]
+
+
+@pytest.fixture(scope='module')
+def dlib_embedder():
+    pytest.importorskip('dlib')
+    pytest.importorskip('face_recognition_models')
+    return faces.DlibEmbedder()
+
+
+def test_matching_and_non_matching_photos_are_separated(dlib_embedder):
+    pairs = _pairs()
+    assert any(same for _, _, same in pairs) and not all(same for _, _, same in pairs)
+
+    result = faces.evaluate(pairs, dlib_embedder, dlib_embedder.threshold)
+
+    assert result['matching'] == sum(same for _, _, same in pairs)
+    assert result['non_matching'] == sum(not same for _, _, same in pairs)
+    assert result['false_accepts'] == 0
+    assert result['false_rejects'] == 0
+    assert result['highest_non_match'] < dlib_embedder.threshold <= result['lowest_match']
+
+
+def test_hog_descriptor_cannot_tell_these_people_apart():
+    # Why it may not identify anyone unmeasured: no threshold accepts every
+    # matching pair here without also accepting a non-matching one
+    result = faces.evaluate(_pairs(), faces.HogEmbedder(), faces.HogEmbedder.threshold)
+    assert result['highest_non_match'] > result['lowest_match']
+
+
+def test_photo_without_a_face_is_refused(dlib_embedder):
+    with pytest.raises(faces.NoFaceError):
+        dlib_embedder.embed(Image.new('RGB', (320, 240), 'gray'))
+
+
+@pytest.fixture
+def app(tmp_path, dlib_embedder):
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "app.db"}'
+        SQLITE_OPTIMIZE_ON_EXIT = False
+        PERF_INSTRUMENTATION = False
+        FACE_EMBEDDER = 'dlib'
+        FACE_MATCH_THRESHOLD = None
+
+    app = create_app(TestConfig)
+    app.instance_path = str(tmp_path)
+    app.extensions['face_embedders'] = {'dlib': dlib_embedder}
+    with app.app_context():
+        db.create_all()
+        admin = User(employeeid='ADM0001', email='admin@example.com', user_role=Role(name='Admin'), is_first_login=False)
+        admin.set_password('pw')
+        db.session.add_all([
+            admin, EmployeeProfile(first_name='Ad', last_name='Min', email='admin@example.com', user=admin),
+            EmployeeProfile(first_name='Barack', last_name='Obama', email='obama@example.com'),
+            EmployeeProfile(first_name='Joe', last_name='Biden', email='biden@example.com'),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _capture(name):
+    with open(os.path.join(PHOTOS, name), 'rb') as f:
+        return {'capture': (BytesIO(f.read()), name)}
+
+
+def test_kiosk_identifies_only_after_accuracy_is_measured(app):
+    obama = EmployeeProfile.query.filter_by(last_name='Obama').one()
+    biden = EmployeeProfile.query.filter_by(last_name='Biden').one()
+    faces.index().enroll(obama.id, faces.embed(os.path.join(PHOTOS, 'obama.jpg')))
+    faces.index().enroll(biden.id, faces.embed(os.path.join(PHOTOS, 'biden.jpg')))
+    client = app.test_client()
+    client.post('/auth/login', data={'employeeid': 'ADM0001', 'password': 'pw'})
+
+    # Unmeasured: no 1:N identification, only 1:1 against the employee the admin picked
+    response = client.post('/attendance/face', data=_capture('obama2.jpg'))
+    assert response.status_code == 409
+    response = client.post('/attendance/face', data=dict(_capture('biden.jpg'), employee_id=obama.id))
+    assert response.status_code == 404
+    response = client.post('/attendance/face', data=dict(_capture('obama2.jpg'), employee_id=obama.id))
+    assert response.status_code == 200
+    assert Attendance.query.filter_by(employee_id=obama.id).count() == 1
+    assert Attendance.query.filter_by(employee_id=biden.id).count() == 0
+
+    # Too few non-matching pairs to bound the false-accept rate
+    faces.record_accuracy(faces.evaluate(_pairs(), faces.embedder(), faces.threshold()))
+    assert not faces.identification_allowed()
+    assert client.post('/attendance/face', data=_capture('obama3.jpg')).status_code == 409
+
+    faces.record_accuracy(dict(faces.accuracy(), non_matching=3000, false_accepts=0, far=0.0))
+    assert faces.identification_allowed()
+    response = client.post('/attendance/face', data=_capture('obama3.jpg'))
+    assert response.status_code == 200
+    assert response.get_json()['employee'] == 'Barack Obama'
@@ -0,0 +1,41 @@
+from datetime import date
+
+import pytest
+
+from config import Config
+from employee_portal import create_app, db
+from employee_portal.models import EmployeeProfile
+from employee_portal.payroll_days import month_day_counts
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "app.db"}'
+        SQLITE_OPTIMIZE_ON_EXIT = False
+        PERF_INSTRUMENTATION = False
+
+    app = create_app(TestConfig)
+    app.instance_path = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        db.session.add(EmployeeProfile(first_name='No', last_name='Show', email='absent@example.com',
+                                       date_of_joining=date(2000, 1, 1)))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_days_that_have_not_happened_are_not_lop(app):
+    today = date.today()
+    past = month_day_counts(today.year - 1, today.month).iloc[0]
+    current = month_day_counts(today.year, today.month).iloc[0]
+    future = month_day_counts(today.year + 1, today.month).iloc[0]
+
+    assert past.lop_days == past.working_days > 0
+    assert current.lop_days <= min(current.working_days, today.day)
+    assert future.working_days > 0
+    assert future.lop_days == 0
+    assert future.lop == 0
@@ -0,0 +1,45 @@
+import pytest
+
+from config import Config
+from employee_portal import create_app, db
+from employee_portal.models import EmployeeProfile, Role, User
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "app.db"}'
+        SQLITE_OPTIMIZE_ON_EXIT = False
+        PERF_INSTRUMENTATION = True
+        PERF_STORE_PATH = str(tmp_path / 'perf.sqlite3')
+
+    app = create_app(TestConfig)
+    app.instance_path = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        for employeeid, role in (('ADM0001', 'Admin'), ('GEN0001', 'Employee')):
+            user = User(employeeid=employeeid, email=f'{employeeid}@example.com', user_role=Role(name=role),
+                        is_first_login=False)
+            user.set_password('pw')
+            db.session.add_all([user, EmployeeProfile(first_name='Test', last_name=role, email=user.email, user=user)])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_server_timing_is_only_sent_to_admins(app):
+    anonymous = app.test_client()
+    assert 'Server-Timing' not in anonymous.get('/auth/login').headers
+
+    employee = app.test_client()
+    employee.post('/auth/login', data={'employeeid': 'GEN0001', 'password': 'pw'})
+    assert 'Server-Timing' not in employee.get('/attendance').headers
+
+    admin = app.test_client()
+    admin.post('/auth/login', data={'employeeid': 'ADM0001', 'password': 'pw'})
+    timings = admin.get('/attendance').headers.getlist('Server-Timing')
+    assert any(timing.startswith('db;dur=') for timing in timings)
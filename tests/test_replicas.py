@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from config import Config
+from employee_portal import create_app, db
+from employee_portal.models import Role, User, EmployeeProfile
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = tmp_path / 'app.db'
+
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        # A second engine on the same file stands in for a streaming replica
+        SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{path}']
+        SQLITE_OPTIMIZE_ON_EXIT = False
+        PERF_INSTRUMENTATION = False
+
+    app = create_app(TestConfig)
+    app.instance_path = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        admin = User(employeeid='ADM0001', email='admin@example.com', user_role=Role(name='Admin'),
+                     is_first_login=False, last_seen=datetime.utcnow() - timedelta(days=1))
+        admin.set_password('pw')
+        db.session.add_all([admin, EmployeeProfile(first_name='Ad', last_name='Min', email='admin@example.com', user=admin)])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    for replica in app.extensions['replicas']:
+        replica.engine.dispose()
+
+
+def _count(engine, counts, key):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counts[key].append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_logged_in_read_replica_view_reads_from_replica(app):
+    client = app.test_client()
+    client.post('/auth/login', data={'employeeid': 'ADM0001', 'password': 'pw'})
+
+    counts = {'primary': [], 'replica': []}
+    with app.app_context():
+        _count(db.engine, counts, 'primary')
+    _count(app.extensions['replicas'][0].engine, counts, 'replica')
+
+    response = client.get('/attendance')
+
+    assert response.status_code == 200
+    # The last_seen heartbeat is committed to the primary first ...
+    assert any(statement.startswith('UPDATE user SET last_seen') for statement in counts['primary'])
+    # ... but does not count as the request having written, so the view's reads use the replica
+    assert any('FROM employee_profile' in statement for statement in counts['replica'])
+    assert not any('FROM employee_profile' in statement for statement in counts['primary'])
+    with app.app_context():
+        assert User.query.filter_by(employeeid='ADM0001').one().last_seen > datetime.utcnow() - timedelta(minutes=1)